@@ -6,9 +6,6 @@ import csv
 import re
 import datetime
 
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-
 REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if REPO_ROOT not in sys.path:
     sys.path.insert(0, REPO_ROOT)
@@ -16,8 +13,8 @@ def csv_path(name="Bet_Tracking.csv"):
     return os.path.join(REPO_ROOT, name)
 
 import config
-
-SERVICE_ACCOUNT_FILE = os.path.join(REPO_ROOT, "credentials.json")
+from core import sheets
+from core.odds_convert import american_to_decimal, decimal_to_american, format_american
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -314,34 +311,6 @@ def parse_float_safe(s):
     except:
         return 0.0
 
-def american_odds_to_decimal(american_str):
-    """
-    Convert e.g. -120 => 1.8333..., +150 => 2.5, etc.
-    """
-    try:
-        val = float(american_str)
-        if val > 0:
-            return 1.0 + (val / 100.0)
-        else:
-            return 1.0 + (100.0 / abs(val))
-    except:
-        return None
-
-def decimal_to_american_str(dec_odds):
-    """
-    Convert decimal odds => American (approx).
-    E.g. 1.83 => -120, 2.5 => +150
-    """
-    if dec_odds <= 1.0:
-        return ""
-    prob = 1.0 / dec_odds
-    if prob >= 0.5:
-        neg = -100 * (prob / (1 - prob))
-        return f"{neg:.0f}"
-    else:
-        pos = 100 * ((1 - prob) / prob)
-        return f"+{pos:.0f}"
-
 # ---------------------------------------------------------
 # CSV UPDATE FUNCTIONS (New Bets, Grade Settled, Merge Event IDs)
 # ---------------------------------------------------------
@@ -402,7 +371,7 @@ def update_csv_betonline(bets, csv_file_path=None):
                 towin_val = parse_float_safe(b.get("toWinAmount", "0"))
                 if stake_val > 0 and towin_val > 0:
                     dec_odds = 1.0 + (towin_val / stake_val)
-                    computed = decimal_to_american_str(dec_odds)
+                    computed = format_american(decimal_to_american(dec_odds))
                     if computed:
                         odds_str = computed
                         print(f"DEBUG: Computed missing odds => {odds_str} from stake={stake_val}, toWin={towin_val}")
@@ -410,7 +379,7 @@ def update_csv_betonline(bets, csv_file_path=None):
             # Profit/Loss in CAD
             profit_loss = ""
             if result_str.lower() == "win":
-                dec = american_odds_to_decimal(odds_str) if odds_str else None
+                dec = american_to_decimal(odds_str) if odds_str else None
                 if dec and dec > 1.0:
                     net_profit_usd = stake_val * (dec - 1.0)
                     profit_loss = f"{net_profit_usd * CAD_CONVERSION_RATE:.2f}"
@@ -489,7 +458,7 @@ def recalc_profit_loss(row):
     elif result_str == "loss":
         profit_loss = f"{-stake_val * CAD_CONVERSION_RATE:.2f}"
     elif result_str == "win":
-        dec = american_odds_to_decimal(odds_str) if odds_str else None
+        dec = american_to_decimal(odds_str) if odds_str else None
         if dec and dec > 1.0:
             net_profit_usd = stake_val * (dec - 1.0)
             profit_loss = f"{net_profit_usd * CAD_CONVERSION_RATE:.2f}"
@@ -863,16 +832,9 @@ def build_matchup_dict_from_live_odds(spreadsheet_id=None, sheet_name=None):
     build a dictionary {canonical_matchup: event_id}.
     """
     sid, tab = _resolve_sheet_id_and_tab(spreadsheet_id, sheet_name)
-    scope = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive.file",
-        "https://www.googleapis.com/auth/drive",
-    ]
     try:
-        creds = ServiceAccountCredentials.from_json_keyfile_name(SERVICE_ACCOUNT_FILE, scope)
-        client = gspread.authorize(creds)
-        sheet = client.open_by_key(sid).worksheet(tab)
-        data = sheet.get_all_values()
+        sheet = sheets.open_ws(sid, tab, create=False)
+        data = sheets.get_values(sheet)
         print("Sheet data:", data)
     except Exception as e:
         print(f"Google Sheets error: {e}")
@@ -17,6 +17,8 @@ _spec = importlib.util.spec_from_file_location("config", _cfg_path)
 config = importlib.util.module_from_spec(_spec)
 _spec.loader.exec_module(config)
 
+from core.odds_convert import american_to_prob
+
 # --- Robust helpers (add or replace) ---
 
 WAIT_SHORT = 2.0
@@ -277,7 +279,6 @@ log(
 import csv
 import random
 import re
-import requests
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -288,9 +289,9 @@ from selenium.common.exceptions import (
     WebDriverException,
     NoSuchElementException,
 )
-from google.oauth2.service_account import Credentials as SA_Credentials
-import gspread, json, traceback
+import traceback
 from gspread.exceptions import WorksheetNotFound, SpreadsheetNotFound
+from core import http_session, sheets
 
 
 def repo_path(*parts):
@@ -304,31 +305,6 @@ def csv_path(name="Bet_Tracking.csv"):
 def creds_path():
     return repo_path("credentials.json")
 
-SHEETS_SCOPES = [
-    "https://spreadsheets.google.com/feeds",
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/drive.file",
-    "https://www.googleapis.com/auth/drive",
-]
-
-
-def _gs_client():
-    keyfile = creds_path()
-    log(f"[Sheets] Using credentials at: {keyfile}")
-    if not os.path.isfile(keyfile):
-        log(f"[Sheets][ERR] credentials.json not found at {keyfile}")
-        return None
-    try:
-        with open(keyfile, "r", encoding="utf-8") as fh:
-            info = json.load(fh)
-        sa_email = info.get("client_email", "<unknown>")
-        log(f"[Sheets] Service account: {sa_email}")
-        creds = SA_Credentials.from_service_account_info(info, scopes=SHEETS_SCOPES)
-        return gspread.authorize(creds)
-    except Exception as e:
-        log(f"[Sheets][ERR] {type(e).__name__}: {e}")
-        log(traceback.format_exc())
-        return None
 
 # -----------------------------------------------------------------------------
 # OFFICIAL TEAM MAPPING & CANONICALIZATION
@@ -372,7 +348,7 @@ def init_driver():
         opts.add_argument("--remote-allow-origins=*")
         url = f"http://127.0.0.1:{port}/json/version"
         try:
-            resp = requests.get(url, timeout=2.0)
+            resp = http_session.get(url, timeout=2.0, retries=1)
             if resp.status_code != 200:
                 log(f"[FATAL] DevTools not reachable at {url}")
                 raise RuntimeError("DevTools not reachable")
@@ -1157,13 +1133,6 @@ def grade_settled_bets(driver, csv_file_path=None):
     Check if any bets in the CSV have settled (Win/Loss/Refund) and update them.
     Also recalc CLV% and Profit/Loss where possible.
     """
-    def american_to_probability(odds_str):
-        try:
-            val = float(odds_str.strip())
-            return 100.0 / (val + 100.0) if val > 0 else -val / (-val + 100.0)
-        except:
-            return None
-
     csv_file_path = csv_file_path or csv_path("Bet_Tracking.csv")
     if not os.path.isfile(csv_file_path):
         return
@@ -1208,8 +1177,8 @@ def grade_settled_bets(driver, csv_file_path=None):
             stake = 0.0
         closing_line = row["Closing Line"].strip()
         if closing_line:
-            original_prob = american_to_probability(row["Odds"])
-            closing_prob = american_to_probability(closing_line)
+            original_prob = american_to_prob(row["Odds"])
+            closing_prob = american_to_prob(closing_line)
             if original_prob and closing_prob and original_prob > 0:
                 row["CLV%"] = f"{((closing_prob / original_prob) - 1)*100:.2f}"
             else:
@@ -1223,7 +1192,7 @@ def grade_settled_bets(driver, csv_file_path=None):
         elif result == "refund":
             row["Profit/Loss"] = "0"
         else:
-            orig_prob = american_to_probability(row["Odds"])
+            orig_prob = american_to_prob(row["Odds"])
             if orig_prob and orig_prob > 0:
                 decimal_odds = 1.0 / orig_prob
             else:
@@ -1249,14 +1218,16 @@ def grade_settled_bets(driver, csv_file_path=None):
 # -----------------------------------------------------------------------------
 def build_matchup_dict_from_live_odds(spreadsheet_id=None, sheet_name=None):
     sid, tab = _resolve_sheet_id_and_tab(spreadsheet_id, sheet_name)
-    client = _gs_client()
-    if not client or not sid:
+    if not sid:
+        return {}
+    if not os.path.isfile(creds_path()):
+        log(f"[Sheets][ERR] credentials.json not found at {creds_path()}")
         return {}
     try:
         log(f"[Sheets] Opening spreadsheet '{sid}'")
-        sh = client.open_by_key(sid)
-        sheet = sh.worksheet(tab)
-        data = sheet.get_all_values()
+        # shared client/handles from core.sheets: no re-auth or extra metadata fetch
+        sheet = sheets.open_ws(sid, tab, create=False)
+        data = sheets.get_values(sheet)
 
         if len(data) < 2:
             log(f"[Merge][WARN] Worksheet '{tab}' is empty or has no data to merge")
@@ -1,9 +1,10 @@
 
 
+import argparse
 import csv
-import os, sys, unicodedata
-import datetime
 import json
+import os, sys
+import datetime
 import traceback
 from typing import List, Dict, Tuple, Optional
 
@@ -11,27 +12,13 @@ REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if REPO_ROOT not in sys.path:
     sys.path.insert(0, REPO_ROOT)
 import config
+from core import sheets
+from core.bets_mirror import BetsMirror, canonical_header
+from core.sheets import SheetWriter, get_values, invalidate, prefetch
 
 import gspread
 from gspread import Worksheet
 from gspread.utils import rowcol_to_a1
-from google.oauth2.service_account import Credentials
-
-SHEETS_SCOPES = [
-    "https://spreadsheets.google.com/feeds",
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/drive.file",
-    "https://www.googleapis.com/auth/drive",
-]
-
-
-def gs_client_debug(keyfile: str):
-    with open(keyfile, "r", encoding="utf-8") as fh:
-        info = json.load(fh)
-    sa_email = info.get("client_email", "<unknown>")
-    dlog(f"Service account: {sa_email}")
-    creds = Credentials.from_service_account_info(info, scopes=SHEETS_SCOPES)
-    return gspread.authorize(creds)
 
 # -----------------------------
 # CONFIGURATION
@@ -46,16 +33,8 @@ FIRST_DATA_ROW = getattr(config, "BET_FIRST_DATA_ROW", 8)
 
 DATE_FORMAT = "%Y-%m-%d"
 TIME_FORMAT = "%H:%M"
-
-HEADER_ALIASES = {
-    "Bet ID#": ["bet id#", "bet id", "ticket #", "ticket number", "ticket", "wager #", "wager id"],
-    "Profit/Loss": ["profit/loss", "profit / loss", "p/l", "net", "net profit"],
-    "Date": ["date"],
-    "Start Time": ["start time", "time"],
-    "Event ID": ["event id", "game id", "match id"],
-    "Result": ["result", "status", "outcome"],
-}
-
+# helper column (after the last header) holding each row's rank for sortRange
+SORT_KEY_HEADER = "Sort Key"
 
 def _ts():
     return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -68,25 +47,6 @@ def dlog(msg):
         print(msg)
 
 
-def _norm(s: str) -> str:
-    if s is None:
-        return ""
-    s = unicodedata.normalize("NFKC", str(s)).replace("\u200b", "").replace("\xa0", " ")
-    return s.strip()
-
-
-def canonicalize_header_list(header_row):
-    rev = {}
-    for canon, variants in HEADER_ALIASES.items():
-        rev[_norm(canon).lower()] = canon
-        for v in variants:
-            rev[_norm(v).lower()] = canon
-    out = []
-    for h in header_row:
-        key = _norm(h).lower()
-        out.append(rev.get(key, _norm(h)))
-    return out
-
 # -----------------------------
 # HELPER FUNCTIONS (existing)
 # -----------------------------
@@ -138,10 +98,9 @@ def read_csv_data(csv_file_path: str) -> List[Dict[str, str]]:
 # GOOGLE SHEETS CONNECTION (existing)
 # -----------------------------
 def connect_google_sheets() -> Worksheet:
-    print(f"[Sheets] Using credentials at: {SERVICE_ACCOUNT_FILE}")
     try:
-        client = gs_client_debug(SERVICE_ACCOUNT_FILE)
-        sheet = client.open_by_key(SHEET_ID).worksheet(SHEET_NAME)
+        # process-wide client and handles, shared with odds_sync/clv_sync in hybrid runs
+        sheet = sheets.open_ws(SHEET_ID, SHEET_NAME, create=False)
         dlog("Connected to Google Sheets.")
         return sheet
     except Exception as e:
@@ -153,26 +112,25 @@ def connect_google_sheets() -> Worksheet:
 # SHEET HELPER FUNCTIONS (existing)
 # -----------------------------
 def get_sheet_headers_from_row(sheet: Worksheet, header_row: int) -> Tuple[List[str], List[List[str]]]:
-    all_values = sheet.get_all_values()
+    all_values = get_values(sheet)
     if len(all_values) < header_row:
         raise ValueError(f"Sheet doesn't have enough rows to read headers at row {header_row}.")
     header = all_values[header_row - 1]
     data_rows = all_values[header_row:]
     return header, data_rows
 
-def build_bet_id_mapping(data_rows: List[List[str]], bet_id_col_index: int, first_data_row: int) -> Dict[str, int]:
-    mapping = {}
-    for i, row in enumerate(data_rows, start=first_data_row):
-        if bet_id_col_index < len(row):
-            bet_id = row[bet_id_col_index].strip()
-            if bet_id:
-                mapping[bet_id] = i
-    return mapping
-
 def sort_sheet(sheet: Worksheet, header_row: int, first_data_row: int, sheet_header: List[str]) -> None:
-    all_values = sheet.get_all_values()
+    """
+    Order the data rows: pending bets first (by start time), then settled bets in
+    their existing order, blank rows last. The target rank of every non-blank
+    row is written to the SORT_KEY_HEADER helper column (created in the first
+    empty column right of the header on first use; blank rows are left empty)
+    and the rows are moved server-side by one sortRange request, so formulas and
+    formatting travel with their row. Nothing is sent when the rows are already
+    in order.
+    """
+    all_values = get_values(sheet)
     data_rows = all_values[first_data_row - 1:]
-    data_rows = [row for row in data_rows if any(cell.strip() for cell in row)]
     try:
         result_index = sheet_header.index("Result")
     except ValueError:
@@ -184,7 +142,21 @@ def sort_sheet(sheet: Worksheet, header_row: int, first_data_row: int, sheet_hea
         dlog("Error: 'Start Time' column not found in header during sort.")
         return
 
-    def sort_key(row):
+    if SORT_KEY_HEADER in sheet_header:
+        key_col = sheet_header.index(SORT_KEY_HEADER) + 1
+        new_key_col = False
+    else:
+        # first column right of the header that is empty in every row, so the
+        # helper never overwrites unlabelled data
+        key_col = max((i for i, h in enumerate(sheet_header) if h.strip()), default=-1) + 2
+        while any(len(row) >= key_col and str(row[key_col - 1]).strip() for row in all_values):
+            key_col += 1
+        new_key_col = True
+
+    def sort_key(i):
+        row = data_rows[i]
+        if not any(cell.strip() for j, cell in enumerate(row) if j != key_col - 1):
+            return (2,)
         result = row[result_index].strip().lower() if len(row) > result_index else ""
         group = 0 if result in ("", "pending") else 1
         if group == 0:
@@ -197,13 +169,39 @@ def sort_sheet(sheet: Worksheet, header_row: int, first_data_row: int, sheet_hea
         else:
             return (group,)
 
-    sorted_rows = sorted(data_rows, key=sort_key)
-    if not sorted_rows:
+    order = sorted(range(len(data_rows)), key=sort_key)
+    if order == list(range(len(data_rows))):
+        dlog("Sheet rows already in order; sort skipped.")
         return
-    start_cell = rowcol_to_a1(first_data_row, 1)
-    end_cell = rowcol_to_a1(first_data_row + len(sorted_rows) - 1, len(sheet_header))
-    range_address = f"{start_cell}:{end_cell}"
-    sheet.update(range_address, sorted_rows, value_input_option="USER_ENTERED")
+
+    # blank rows get an empty key (sortRange puts empty cells last), so they
+    # stay blank and are not mistaken for bets by later reads
+    ranks = [""] * len(order)
+    for pos, i in enumerate(order, start=1):
+        if sort_key(i) != (2,):
+            ranks[i] = pos
+    if sheet.col_count < key_col:
+        sheets.call_with_backoff(sheet.resize, cols=key_col, tab=sheet.title)
+    with SheetWriter(sheet) as writer:
+        if new_key_col:
+            writer.update_cell(header_row, key_col, SORT_KEY_HEADER)
+        writer.update(rowcol_to_a1(first_data_row, key_col), [[r] for r in ranks])
+    last_row = first_data_row + len(order) - 1
+    sheets.call_with_backoff(sheet.spreadsheet.batch_update, {
+        "requests": [{
+            "sortRange": {
+                "range": {
+                    "sheetId": sheet.id,
+                    "startRowIndex": first_data_row - 1,
+                    "endRowIndex": last_row,
+                    "startColumnIndex": 0,
+                    "endColumnIndex": sheet.col_count,
+                },
+                "sortSpecs": [{"dimensionIndex": key_col - 1, "sortOrder": "ASCENDING"}],
+            }
+        }]
+    }, op="sort_range", tab=sheet.title)
+    invalidate(sheet, first_data_row, last_row)
     dlog("Sheet rows sorted: pending bets at the top, settled bets at the bottom, with pending bets ordered by start time.")
 
 # -----------------------------
@@ -220,14 +218,15 @@ def backfill_event_ids_from_live_odds(sh):
     import config
 
     try:
-        ws_live = sh.worksheet(config.LIVE_ODDS_TAB)
-        ws_bets = sh.worksheet(config.BET_SHEET_TAB)
+        ws_live = sheets.open_ws(sh.id, config.LIVE_ODDS_TAB, create=False)
+        ws_bets = sheets.open_ws(sh.id, config.BET_SHEET_TAB, create=False)
     except Exception:
         dlog("[Sheets Sync] Skipped Event ID backfill: Live Odds or Bets tab not found.")
         return
 
-    live_values = ws_live.get_all_values()
-    bets_values = ws_bets.get_all_values()
+    prefetch(sh, [config.LIVE_ODDS_TAB, config.BET_SHEET_TAB])  # one batchGet for both tabs
+    live_values = get_values(ws_live)
+    bets_values = get_values(ws_bets)
     if not live_values or not bets_values:
         dlog("[Sheets Sync] Skipped Event ID backfill: one of the tabs is empty.")
         return
@@ -311,8 +310,9 @@ def backfill_event_ids_from_live_odds(sh):
         dlog("[Sheets Sync] Backfilled 0 Event IDs from Live Odds (Sheet1).")
         return
 
-    for r, c, val in updates:
-        ws_bets.update_cell(r, c, val)
+    with SheetWriter(ws_bets) as writer:
+        for r, c, val in updates:
+            writer.update_cell(r, c, val)
 
     dlog(f"[Sheets Sync] Backfilled {len(updates)} Event IDs from Live Odds (Sheet1).")
 
@@ -326,7 +326,7 @@ def partial_update_google_sheets(csv_file_path: str = CSV_FILE_PATH) -> gspread.
     dlog("Connected to Google Sheets.")
 
     sheet_header, sheet_data_rows = get_sheet_headers_from_row(sheet, HEADER_ROW)
-    sheet_header = canonicalize_header_list(sheet_header)
+    sheet_header = canonical_header(sheet_header)
     dlog(f"Header row {HEADER_ROW} values: {sheet_header}")
 
     required_cols = ["Bet ID#", "Result", "Profit/Loss", "Date", "Start Time", "Event ID"]
@@ -336,14 +336,13 @@ def partial_update_google_sheets(csv_file_path: str = CSV_FILE_PATH) -> gspread.
             dlog(f'Header row seen by script: {sheet_header}')
             return
 
-    bet_id_index = sheet_header.index("Bet ID#")
-    event_id_index = sheet_header.index("Event ID")
-
-    bet_id_to_row = build_bet_id_mapping(
-        sheet_data_rows,
-        bet_id_col_index=bet_id_index,
-        first_data_row=FIRST_DATA_ROW
-    )
+    # bets are read from and changed in the local mirror; only dirty rows go
+    # back, as one batchUpdate plus one append_rows before sorting
+    mirror = BetsMirror(config.BETS_MIRROR_PATH)
+    pulled = mirror.pull(sheet_header, sheet_data_rows, FIRST_DATA_ROW)
+    for c in pulled.conflicts:
+        dlog(f"WARNING: Bet ID {c.bet_id} '{c.column}' was edited in the sheet ('{c.sheet}') and locally ('{c.local}'); keeping the sheet value.")
+    writer = SheetWriter(sheet)
 
     csv_rows = read_csv_data(csv_file_path)
     dlog(f"CSV has {len(csv_rows)} rows (after decode).")
@@ -364,42 +363,28 @@ def partial_update_google_sheets(csv_file_path: str = CSV_FILE_PATH) -> gspread.
             continue
 
         csv_event_id = csv_row.get("Event ID", "").strip()
+        bet = mirror.get(bet_id)
 
-        if bet_id in bet_id_to_row:
-            row_num = bet_id_to_row[bet_id]
-            try:
-                current_sheet_event_id = sheet.cell(row_num, event_id_index + 1).value or ""
-            except Exception as e:
-                dlog(f"WARNING: Could not retrieve current event ID for Bet ID {bet_id} at row {row_num}: {e}")
-                current_sheet_event_id = ""
-
+        if bet is not None:
+            changes = {}
+            current_sheet_event_id = str(bet["Event ID"]).strip()
             if csv_event_id and (not current_sheet_event_id or current_sheet_event_id.lower() == "unknown"):
-                dlog(f"Updating Bet ID {bet_id} at row {row_num}")
-                try:
-                    sheet.update_cell(row_num, event_id_index + 1, csv_event_id)
-                    updated_count += 1
-                except Exception as e:
-                    dlog(f"Error updating 'Event ID' for Bet ID {bet_id}: {e}")
-
-            try:
-                current_result = sheet.cell(row_num, sheet_header.index("Result") + 1).value or ""
-            except Exception as e:
-                dlog(f"WARNING: Could not retrieve current result for Bet ID {bet_id} at row {row_num}: {e}")
-                current_result = ""
+                changes["Event ID"] = csv_event_id
 
+            current_result = str(bet["Result"])
             if current_result.strip().lower() in ["", "pending"]:
                 new_result = csv_row.get("Result", "").strip()
                 pl_value = convert_profit_loss(csv_row.get("Profit/Loss", "").strip())
-                dlog(f"Updating Bet ID {bet_id} at row {row_num}")
-                try:
-                    sheet.update_cell(row_num, sheet_header.index("Result") + 1, new_result)
-                    pl_cell = rowcol_to_a1(row_num, sheet_header.index("Profit/Loss") + 1)
-                    sheet.update(pl_cell, [[pl_value]], value_input_option="USER_ENTERED")
-                    updated_count += 1
-                except Exception as e:
-                    dlog(f"Error updating row {row_num} for Bet ID {bet_id}: {e}")
+                if new_result != current_result:
+                    changes["Result"] = new_result
+                if pl_value != convert_profit_loss(str(bet["Profit/Loss"])):
+                    changes["Profit/Loss"] = pl_value
             else:
                 dlog(f"DEBUG: Row #{idx} => Bet ID {bet_id} is already settled with '{current_result}', skipping update.")
+
+            if changes and mirror.update(bet_id, changes):
+                dlog(f"Updating Bet ID {bet_id}")
+                updated_count += 1
         else:
             current_date = datetime.datetime.now().date()
             if dt_obj.date() == current_date and dt_obj.time() < datetime.time(3, 0):
@@ -409,24 +394,19 @@ def partial_update_google_sheets(csv_file_path: str = CSV_FILE_PATH) -> gspread.
                 dlog(f"DEBUG: Row #{idx} => not in keep window; skipping new bet.")
                 continue
 
-            new_result = csv_row.get("Result", "").strip()
-            pl_value = convert_profit_loss(csv_row.get("Profit/Loss", "").strip())
-
-            new_row_values = []
-            for col_name in sheet_header:
-                if col_name == "Profit/Loss":
-                    new_row_values.append(pl_value)
-                else:
-                    new_row_values.append(csv_row.get(col_name, ""))
+            new_values = {col_name: csv_row.get(col_name, "") for col_name in sheet_header}
+            new_values["Profit/Loss"] = convert_profit_loss(csv_row.get("Profit/Loss", "").strip())
             dlog(f"Appending Bet ID {bet_id}")
-            try:
-                sheet.append_row(new_row_values, value_input_option="USER_ENTERED")
-                appended_count += 1
-            except Exception as e:
-                dlog(f"Error appending row for Bet ID {bet_id}: {e}")
-                raise
+            mirror.insert(new_values)
+            appended_count += 1
+
+    pushed = mirror.push(writer)  # one batchUpdate for changed cells, one append_rows for new bets
+    dlog(f"CSV sync complete: {updated_count} rows updated, {appended_count} rows appended ({pushed} dirty rows pushed in {writer.calls} write calls).")
 
-    dlog(f"CSV sync complete: {updated_count} rows updated, {appended_count} rows appended.")
+    try:
+        fill_formulas(sheet)
+    except Exception as e:
+        dlog(f"Error copying formula from N1/O1 down: {e}")
 
     try:
         dlog("Sorting rows...")
@@ -435,81 +415,111 @@ def partial_update_google_sheets(csv_file_path: str = CSV_FILE_PATH) -> gspread.
     except Exception as e:
         dlog(f"Error sorting the sheet: {e}")
 
-    # -----------------------------
-    # COPY FORMULA FROM N1/O1 DOWN TO LAST DATA ROW DYNAMICALLY
-    # -----------------------------
-    try:
-        dlog("Copying formulas from N1/O1 down to last data row...")
-        all_values = sheet.get_all_values()
-        last_row = len(all_values)
-        if last_row >= FIRST_DATA_ROW:
-            # Copy formula from N1 down from row N{FIRST_DATA_ROW} to last row
-            source_N = {
-                "sheetId": sheet.id,
-                "startRowIndex": 0,         # Row 1 (0-indexed)
-                "endRowIndex": 1,
-                "startColumnIndex": 13,       # Column N (0-indexed)
-                "endColumnIndex": 14,
-            }
-            destination_N = {
-                "sheetId": sheet.id,
-                "startRowIndex": FIRST_DATA_ROW - 1,  # starting row
-                "endRowIndex": last_row,               # to the last row
-                "startColumnIndex": 13,
-                "endColumnIndex": 14,
-            }
-            request_N = {
-                "copyPaste": {
-                    "source": source_N,
-                    "destination": destination_N,
-                    "pasteType": "PASTE_FORMULA",
-                    "pasteOrientation": "NORMAL"
-                }
-            }
-
-            # Copy formula from O1 down from row O{FIRST_DATA_ROW} to last row
-            source_O = {
-                "sheetId": sheet.id,
-                "startRowIndex": 0,         # Row 1 (0-indexed)
-                "endRowIndex": 1,
-                "startColumnIndex": 14,       # Column O (0-indexed)
-                "endColumnIndex": 15,
-            }
-            destination_O = {
-                "sheetId": sheet.id,
-                "startRowIndex": FIRST_DATA_ROW - 1,  # starting row
-                "endRowIndex": last_row,               # to the last row
-                "startColumnIndex": 14,
-                "endColumnIndex": 15,
-            }
-            request_O = {
-                "copyPaste": {
-                    "source": source_O,
-                    "destination": destination_O,
-                    "pasteType": "PASTE_FORMULA",
-                    "pasteOrientation": "NORMAL"
-                }
-            }
-
-            # Batch both requests
-            body = {
-                "requests": [request_N, request_O]
-            }
-            sheet.spreadsheet.batch_update(body)
-            dlog(f"Formula in N1 copied down dynamically from N{FIRST_DATA_ROW} to N{last_row}.")
-            dlog(f"Formula in O1 copied down dynamically from O{FIRST_DATA_ROW} to O{last_row}.")
-        else:
-            dlog("No data rows to copy formula into.")
-    except Exception as e:
-        dlog(f"Error copying formula from N1/O1 down: {e}")
-
     dlog("CSV sync complete.")
     return sheet.spreadsheet
 
+# -----------------------------
+# COPY FORMULA FROM N1/O1 DOWN TO NEW DATA ROWS
+# -----------------------------
+def _fill_state_key(sheet: Worksheet) -> str:
+    return f"{sheet.spreadsheet_id}/{sheet.title}"
+
+
+def _load_fill_state() -> Dict[str, int]:
+    try:
+        with open(config.FORMULA_FILL_STATE_PATH, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save_fill_state(state: Dict[str, int]) -> None:
+    path = config.FORMULA_FILL_STATE_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(state, fh, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _copy_formula_request(sheet: Worksheet, col_index: int, first_row: int, last_row: int) -> dict:
+    return {
+        "copyPaste": {
+            "source": {
+                "sheetId": sheet.id,
+                "startRowIndex": 0,         # Row 1 (0-indexed)
+                "endRowIndex": 1,
+                "startColumnIndex": col_index,
+                "endColumnIndex": col_index + 1,
+            },
+            "destination": {
+                "sheetId": sheet.id,
+                "startRowIndex": first_row - 1,
+                "endRowIndex": last_row,
+                "startColumnIndex": col_index,
+                "endColumnIndex": col_index + 1,
+            },
+            "pasteType": "PASTE_FORMULA",
+            "pasteOrientation": "NORMAL"
+        }
+    }
+
+
+def fill_formulas(sheet: Worksheet, full: bool = False) -> Optional[Tuple[int, int]]:
+    """
+    Paste the N1/O1 formulas (Closing Line / CLV%) into data rows that don't have
+    them yet. The last filled row is kept in config.FORMULA_FILL_STATE_PATH, so a
+    normal run only touches rows appended since the previous one; ``full=True``
+    (``--refill-formulas``) re-pastes from FIRST_DATA_ROW for repair.
+    Must run before sort_sheet: sortRange carries formulas with their rows, so
+    the filled rows stay exactly FIRST_DATA_ROW..last filled row.
+    Returns the (first, last) row range pasted, or None.
+    """
+    state = _load_fill_state()
+    key = _fill_state_key(sheet)
+    last_row = len(get_values(sheet))
+    first_row = FIRST_DATA_ROW if full else max(FIRST_DATA_ROW, int(state.get(key, 0)) + 1)
+    if first_row > last_row:
+        dlog(f"Formulas already filled through row {state.get(key)}; nothing to copy.")
+        if state.get(key) != last_row:
+            state[key] = last_row  # rows were removed; new appends start below the data
+            _save_fill_state(state)
+        return None
+
+    body = {
+        "requests": [
+            _copy_formula_request(sheet, 13, first_row, last_row),  # Column N
+            _copy_formula_request(sheet, 14, first_row, last_row),  # Column O
+        ]
+    }
+    sheets.call_with_backoff(sheet.spreadsheet.batch_update, body, op="copy_formulas", tab=sheet.title)
+    invalidate(sheet, first_row, last_row)
+    state[key] = last_row
+    _save_fill_state(state)
+    dlog(f"Formulas in N1/O1 copied down to N{first_row}:O{last_row}.")
+    return first_row, last_row
+
+
+def refill_formulas() -> None:
+    """Repair command: re-paste N1/O1 formulas into every data row."""
+    sheet = connect_google_sheets()
+    if fill_formulas(sheet, full=True) is None:
+        dlog("No data rows to copy formula into.")
+
 # -----------------------------
 # MAIN FUNCTION
 # -----------------------------
-def main() -> None:
+def _parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Sync Bet_Tracking.csv into the Bets tab.")
+    ap.add_argument("--refill-formulas", action="store_true", help="only re-paste the N1/O1 formulas into every data row (repair)")
+    return ap.parse_args(argv)
+
+def main(argv=None) -> None:
+    args = _parse_args(argv)
+    if args.refill_formulas:
+        refill_formulas()
+        return
     sh = None
     try:
         sh = partial_update_google_sheets()
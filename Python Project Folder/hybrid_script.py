@@ -9,29 +9,45 @@ import odds_sync
 # Allow importing sync scripts from repository root
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import clv_sync
+from core import sheets_metrics
+
+def _stage(name, stages, fn, *args):
+    """Run one stage in-process, noting how many Sheets API calls it made."""
+    before = sheets_metrics.METRICS.total_calls()
+    try:
+        return fn(*args)
+    finally:
+        stages[name] = {"total_calls": sheets_metrics.METRICS.total_calls() - before}
 
 def hybrid_main():
+    stages = {}
+    try:
+        _pipeline(stages)
+    finally:
+        sheets_metrics.finish_run(config.RUN_REPORT_DIR, stages)
+
+def _pipeline(stages):
     print("Starting Pinnacle scraper...")
-    Pinnacle_Scraper.main()
+    _stage("Pinnacle_Scraper", stages, Pinnacle_Scraper.main)
 
     if getattr(config, "ENABLE_BETONLINE", False):
         try:
             print("Starting BetOnline scraper...")
             import BetOnline_Scraper
-            BetOnline_Scraper.main()
+            _stage("BetOnline_Scraper", stages, BetOnline_Scraper.main)
         except Exception as e:
             print(f"[WARN] BetOnline step skipped: {e}")
     else:
         print("[INFO] BetOnline disabled via config.")
 
     print("Syncing CSV data to Google Sheets...")
-    google_sheets_sync.partial_update_google_sheets()
+    _stage("google_sheets_sync", stages, google_sheets_sync.partial_update_google_sheets)
 
     print("Refreshing Live/Detailed Odds from The Odds API...")
-    odds_sync.main()
+    _stage("odds_sync", stages, odds_sync.main, [])
 
     print("Updating Closing Line & CLV%...")
-    clv_sync.main()
+    _stage("clv_sync", stages, clv_sync.main, [])
 
 if __name__ == "__main__":
     hybrid_main()
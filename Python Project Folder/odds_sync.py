@@ -1,13 +1,16 @@
+import argparse
 import re
 import sys
-import time
 from pathlib import Path
-from typing import List
-
-import requests
+from typing import List, Optional, Tuple
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
-from core import sheets
+from core import event_index, http_session, odds_api, sheets
+from core.fetch_pool import map_ordered
+from core.http_cache import ResponseCache
+from core.odds_planner import EventRequest, line_offered, plan_event_requests
+from core.odds_quota import QuotaTracker, schedule_requests
+from core.tick_store import TickStore
 
 import config
 
@@ -22,20 +25,27 @@ def _norm_team(s: str) -> str:
     return s
 
 def refresh_live_odds():
+    """
+    Write the Live Odds tab; returns {event_id: (league, event)} from the league feeds
+    so bulk mode can build main-market Detailed Odds without per-event calls.
+    """
     ws = sheets.open_ws(config.GOOGLE_SHEET_ID, config.LIVE_ODDS_TAB)
     header = ["League", "Event ID", "Event/Match", "Commence Time", "Bookmaker Count"]
-    sheets.write_header(ws, header)
+    writer = sheets.SheetWriter(ws)
+    sheets.write_header(ws, header, writer=writer)
 
     rowbuf = []
+    seen = []
+    feed = {}
     for league in config.LEAGUES:
         url = f"https://api.the-odds-api.com/v4/sports/{league}/odds"
         params = {
             "apiKey": config.ODDS_API_KEY,
-            "regions": config.ODDS_REGIONS,
+            **odds_api.book_params(),
             "oddsFormat": config.ODDS_FORMAT,
             "markets": "h2h,spreads,totals",
         }
-        resp = requests.get(url, params=params, timeout=20)
+        resp = odds_api.get(url, params=params, timeout=20)
         if resp.status_code != 200:
             try:
                 body = resp.json()
@@ -57,14 +67,22 @@ def refresh_live_odds():
             commence = evt.get("commence_time", "")
             bk_count = len(evt.get("bookmakers", []))
             rowbuf.append([league, event_id, matchup, commence, bk_count])
+            seen.append((league, event_id, commence))
+            if event_id:
+                feed[event_id] = (league, evt)
         wrote = len(rowbuf) - before
         print(
             f"[Live Odds] {league} HTTP {resp.status_code}  Wrote {wrote} rows  (books={len(config.ALLOWED_BOOKS)})"
         )
 
+    # remember which league each event lives in so per-event calls skip probing
+    event_index.update_index(seen, config.EVENT_INDEX_PATH)
+
     if rowbuf:
-        ws.update("A2", rowbuf, value_input_option="USER_ENTERED")
+        writer.update("A2", rowbuf)
+    writer.flush()  # header and rows go out as one batchUpdate
     print(f"[Live Odds] Wrote {len(rowbuf)} rows.")
+    return feed
 
 def _build_user_market_and_label(mkt_key: str, outcome: dict, league: str, bet_select_hint: str = "") -> (str, str, str):
     """
@@ -96,41 +114,43 @@ def _build_user_market_and_label(mkt_key: str, outcome: dict, league: str, bet_s
         name_norm = _norm_team(name or desc)
         return "h2h", name_norm, ""
 
-def _rows_for_event(event_id: str, user_market: str, bet_select: str, league: str) -> List[List[str]]:
+def _market_family(user_market: str) -> Optional[str]:
+    m = user_market.lower()
+    if m.startswith("spreads"):
+        return "spreads"
+    elif m.startswith("totals"):
+        return "totals"
+    elif m in ("h2h","moneyline","ml"):
+        return "h2h"
+    # player_* props are out of scope for CLV sync today; skip quietly
+    return None
+
+def _fetch_event(event_id: str, league: str, markets: str) -> Optional[dict]:
     """
-    Fetch per-event odds for allowed books and build rows for Detailed Odds.
+    Fetch per-event odds for one league; None when the event isn't found there.
     """
-    rows = []
-    markets = []
-    if user_market.lower().startswith("spreads"):
-        markets = ["spreads","alternate_spreads"]
-    elif user_market.lower().startswith("totals"):
-        markets = ["totals","alternate_totals"]
-    elif user_market.lower() in ("h2h","moneyline","ml"):
-        markets = ["h2h"]
-    elif user_market.lower().startswith("player_"):
-        # out of scope for CLV sync today; skip quietly
-        return rows
-    else:
-        return rows
-
     url = f"https://api.the-odds-api.com/v4/sports/{league}/events/{event_id}/odds"
     params = {
         "apiKey": config.ODDS_API_KEY,
-        "regions": config.ODDS_REGIONS,
+        **odds_api.book_params(),
         "oddsFormat": config.ODDS_FORMAT,
-        "markets": ",".join(markets)
+        "markets": markets
     }
-    r = requests.get(url, params=params, timeout=25)
+    r = odds_api.get(url, params=params, timeout=config.ODDS_REQUEST_TIMEOUT)
     if r.status_code != 200:
         try:
             body = r.json()
         except Exception:
             body = r.text[:200]
         print(f"[WARN] Event {event_id} {league} HTTP {r.status_code}: {body}")
-        return rows
+        return None
+    return r.json()
 
-    data = r.json()
+def _rows_for_event(event_id: str, user_market: str, bet_select: str, league: str, data: dict) -> List[List[str]]:
+    """
+    Build Detailed Odds rows for one bet from an already fetched event payload.
+    """
+    rows = []
     for bk in data.get("bookmakers", []):
         if bk.get("key","") not in config.ALLOWED_BOOKS:
             continue
@@ -155,16 +175,14 @@ def _rows_for_event(event_id: str, user_market: str, bet_select: str, league: st
                 ])
     return rows
 
-def refresh_detailed_odds_from_bets():
+def refresh_detailed_odds_from_bets(bulk=None):
     ws_bets = sheets.open_ws(config.GOOGLE_SHEET_ID, config.BET_SHEET_TAB)
 
-    # read Event ID (col 3), Market (6), Bet (9) from bet rows
-    event_ids = ws_bets.col_values(3)[config.BET_FIRST_DATA_ROW-1:]   # C
-    markets   = ws_bets.col_values(6)[config.BET_FIRST_DATA_ROW-1:]   # F
-    bets      = ws_bets.col_values(9)[config.BET_FIRST_DATA_ROW-1:]   # I
+    # read Event ID (col C), Market (F), Bet (I) from the shared Bets snapshot
+    rows = [r + [""] * (9 - len(r)) for r in sheets.get_values(ws_bets)[config.BET_FIRST_DATA_ROW-1:]]
 
     triplets = []
-    for eid, mkt, sel in zip(event_ids, markets, bets):
+    for eid, mkt, sel in ((r[2], r[5], r[8]) for r in rows):
         eid = (eid or "").strip()
         mkt = (mkt or "").strip().lower()
         sel = (sel or "").strip()
@@ -176,35 +194,114 @@ def refresh_detailed_odds_from_bets():
         "Event ID","User Market","User Bet Selection","Bookmaker",
         "API Market","Outcome Name (Normalized)","Outcome Point","Odds"
     ]
-    sheets.write_header(ws_det, header)
-
-    out_rows = []
-    for i, (eid, mkt, sel) in enumerate(triplets, start=1):
-        # try each league until the event is found
-        found_any = False
-        for league in config.LEAGUES:
-            rs = _rows_for_event(eid, mkt, sel, league)
-            if rs:
-                out_rows.extend(rs)
-                found_any = True
-                break
-        if not found_any:
-            # not fatal, skip if The Odds API doesn't know that event under our chosen leagues
-            pass
-        # small backoff to be gentle with API
-        if i % 10 == 0:
-            time.sleep(0.5)
+    writer = sheets.SheetWriter(ws_det)
+    sheets.write_header(ws_det, header, writer=writer)
+
+    per_bet = [[] for _ in triplets]
+    need = list(range(len(triplets)))
+    if bulk:
+        # bulk mode: main markets come straight from the league feed; only
+        # spread/total bets whose line isn't a main line still need alternates
+        need = []
+        for i, (eid, mkt, sel) in enumerate(triplets):
+            if eid not in bulk:
+                need.append(i)
+                continue
+            league, evt = bulk[eid]
+            per_bet[i] = _rows_for_event(eid, mkt, sel, league, evt)
+            if _market_family(mkt) in ("spreads", "totals") and not line_offered(sel, per_bet[i]):
+                need.append(i)
+
+    index = event_index.load_index(config.EVENT_INDEX_PATH)
+    # one request per event covering every market family its bets need
+    plans = plan_event_requests([triplets[i] for i in need], _market_family)
+    for plan in plans:
+        plan.bets = [need[j] for j in plan.bets]
+        plan.alternates_only = bool(bulk) and plan.event_id in bulk
+    # soonest-starting events first; alternates dropped before mains when credits run low
+    tracker = odds_api.quota()
+    commence = {eid: entry.get("commence_time", "") for eid, entry in index.items()}
+    plans, notes = schedule_requests(
+        plans,
+        commence,
+        tracker.remaining if tracker else None,
+        odds_api.billing_regions(),
+        reserve=config.ODDS_QUOTA_RESERVE,
+        alt_threshold=config.ODDS_QUOTA_ALT_THRESHOLD,
+    )
+    for note in notes:
+        print(f"[Quota] {note}")
+    plans = [p for p in plans if p.markets]
+
+    def _fetch(plan: EventRequest) -> Optional[Tuple[str, dict]]:
+        # indexed events go straight to their league; unknown ones probe each league
+        for league in event_index.leagues_for(plan.event_id, index, config.LEAGUES):
+            data = _fetch_event(plan.event_id, league, plan.markets)
+            if data is not None:
+                return league, data
+        # not fatal, skip if The Odds API doesn't know that event under our chosen leagues
+        return None
+
+    # bounded pool replaces the old sleep-every-10 throttle; rows keep bet order
+    for plan, found in zip(plans, map_ordered(_fetch, plans, max_workers=config.ODDS_MAX_CONCURRENCY)):
+        if not found:
+            continue
+        league, data = found
+        for i in plan.bets:
+            eid, mkt, sel = triplets[i]
+            per_bet[i].extend(_rows_for_event(eid, mkt, sel, league, data))
+    out_rows = [row for rows in per_bet for row in rows]
 
     if out_rows:
-        ws_det.update("A2", out_rows, value_input_option="USER_ENTERED")
-    print(f"[Detailed Odds] Wrote {len(out_rows)} rows.")
+        writer.update("A2", out_rows)
+    writer.flush()
+    from_feed = len(triplets) - len(need) if bulk else 0
+    print(f"[Detailed Odds] Wrote {len(out_rows)} rows ({len(plans)} event requests, {from_feed} bets from league feed).")
+
+def _parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Refresh the Live Odds and Detailed Odds tabs from The Odds API.")
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--no-cache", action="store_true", help="bypass the local Odds API response cache")
+    mode.add_argument("--cache-only", action="store_true", help="serve cached responses only; never call the API")
+    ap.add_argument("--bulk", action="store_true", help="build main-market Detailed Odds from the league feeds (see ODDS_BULK_MODE)")
+    return ap.parse_args(argv)
+
+def _configure_cache(args) -> None:
+    if args.no_cache or not config.ODDS_CACHE_ENABLED:
+        odds_api.configure_cache(None)
+        return
+    cache = ResponseCache(config.ODDS_CACHE_PATH, max_bytes=config.ODDS_CACHE_MAX_MB * 1024 * 1024)
+    odds_api.configure_cache(cache, cache_only=args.cache_only, ttls=config.ODDS_CACHE_TTLS)
+
+def _configure_quota() -> QuotaTracker:
+    tracker = QuotaTracker(config.ODDS_QUOTA_PATH)
+    odds_api.configure_quota(tracker, floor=config.ODDS_QUOTA_RESERVE)
+    return tracker
+
+def _configure_ticks() -> None:
+    odds_api.configure_ticks(TickStore(config.ODDS_TICKS_DIR) if config.ODDS_TICKS_ENABLED else None)
 
-def main():
+def main(argv=None):
+    args = _parse_args(argv)
+    _configure_cache(args)
+    tracker = _configure_quota()
+    _configure_ticks()
+    # bookmakers=ALLOWED_BOOKS when it bills no more than regions=, so we stop downloading books we discard
+    odds_api.configure_books(config.ALLOWED_BOOKS, config.ODDS_REGIONS, prefer_bookmakers=config.ODDS_USE_BOOKMAKERS)
+    http_session.configure(
+        pool_size=config.ODDS_MAX_CONCURRENCY,
+        retries=config.HTTP_MAX_RETRIES,
+        backoff=config.HTTP_BACKOFF_BASE,
+    )
     print("Refreshing Live Odds...")
-    refresh_live_odds()
+    feed = refresh_live_odds()
     print("Refreshing Detailed Odds (from Bets)...")
-    refresh_detailed_odds_from_bets()
-    print("Done.")
+    refresh_detailed_odds_from_bets(feed if (args.bulk or config.ODDS_BULK_MODE) else None)
+    tracker.save()
+    print(f"[Ticks] Recorded {odds_api.flush_ticks()} quotes.")
+    print(f"[HTTP] {http_session.summary()}")
+    print(f"[Payload] {odds_api.payload_report(config.ODDS_PAYLOAD_BASELINE_PATH)}")
+    print(f"Done. ({odds_api.cache_stats()}; {tracker.summary()})")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,98 @@
+"""Benchmark the vectorized slate devig against per-event ``compute_consensus``.
+
+    python benchmarks/bench_devig.py --events 1000 10000 --books 8
+
+Builds a synthetic slate (moneyline, one spread, two totals and a team total
+per book), checks that :func:`core.devig_batch.compute_slate_consensus`
+returns exactly what ``compute_consensus`` does, and prints the time of each.
+The devig+consensus line leaves out quote extraction/flattening on both sides.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from core.consensus_pricer import compute_consensus, extract_book_quotes
+from core.devig_batch import flatten_slate, slate_consensus
+
+BOOKS = ["pinnacle", "fanduel", "draftkings", "betmgm", "caesars", "betonlineag", "bovada", "mybookieag",
+         "pointsbetus", "williamhill_us", "betrivers", "unibet_us"]
+
+
+def _price(rng):
+    return rng.choice([-1, 1]) * rng.randint(100, 300)
+
+
+def build_slate(n_events, n_books, seed=0):
+    rng = random.Random(seed)
+    events = {}
+    for i in range(n_events):
+        home, away = f"Home{i}", f"Away{i}"
+        bookmakers = []
+        for book in BOOKS[:n_books]:
+            bookmakers.append({
+                "key": book,
+                "markets": [
+                    {"key": "h2h", "outcomes": [{"name": home, "price": _price(rng)}, {"name": away, "price": _price(rng)}]},
+                    {"key": "spreads", "outcomes": [
+                        {"name": home, "point": -1.5, "price": _price(rng)},
+                        {"name": away, "point": 1.5, "price": _price(rng)},
+                    ]},
+                    {"key": "totals", "outcomes": [
+                        {"name": side, "point": pt, "price": _price(rng)}
+                        for pt in (7.5, 8.5) for side in ("Over", "Under")
+                    ]},
+                    {"key": "team_totals", "outcomes": [
+                        {"name": side, "team": home, "point": 3.5, "price": _price(rng)} for side in ("Over", "Under")
+                    ]},
+                ],
+            })
+        events[f"ev{i}"] = {"bookmakers": bookmakers}
+    return events
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def run(n_events, n_books, method=None):
+    events = build_slate(n_events, n_books)
+    books = BOOKS[:n_books]
+
+    expected, t_loop = _timed(lambda: {ev: compute_consensus(e, books, method) for ev, e in events.items()})
+    _, t_extract = _timed(lambda: [extract_book_quotes(e, books) for e in events.values()])
+    quotes, t_flat = _timed(flatten_slate, events, books)
+    cons, t_arrays = _timed(slate_consensus, quotes, method)
+    results, t_build = _timed(cons.to_results)
+    if results != expected:
+        raise SystemExit(f"{n_events} events: batch results differ from compute_consensus")
+
+    t_batch = t_flat + t_arrays + t_build
+    print(
+        f"{n_events:>6} events x {n_books} books ({len(quotes.price)} quotes): "
+        f"per-event {t_loop:.3f}s | batch {t_batch:.3f}s ({t_loop / t_batch:.1f}x)\n"
+        f"    devig+consensus: per-event {t_loop - t_extract:.3f}s vs arrays {t_arrays:.3f}s "
+        f"({(t_loop - t_extract) / t_arrays:.0f}x); flatten {t_flat:.3f}s, results {t_build:.3f}s"
+    )
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--events", type=int, nargs="+", default=[1000, 10000])
+    ap.add_argument("--books", type=int, default=8)
+    ap.add_argument("--method", default=None, help="devig method (default multiplicative)")
+    args = ap.parse_args(argv)
+    for n in args.events:
+        run(n, min(args.books, len(BOOKS)), args.method)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark the Bets sync against the in-memory fake Sheets backend.
+
+    python benchmarks/bench_sheets_sync.py --bets 2000 --new 100 --latency 0.3
+
+Runs ``partial_update_google_sheets`` twice (a run with CSV changes, then an
+unchanged rerun) and prints Sheets API calls and the simulated time they take
+at the given per-call latency and per-minute quotas.  Time is simulated
+(:class:`testing.fake_gspread.VirtualClock`), so runs finish instantly.
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import config
+from core import sheets
+from testing.fake_gspread import FakeBackend, FakeClient, VirtualClock
+from core.sheets_metrics import METRICS
+
+HEADER = [
+    "Date", "Start Time", "Event ID", "Sport", "League", "Market", "Derivative", "Event/Match", "Bet",
+    "Odds", "Stake", "Bookmaker", "Payout", "Closing Line", "CLV%", "Profit/Loss", "Notes/Comments",
+    "Bet ID#", "Result",
+]
+
+
+def _load_sync():
+    path = os.path.join(REPO_ROOT, "Python Project Folder", "google_sheets_sync.py")
+    spec = importlib.util.spec_from_file_location("google_sheets_sync", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _bet(i, result=""):
+    row = {h: "" for h in HEADER}
+    row.update({
+        "Date": "2099-01-01", "Start Time": f"{12 + i % 10:02d}:{i % 60:02d}", "Event ID": f"ev{i}",
+        "Market": "Moneyline", "Bet": f"Team {i}", "Odds": "+110", "Bet ID#": str(i), "Result": result,
+    })
+    return row
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--bets", type=int, default=1000, help="bets already on the sheet")
+    ap.add_argument("--new", type=int, default=50, help="new bets in the CSV")
+    ap.add_argument("--settled", type=int, default=50, help="existing bets settled by the CSV")
+    ap.add_argument("--latency", type=float, default=0.3, help="simulated seconds per API call")
+    ap.add_argument("--read-quota", type=int, default=60, help="read requests per minute")
+    ap.add_argument("--write-quota", type=int, default=60, help="write requests per minute")
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp()
+    config.FORMULA_FILL_STATE_PATH = os.path.join(tmp, "formula_fill.json")
+    config.BETS_MIRROR_PATH = os.path.join(tmp, "bets_mirror.sqlite")
+
+    clock = VirtualClock()
+    backend = FakeBackend(args.latency, args.read_quota, args.write_quota, clock=clock)
+    client = FakeClient(backend)
+    ws = client.create("bench").add_tab("Bets", args.bets + args.new + 20, len(HEADER))
+    existing = [_bet(i) for i in range(args.bets)]
+    ws.load([[""] * 13 + ["=J1", "=J1"], *[[]] * 5, HEADER] + [[b[h] for h in HEADER] for b in existing])
+
+    csv_rows = [dict(b) for b in existing]
+    for b in csv_rows[: args.settled]:
+        b.update({"Result": "Win", "Profit/Loss": "10"})
+    csv_rows += [_bet(args.bets + i) for i in range(args.new)]
+
+    sync = _load_sync()
+    sync.SHEET_ID, sync.SHEET_NAME = "bench", "Bets"
+    sync.read_csv_data = lambda path: csv_rows
+    sync.should_keep = lambda event_dt: True  # bench dates are outside the live keep window
+    sync.dlog = lambda msg: None
+    sheets.use_client(client, sleep=clock.sleep)
+
+    for label in ("changed CSV", "unchanged rerun"):
+        backend.reset_counts()
+        METRICS.reset()
+        sheets.reset_snapshots()
+        start, t0 = clock.now, time.perf_counter()
+        sync.partial_update_google_sheets("bench.csv")
+        print(
+            f"{label:<16} {backend.total_calls:>4} API calls  {backend.throttled:>3} throttled  "
+            f"{clock.now - start:7.1f}s simulated  {time.perf_counter() - t0:6.2f}s local"
+        )
+        for method, n in sorted(backend.calls.items()):
+            print(f"    {method:<18} {n}")
+
+
+if __name__ == "__main__":
+    main()
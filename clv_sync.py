@@ -1,6 +1,7 @@
 """Sync Closing Line values using consensus pricing.
 
-This script reads bet tracking data and detailed odds from Google Sheets,
+This script reads bet tracking data and detailed odds from Google Sheets
+(preferring closing-line snapshots captured by ``odds_sync --closing-lines``),
 computes a consensus closing line across configured bookmakers and writes
 the resulting odds and CLV% back to the bet sheet.
 
@@ -10,39 +11,27 @@ probabilities.
 
 from __future__ import annotations
 
+import argparse
 from collections import defaultdict
 import re
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 from core import odds_labeling, sheets
-from core.consensus_pricer import BetKey, compute_consensus, extract_book_quotes
+from core.bets_mirror import BetsMirror
+from core.closing_lines import ClosingStore
+from core.consensus_pricer import DEVIG_METHODS, OUTLIER_METHODS, BetKey, ConsensusSettings
+from core.devig_batch import compute_slate_consensus
 from core.logging_utils import info, warn
+from core.odds_convert import american_to_prob
 
 import config
 
 
 # ---------------------------------------------------------------------------
-# Odds helpers
+# Helpers
 # ---------------------------------------------------------------------------
 
 
-def american_to_prob(odds: str) -> Optional[float]:
-    """Convert American odds (as string) to implied probability."""
-
-    s = str(odds).strip()
-    if not s:
-        return None
-    try:
-        n = int(s[1:]) if s.startswith("+") else int(s)
-    except Exception:
-        return None
-    if n == 0:
-        return None
-    if s.startswith("+"):
-        return 100.0 / (n + 100.0)
-    return float(abs(n)) / (abs(n) + 100.0)
-
-
 def norm(s: str) -> str:
     """Normalize whitespace and half symbols for comparison."""
 
@@ -54,16 +43,22 @@ def norm(s: str) -> str:
 # ---------------------------------------------------------------------------
 
 
-def load_bets() -> Tuple[List[str], List[List[str]]]:
+def load_bets(mirror: BetsMirror) -> Tuple[List[str], List[Tuple[str, Dict[str, object]]]]:
+    """Refresh the Bets mirror from the sheet; return its header and ``(mirror key, row)`` pairs.
+
+    The key is the ``Bet ID#``, or a sheet-row key for rows without a usable one.
+    """
+
     ws = sheets.open_ws(config.GOOGLE_SHEET_ID, config.BET_SHEET_TAB)
-    header = ws.row_values(config.BET_HEADER_ROW)
-    data = ws.get_all_values()[config.BET_FIRST_DATA_ROW - 1 :]
-    return header, data
+    pulled = mirror.pull_sheet(ws, config.BET_HEADER_ROW, config.BET_FIRST_DATA_ROW)
+    for c in pulled.conflicts:
+        warn(f"Bet {c.bet_id} '{c.column}' was edited in the sheet and locally; keeping the sheet value '{c.sheet}'.")
+    return mirror.header, [(bet_id, row) for bet_id, _, row in mirror.entries()]
 
 
 def load_detailed_odds() -> List[Dict[str, str]]:
     ws = sheets.open_ws(config.GOOGLE_SHEET_ID, config.DETAILED_ODDS_TAB)
-    vals = ws.get_all_values()
+    vals = sheets.get_values(ws)
     if not vals:
         return []
     header = vals[0]
@@ -75,6 +70,35 @@ def load_detailed_odds() -> List[Dict[str, str]]:
     return out
 
 
+def load_closing_snapshots() -> Dict[str, List[Dict[str, str]]]:
+    """Closing-line rows captured by ``odds_sync --closing-lines``, per event."""
+
+    return ClosingStore(config.CLOSING_LINES_PATH).detailed_rows()
+
+
+def _bet_key(row: Dict[str, str]) -> Tuple[str, str, str]:
+    return tuple((row.get(h) or "").strip() for h in ("Event ID", "User Market", "User Bet Selection"))  # type: ignore[return-value]
+
+
+def merge_closing_rows(
+    det_rows: List[Dict[str, str]],
+    closing: Dict[str, List[Dict[str, str]]],
+    covered: Optional[Dict[str, Set[Tuple[str, str]]]] = None,
+) -> List[Dict[str, str]]:
+    """Replace Detailed Odds rows with the stored snapshot for the bets it covers.
+
+    A bet (Event ID, User Market, User Bet Selection) is covered when its
+    snapshot has rows for it or ``covered`` lists it; bets placed on the event
+    after the capture keep their Detailed Odds rows.  Snapshot rows come last,
+    so they win where both quote the same outcome.
+    """
+
+    keys = {_bet_key(r) for rows in closing.values() for r in rows}
+    keys |= {(eid, m, s) for eid, pairs in (covered or {}).items() for m, s in pairs}
+    kept = [r for r in det_rows if _bet_key(r) not in keys]
+    return kept + [r for rows in closing.values() for r in rows]
+
+
 # ---------------------------------------------------------------------------
 # Parsing helpers
 # ---------------------------------------------------------------------------
@@ -85,7 +109,7 @@ def parse_bet_market(market: str, bet: str) -> Tuple[str, str]:
 
     m = (market or "").lower().strip()
     b = (bet or "").strip()
-    if re.match(r"^(?i)(over|under)\s+\d+(\.\d+)?(½)?$", b):
+    if re.match(r"(?i)^(over|under)\s+\d+(\.\d+)?(½)?$", b):
         side, num = b.split()[0].title(), b.split()[1].replace("Â½", "½")
         return "totals", f"{side} {num}"
     m = (
@@ -150,41 +174,63 @@ def _build_events(rows: List[Dict[str, str]]) -> Dict[str, Dict[str, Iterable[Di
 # ---------------------------------------------------------------------------
 
 
-def main() -> None:
-    header, bet_rows = load_bets()
+def _parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Write consensus Closing Line and CLV% to the Bets tab.")
+    ap.add_argument(
+        "--devig-method",
+        choices=sorted(DEVIG_METHODS),
+        default=config.DEVIG_METHOD,
+        help="how each book's vig is removed before averaging (default: config.DEVIG_METHOD)",
+    )
+    args = ap.parse_args(argv)
+    # argparse does not check defaults against choices; a bad DEVIG_METHOD /
+    # CONSENSUS_OUTLIER should stop the run here, not after the sheet reads
+    if args.devig_method not in DEVIG_METHODS:
+        ap.error(f"DEVIG_METHOD {args.devig_method!r} is not one of: {', '.join(sorted(DEVIG_METHODS))}")
+    if config.CONSENSUS_OUTLIER not in ("none", *OUTLIER_METHODS):
+        ap.error(f"CONSENSUS_OUTLIER {config.CONSENSUS_OUTLIER!r} is not one of: none, {', '.join(OUTLIER_METHODS)}")
+    return args
+
+
+def main(argv=None) -> None:
+    args = _parse_args(argv)
+    # Bets and Detailed Odds in one values.batchGet (reuses the snapshot in-process)
+    sheets.prefetch(
+        sheets.open_spreadsheet(config.GOOGLE_SHEET_ID), [config.BET_SHEET_TAB, config.DETAILED_ODDS_TAB]
+    )
+    mirror = BetsMirror(config.BETS_MIRROR_PATH)
+    header, bets = load_bets(mirror)
     det_rows = load_detailed_odds()
+    closing = load_closing_snapshots()
+    if closing:
+        det_rows = merge_closing_rows(det_rows, closing, ClosingStore(config.CLOSING_LINES_PATH).covered())
+        info(f"Using stored closing-line snapshots for {len(closing)} events.")
+    if args.devig_method != "multiplicative":
+        info(f"Devig method: {args.devig_method}")
 
     events = _build_events(det_rows)
-    event_consensus: Dict[str, Dict[BetKey, object]] = {}
-    for ev_id, event in events.items():
-        # Intentionally call extract_book_quotes for explicitness/logging.
-        extract_book_quotes(event, config.ALLOWED_BOOKS)
-        event_consensus[ev_id] = compute_consensus(event, config.ALLOWED_BOOKS)
-
-    def col(name: str) -> int:
-        return header.index(name) + 1 if name in header else -1
-
-    c_event = col("Event ID")
-    c_market = col("Market")
-    c_bet = col("Bet")
-    c_entry = col("Odds")
-    c_close = col("Closing Line")
-    c_clv = col("CLV%")
-
-    if min(c_event, c_market, c_bet, c_entry, c_close, c_clv) < 0:
+    settings = ConsensusSettings(
+        book_weights=config.CONSENSUS_BOOK_WEIGHTS,
+        market_weights=config.CONSENSUS_MARKET_WEIGHTS,
+        outlier=config.CONSENSUS_OUTLIER,
+        mad_k=config.CONSENSUS_MAD_K,
+    )
+    event_consensus: Dict[str, Dict[BetKey, object]] = compute_slate_consensus(
+        events, config.ALLOWED_BOOKS, args.devig_method, settings
+    )
+
+    required = ("Event ID", "Market", "Bet", "Odds", "Closing Line", "CLV%")
+    if any(name not in header for name in required):
         warn(
             "Missing required columns in Bets (need: Event ID, Market, Bet, Odds, Closing Line, CLV%).",
         )
         return
 
-    ws = sheets.open_ws(config.GOOGLE_SHEET_ID, config.BET_SHEET_TAB)
     updated = 0
+    changed = 0
 
-    for i, row in enumerate(bet_rows, start=config.BET_FIRST_DATA_ROW):
-        ev_id = (row[c_event - 1] if c_event - 1 < len(row) else "").strip()
-        market = (row[c_market - 1] if c_market - 1 < len(row) else "").strip()
-        bet = (row[c_bet - 1] if c_bet - 1 < len(row) else "").strip()
-        entry = (row[c_entry - 1] if c_entry - 1 < len(row) else "").strip()
+    for bet_id, row in bets:
+        ev_id, market, bet, entry = (str(row[name]).strip() for name in required[:4])
         if not (ev_id and market and bet and entry):
             continue
 
@@ -201,14 +247,20 @@ def main() -> None:
             continue
 
         clv_pct = (res.consensus_probability / p_entry - 1.0) * 100.0
-        ws.update_cell(i, c_close, str(res.consensus_odds))
-        ws.update_cell(i, c_clv, f"{clv_pct:.2f}")
+        if mirror.update(bet_id, {"Closing Line": str(res.consensus_odds), "CLV%": f"{clv_pct:.2f}"}):
+            changed += 1
         info(
             f"{ev_id} {label}: books={res.books} consensus_odds={res.consensus_odds} prob={res.consensus_probability:.4f}"
+            + (f" dropped={res.dropped_books}" if res.dropped_books else "")
         )
         updated += 1
 
-    info(f"Updated {updated} rows with Closing Line & CLV%.")
+    writer = sheets.SheetWriter(sheets.open_ws(config.GOOGLE_SHEET_ID, config.BET_SHEET_TAB))
+    pushed = mirror.push(writer)
+    info(
+        f"Updated {updated} rows with Closing Line & CLV% ({changed} changed; {pushed} dirty rows pushed in "
+        f"{writer.calls} Sheets API write call(s))."
+    )
 
 
 if __name__ == "__main__":  # pragma: no cover - manual execution
@@ -31,8 +31,57 @@ LEAGUES = os.environ.get(
 ).split(",")
 LEAGUES = [x.strip() for x in LEAGUES if x.strip()]
 ALLOWED_BOOKS = ["pinnacle", "fanduel", "betonlineag", "draftkings"]
+# No-vig method for consensus/CLV: multiplicative|additive|power|shin|logit (clv_sync --devig-method overrides)
+DEVIG_METHOD = os.getenv("DEVIG_METHOD", "multiplicative")
+# Consensus weights: book -> weight (unlisted books weigh 1.0), e.g. {"pinnacle": 2.0};
+# market -> {book: weight} overrides per market. Empty = equal weights
+CONSENSUS_BOOK_WEIGHTS = {}
+CONSENSUS_MARKET_WEIGHTS = {}
+# Outlier handling across books: none | median (weighted median) | mad (drop books > CONSENSUS_MAD_K scaled MADs off)
+CONSENSUS_OUTLIER = os.getenv("CONSENSUS_OUTLIER", "none")
+CONSENSUS_MAD_K = float(os.getenv("CONSENSUS_MAD_K", "3.0"))
 ODDS_REGIONS = "us"
 ODDS_FORMAT = "american"
+# Send bookmakers=ALLOWED_BOOKS instead of regions= when it bills no more credits
+ODDS_USE_BOOKMAKERS = os.getenv("ODDS_USE_BOOKMAKERS", "1") != "0"
+# Per-event fetches run on a bounded thread pool; 1 restores the sequential loop.
+ODDS_MAX_CONCURRENCY = int(os.getenv("ODDS_MAX_CONCURRENCY", "8"))
+ODDS_REQUEST_TIMEOUT = float(os.getenv("ODDS_REQUEST_TIMEOUT", "25"))
+# Bulk mode: main-market Detailed Odds come from the per-league Live Odds feed;
+# per-event calls are only made for alternate lines (odds_sync --bulk also enables it)
+ODDS_BULK_MODE = os.getenv("ODDS_BULK_MODE", "0") == "1"
+# Shared HTTP session: retries on 429/5xx/timeouts with exponential backoff + jitter
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))  # seconds
+
+# --- Local state (git-ignored) ---
+STATE_DIR = os.getenv("STATE_DIR", os.path.join(BASE_DIR, ".state"))
+# Event ID -> league map learned from each Live Odds pull
+EVENT_INDEX_PATH = os.path.join(STATE_DIR, "event_index.json")
+# SQLite cache of Odds API responses; odds_sync --no-cache / --cache-only override
+ODDS_CACHE_ENABLED = os.getenv("ODDS_CACHE", "1") != "0"
+ODDS_CACHE_PATH = os.path.join(STATE_DIR, "odds_cache.sqlite")
+ODDS_CACHE_MAX_MB = int(os.getenv("ODDS_CACHE_MAX_MB", "200"))
+ODDS_CACHE_TTLS = {"live": 120, "event": 300, "completed": 7 * 24 * 3600}  # seconds
+# Odds API credit budget, tracked from x-requests-remaining between runs
+ODDS_QUOTA_PATH = os.path.join(STATE_DIR, "odds_quota.json")
+# Share of bookmaker entries regions= returns per allowed book (payload savings report)
+ODDS_PAYLOAD_BASELINE_PATH = os.path.join(STATE_DIR, "odds_payload_baseline.json")
+ODDS_QUOTA_RESERVE = int(os.getenv("ODDS_QUOTA_RESERVE", "100"))  # never spend below this
+ODDS_QUOTA_ALT_THRESHOLD = int(os.getenv("ODDS_QUOTA_ALT_THRESHOLD", "2000"))  # skip alternates below this
+# Closing-line snapshots captured by odds_sync --closing-lines; clv_sync prefers them
+CLOSING_LINES_PATH = os.path.join(STATE_DIR, "closing_lines.json")
+CLOSING_LEAD_MINUTES = float(os.getenv("CLOSING_LEAD_MINUTES", "5"))  # capture this long before start
+CLOSING_POLL_SECONDS = int(os.getenv("CLOSING_POLL_SECONDS", "300"))  # re-read Bets / Live Odds this often
+# Append-only history of every fetched quote (day-partitioned .npz chunks)
+ODDS_TICKS_ENABLED = os.getenv("ODDS_TICKS", "1") != "0"
+ODDS_TICKS_DIR = os.path.join(STATE_DIR, "ticks")
+# Last Bets row holding the N1/O1 formulas; google_sheets_sync --refill-formulas repairs
+FORMULA_FILL_STATE_PATH = os.path.join(STATE_DIR, "formula_fill.json")
+# SQLite mirror of the Bets tab (keyed by Bet ID#); stages push only dirty rows
+BETS_MIRROR_PATH = os.path.join(STATE_DIR, "bets_mirror.sqlite")
+# One JSON report per hybrid_script run (Sheets API calls/latency per op and tab)
+RUN_REPORT_DIR = os.path.join(STATE_DIR, "run_reports")
 
 # --- BetOnline scraper gate ---
 ENABLE_BETONLINE = False
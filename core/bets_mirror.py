@@ -0,0 +1,351 @@
+"""Local SQLite mirror of the Bets tab, keyed by ``Bet ID#``.
+
+Stages read bets from the mirror and record their changes in it; only rows
+marked dirty are pushed back to the sheet (one batched write through
+:class:`core.sheets.SheetWriter`).  Every row keeps the values last seen on the
+sheet plus a content hash of them, so :meth:`BetsMirror.pull` can tell a manual
+edit made in the sheet from a local change: cells edited on only one side are
+merged, and a cell edited on both sides takes the sheet's value and is
+reported as a conflict instead of being silently overwritten.
+
+Cells are stored by column position and the header is stored in its
+canonical form (:func:`canonical_header`), so every stage keys rows and names
+columns the same way whatever aliases the sheet uses.  Rows with a blank or
+repeated ``Bet ID#`` (or every row, when the header has no such column) are
+keyed by their sheet row instead (see :func:`row_key`); such rows are
+re-read whenever their content changes rather than merged cell by cell.
+Rows that left the sheet while they still had unpushed local edits are kept
+(with a warning) rather than dropped.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import unicodedata
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from .logging_utils import warn
+
+KEY_COLUMN = "Bet ID#"
+ROW_KEY_PREFIX = "row:"
+
+# canonical column name -> header spellings seen on Bets tabs (compared lower-cased)
+HEADER_ALIASES = {
+    "Bet ID#": ["bet id#", "bet id", "ticket #", "ticket number", "ticket", "wager #", "wager id"],
+    "Profit/Loss": ["profit/loss", "profit / loss", "p/l", "net", "net profit"],
+    "Date": ["date"],
+    "Start Time": ["start time", "time"],
+    "Event ID": ["event id", "game id", "match id"],
+    "Result": ["result", "status", "outcome"],
+}
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS bets (
+        bet_id TEXT PRIMARY KEY,
+        cells TEXT NOT NULL,
+        base TEXT NOT NULL,
+        base_hash TEXT NOT NULL,
+        sheet_row INTEGER,
+        dirty INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+)
+
+
+class Conflict(NamedTuple):
+    bet_id: str
+    column: str
+    local: Any
+    sheet: Any
+
+
+class PullResult(NamedTuple):
+    added: int
+    merged: int
+    removed: int
+    conflicts: List[Conflict]
+
+
+def row_hash(cells: Sequence[Any]) -> str:
+    """Hash of a row's values, ignoring trailing blank cells."""
+
+    vals = [str(c) for c in cells]
+    while vals and not vals[-1].strip():
+        vals.pop()
+    return hashlib.sha1(json.dumps(vals, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def _norm_header(s: Any) -> str:
+    if s is None:
+        return ""
+    return unicodedata.normalize("NFKC", str(s)).replace("\u200b", "").replace("\xa0", " ").strip()
+
+
+def canonical_header(header: Sequence[Any]) -> List[str]:
+    """Header cells with known aliases (:data:`HEADER_ALIASES`) replaced by their canonical name."""
+
+    rev = {}
+    for canon, variants in HEADER_ALIASES.items():
+        rev[_norm_header(canon).lower()] = canon
+        for v in variants:
+            rev[_norm_header(v).lower()] = canon
+    return [rev.get(_norm_header(h).lower(), _norm_header(h)) for h in header]
+
+
+def row_key(sheet_row: int) -> str:
+    """Mirror key of a row that has no usable ``Bet ID#``."""
+
+    return f"{ROW_KEY_PREFIX}{sheet_row}"
+
+
+def _pad(cells: Sequence[Any], width: int) -> List[Any]:
+    out = list(cells)[:width] if len(cells) > width else list(cells)
+    return out + [""] * (width - len(out))
+
+
+def _same(a: Any, b: Any) -> bool:
+    return str(a) == str(b)
+
+
+class BetsMirror:
+    """Thread-safe Bets mirror stored in a single SQLite file."""
+
+    def __init__(self, path: str, key: str = KEY_COLUMN):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.key = key
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        for stmt in _SCHEMA:
+            self._conn.execute(stmt)
+        self._conn.commit()
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'header'").fetchone()
+        self.header: List[str] = json.loads(row[0]) if row else []
+
+    # -- sheet -> mirror -------------------------------------------------
+
+    def pull(self, header: Sequence[str], rows: Sequence[Sequence[Any]], first_data_row: int) -> PullResult:
+        """Reconcile the mirror with the sheet's data rows.
+
+        ``rows[0]`` is sheet row ``first_data_row``.  Rows whose hash matches
+        the stored one only have their position refreshed; changed rows are
+        merged cell by cell against the last-synced values.  Bets that
+        disappeared from the sheet are dropped unless they are local inserts
+        that have not been pushed yet.  Non-empty rows without a usable key
+        are mirrored under :func:`row_key`.  A stored row that is gone from the
+        sheet but still dirty is kept with its sheet row cleared, so
+        :meth:`push` skips it and the local edit is not lost.
+        """
+
+        header = canonical_header(header)
+        width = len(header)
+        k = header.index(self.key) if self.key in header else None
+        if k is None:
+            warn(f"Bets header has no {self.key!r} column; keying rows by sheet row.")
+        added = merged = removed = by_row = 0
+        orphaned: List[str] = []
+        conflicts: List[Conflict] = []
+        with self._lock:
+            self.header = header
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('header', ?)", (json.dumps(header),)
+            )
+            stored = {
+                r[0]: r[1:]
+                for r in self._conn.execute("SELECT bet_id, cells, base, base_hash, dirty FROM bets")
+            }
+            seen = set()
+            for offset, raw in enumerate(rows):
+                sheet = _pad(raw, width)
+                sheet_row = first_data_row + offset
+                bet_id = str(sheet[k]).strip() if k is not None else ""
+                keyed = bool(bet_id) and bet_id not in seen
+                if not keyed:
+                    if not any(str(c).strip() for c in sheet):
+                        continue  # blank row
+                    bet_id = row_key(sheet_row)
+                    by_row += 1
+                seen.add(bet_id)
+                h = row_hash(sheet)
+                prev = stored.get(bet_id)
+                if prev is None or (not keyed and h != prev[2]):
+                    # a row key names a position, not a bet: new content is a new row
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO bets VALUES (?, ?, ?, ?, ?, 0)",
+                        (bet_id, json.dumps(sheet), json.dumps(sheet), h, sheet_row),
+                    )
+                    added += 1
+                    continue
+                cells_s, base_s, base_hash, _dirty = prev
+                if h == base_hash:
+                    self._conn.execute("UPDATE bets SET sheet_row = ? WHERE bet_id = ?", (sheet_row, bet_id))
+                    continue
+                local = _pad(json.loads(cells_s), width)
+                base = _pad(json.loads(base_s), width)
+                for j in range(width):
+                    if _same(sheet[j], base[j]):
+                        continue  # untouched on the sheet; keep any local change
+                    if not _same(local[j], base[j]) and not _same(local[j], sheet[j]):
+                        conflicts.append(Conflict(bet_id, header[j], local[j], sheet[j]))
+                    local[j] = sheet[j]
+                dirty = any(not _same(a, b) for a, b in zip(local, sheet))
+                self._conn.execute(
+                    "UPDATE bets SET cells = ?, base = ?, base_hash = ?, sheet_row = ?, dirty = ? WHERE bet_id = ?",
+                    (json.dumps(local), json.dumps(sheet), h, sheet_row, int(dirty), bet_id),
+                )
+                merged += 1
+            for bet_id, (_cells, base_s, _h, dirty) in stored.items():
+                if bet_id in seen or not json.loads(base_s):
+                    continue
+                if dirty:
+                    # edited locally but removed (or re-keyed) on the sheet: keep the edit
+                    self._conn.execute("UPDATE bets SET sheet_row = NULL WHERE bet_id = ?", (bet_id,))
+                    orphaned.append(bet_id)
+                    continue
+                self._conn.execute("DELETE FROM bets WHERE bet_id = ?", (bet_id,))
+                removed += 1
+            self._conn.commit()
+        if orphaned:
+            warn(f"Kept {len(orphaned)} bets missing from the sheet that have unpushed local edits: {', '.join(orphaned)}")
+        if by_row and k is not None:
+            warn(f"{by_row} Bets rows have a blank or repeated {self.key!r}; keyed by sheet row.")
+        return PullResult(added, merged, removed, conflicts)
+
+    def pull_sheet(self, ws: Any, header_row: int, first_data_row: int, header: Optional[Sequence[str]] = None) -> PullResult:
+        """:meth:`pull` from the worksheet's cached snapshot (see :mod:`core.sheets`)."""
+
+        from core import sheets
+
+        values = sheets.get_values(ws)
+        if header is None:
+            header = values[header_row - 1] if len(values) >= header_row else []
+        return self.pull(header, values[first_data_row - 1 :], first_data_row)
+
+    # -- reads -------------------------------------------------------------
+
+    def _as_dict(self, cells_s: str) -> Dict[str, Any]:
+        return dict(zip(self.header, _pad(json.loads(cells_s), len(self.header))))
+
+    def get(self, bet_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT cells FROM bets WHERE bet_id = ?", (bet_id,)).fetchone()
+        return self._as_dict(row[0]) if row else None
+
+    def rows(self) -> List[Tuple[Optional[int], Dict[str, Any]]]:
+        """``(sheet_row, values)`` for every bet, in sheet order; unpushed inserts last."""
+
+        return [(r, values) for _, r, values in self.entries()]
+
+    def entries(self) -> List[Tuple[str, Optional[int], Dict[str, Any]]]:
+        """``(mirror key, sheet_row, values)`` in :meth:`rows` order."""
+
+        with self._lock:
+            found = self._conn.execute(
+                "SELECT bet_id, sheet_row, cells FROM bets ORDER BY sheet_row IS NULL, sheet_row, bet_id"
+            ).fetchall()
+        return [(b, r, self._as_dict(c)) for b, r, c in found]
+
+    def dirty_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM bets WHERE dirty = 1").fetchone()[0]
+
+    # -- local writes ------------------------------------------------------
+
+    def update(self, bet_id: str, values: Mapping[str, Any]) -> bool:
+        """Set named cells of a bet; returns True when anything changed."""
+
+        with self._lock:
+            row = self._conn.execute("SELECT cells FROM bets WHERE bet_id = ?", (bet_id,)).fetchone()
+            if row is None:
+                raise KeyError(bet_id)
+            cells = _pad(json.loads(row[0]), len(self.header))
+            changed = False
+            for name, value in values.items():
+                j = self.header.index(name)
+                if not _same(cells[j], value):
+                    cells[j] = value
+                    changed = True
+            if changed:
+                self._conn.execute(
+                    "UPDATE bets SET cells = ?, dirty = 1 WHERE bet_id = ?", (json.dumps(cells), bet_id)
+                )
+                self._conn.commit()
+        return changed
+
+    def insert(self, values: Mapping[str, Any]) -> str:
+        """Add a new bet (appended to the sheet on the next :meth:`push`)."""
+
+        cells = [values.get(h, "") for h in self.header]
+        bet_id = str(values.get(self.key, "")).strip()
+        if not bet_id:
+            raise ValueError(f"new bet has no {self.key!r}")
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO bets VALUES (?, ?, '[]', ?, NULL, 1)", (bet_id, json.dumps(cells), row_hash([]))
+            )
+            self._conn.commit()
+        return bet_id
+
+    # -- mirror -> sheet ---------------------------------------------------
+
+    def push(self, writer: Any) -> int:
+        """Send dirty rows through ``writer`` and flush it; returns rows pushed.
+
+        Changed cells of existing rows become ``update_cell`` calls and new bets
+        ``append_row`` calls, so the writer sends at most one batchUpdate and
+        one append.  Rows are marked clean only after the flush succeeds.
+        Row numbers come from the last :meth:`pull`, so pull again after
+        anything that moves rows (such as a sort) before pushing.
+        """
+
+        width = len(self.header)
+        with self._lock:
+            found = self._conn.execute(
+                "SELECT bet_id, cells, base, sheet_row FROM bets WHERE dirty = 1 ORDER BY sheet_row IS NULL, sheet_row, rowid"
+            ).fetchall()
+        pushed = []
+        for bet_id, cells_s, base_s, sheet_row in found:
+            cells = _pad(json.loads(cells_s), width)
+            base = json.loads(base_s)
+            if not base:
+                writer.append_row(cells)
+            elif sheet_row:
+                base = _pad(base, width)
+                for j in range(width):
+                    if not _same(cells[j], base[j]):
+                        writer.update_cell(sheet_row, j + 1, cells[j])
+            else:
+                continue  # appended but not pulled back yet; its row is unknown
+            pushed.append((bet_id, cells))
+        writer.flush()
+        with self._lock:
+            for bet_id, cells in pushed:
+                self._conn.execute(
+                    "UPDATE bets SET base = ?, base_hash = ?, dirty = 0 WHERE bet_id = ?",
+                    (json.dumps(cells), row_hash(cells), bet_id),
+                )
+            self._conn.commit()
+        return len(pushed)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+__all__ = [
+    "BetsMirror",
+    "Conflict",
+    "HEADER_ALIASES",
+    "KEY_COLUMN",
+    "PullResult",
+    "ROW_KEY_PREFIX",
+    "canonical_header",
+    "row_hash",
+    "row_key",
+]
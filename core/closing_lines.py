@@ -0,0 +1,177 @@
+"""Closing-line snapshot queue and store.
+
+The scheduler mode of ``odds_sync`` keeps a heap of upcoming pending-bet
+events keyed on ``commence_time - lead`` and captures each event's odds
+shortly before the start; an event is captured again when a pending bet on it
+is not covered by its snapshot yet.  Captured rows use the Detailed Odds layout
+and are stored locally as the official closing line; ``clv_sync`` prefers them
+over whatever the Detailed Odds tab held for the bets they cover.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+# Snapshots of events that started more than this long ago are pruned on save.
+RETENTION = timedelta(days=30)
+
+DETAILED_HEADER = [
+    "Event ID",
+    "User Market",
+    "User Bet Selection",
+    "Bookmaker",
+    "API Market",
+    "Outcome Name (Normalized)",
+    "Outcome Point",
+    "Odds",
+]
+
+
+def parse_commence(value: str) -> Optional[datetime]:
+    """Parse an Odds API ``commence_time`` (or the Live Odds tab's rendering)."""
+
+    s = (value or "").strip().replace("Z", "+00:00")
+    if not s:
+        return None
+    for candidate in (s, s.replace(" ", "T", 1)):
+        try:
+            ts = datetime.fromisoformat(candidate)
+        except ValueError:
+            continue
+        return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+    return None
+
+
+class CaptureQueue:
+    """Min-heap of ``(capture_at, event_id)`` with one entry per event."""
+
+    def __init__(self, lead: timedelta):
+        self.lead = lead
+        self._heap: List[Tuple[datetime, str]] = []
+        self._queued: Dict[str, datetime] = {}
+
+    def __len__(self) -> int:
+        return len(self._queued)
+
+    def add(self, event_id: str, commence: datetime) -> bool:
+        """Queue ``event_id``; a changed start time reschedules it."""
+
+        at = commence - self.lead
+        if self._queued.get(event_id) == at:
+            return False
+        self._queued[event_id] = at
+        heapq.heappush(self._heap, (at, event_id))
+        return True
+
+    def __contains__(self, event_id: object) -> bool:
+        return event_id in self._queued
+
+    def events(self) -> List[str]:
+        return list(self._queued)
+
+    def discard(self, event_id: str) -> None:
+        self._queued.pop(event_id, None)
+
+    def next_at(self) -> Optional[datetime]:
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> List[str]:
+        due: List[str] = []
+        self._drop_stale()
+        while self._heap and self._heap[0][0] <= now:
+            at, event_id = heapq.heappop(self._heap)
+            if self._queued.get(event_id) == at:
+                del self._queued[event_id]
+                due.append(event_id)
+            self._drop_stale()
+        return due
+
+    def _drop_stale(self) -> None:
+        # entries superseded by a reschedule or discard stay in the heap lazily
+        while self._heap and self._queued.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+
+def _expired(snap: Dict[str, object], now: datetime) -> bool:
+    start = parse_commence(str(snap.get("commence_time") or ""))
+    return start is not None and now - start > RETENTION
+
+
+class ClosingStore:
+    """JSON file of ``{event_id: {captured_at, commence_time, rows, bets}}``.
+
+    ``bets`` lists the ``(User Market, User Bet Selection)`` pairs the capture
+    was made for, so a bet with no quotes at capture time still counts as covered.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, Dict[str, object]]:
+        if not os.path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def save(
+        self,
+        event_id: str,
+        rows: Sequence[Sequence[str]],
+        commence_time: str,
+        captured_at: Optional[datetime] = None,
+        bets: Sequence[Tuple[str, str]] = (),
+    ) -> None:
+        captured_at = captured_at or datetime.now(timezone.utc)
+        with self._lock:
+            data = {
+                eid: snap
+                for eid, snap in self.load().items()
+                if not _expired(snap, captured_at)
+            }
+            data[event_id] = {
+                "captured_at": captured_at.isoformat(),
+                "commence_time": commence_time,
+                "rows": [list(r) for r in rows],
+                "bets": [list(b) for b in bets],
+            }
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(data, fh)
+            os.replace(tmp, self.path)
+
+    def detailed_rows(self) -> Dict[str, List[Dict[str, str]]]:
+        """Return stored rows as Detailed Odds dicts grouped by event id."""
+
+        out: Dict[str, List[Dict[str, str]]] = {}
+        for event_id, snap in self.load().items():
+            rows = snap.get("rows") or []
+            out[event_id] = [
+                {h: (str(r[i]) if i < len(r) else "") for i, h in enumerate(DETAILED_HEADER)}
+                for r in rows  # type: ignore[union-attr]
+            ]
+        return out
+
+    def covered(self) -> Dict[str, Set[Tuple[str, str]]]:
+        """``{event_id: {(User Market, User Bet Selection), ...}}`` each snapshot covers."""
+
+        out: Dict[str, Set[Tuple[str, str]]] = {}
+        for event_id, snap in self.load().items():
+            pairs = [(r[1], r[2]) for r in snap.get("rows") or [] if len(r) > 2]  # type: ignore[union-attr]
+            pairs += [tuple(b[:2]) for b in snap.get("bets") or [] if len(b) > 1]  # type: ignore[union-attr]
+            out[event_id] = {(str(m).strip(), str(s).strip()) for m, s in pairs}
+        return out
+
+
+__all__ = ["RETENTION", "DETAILED_HEADER", "parse_commence", "CaptureQueue", "ClosingStore"]
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import warnings
 from dataclasses import dataclass, field
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
 from collections import defaultdict
 
+import numpy as np
+
 from . import odds_labeling
+from .odds_convert import american_to_prob, prob_to_american
 
 
 # ---------------------------------------------------------------------------
@@ -40,6 +44,32 @@ class DevigResult:
     consensus_odds: Optional[int]
     books: List[str]
     notes: List[str] = field(default_factory=list)
+    # share of the consensus each book carried (dropped books excluded)
+    weights: Dict[str, float] = field(default_factory=dict)
+    dropped_books: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ConsensusSettings:
+    """How per-book no-vig probabilities are combined.
+
+    ``book_weights`` maps book -> weight (missing books weigh 1.0) and
+    ``market_weights`` maps market -> {book: weight}, overriding the book
+    weight for that market.  ``outlier`` is None (weighted mean), ``"median"``
+    (weighted median) or ``"mad"`` (weighted mean after dropping books more
+    than ``mad_k`` scaled MADs from the median).
+    """
+
+    book_weights: Dict[str, float] = field(default_factory=dict)
+    market_weights: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    outlier: Optional[str] = None
+    mad_k: float = 3.0
+
+    def weight(self, market: str, book: str) -> float:
+        per_market = self.market_weights.get(market) or {}
+        if book in per_market:
+            return float(per_market[book])
+        return float(self.book_weights.get(book, 1.0))
 
 
 # ---------------------------------------------------------------------------
@@ -58,24 +88,175 @@ def _to_float(point: Any) -> Optional[float]:
 
 
 def _american_to_prob(odds: int) -> float:
-    if odds is None:
-        return 0.0
-    if odds > 0:
-        return 100.0 / (odds + 100.0)
-    return -odds / (-odds + 100.0)
+    # missing/invalid prices count as 0 so the pair devigs to 0 or 1
+    p = american_to_prob(odds)
+    return 0.0 if p is None else p
+
+
+_prob_to_american = prob_to_american
+
+
+ALLOWED_MARKETS = {"h2h", "h2h_3_way", "spreads", "totals", "team_totals"}
+# Markets with exactly two outcomes per pair key.  Other markets (h2h with a
+# draw, h2h_3_way) are devigged over every outcome the books quote.
+TWO_WAY_MARKETS = {"spreads", "totals", "team_totals"}
+
+
+# ---------------------------------------------------------------------------
+# Devig methods
+# ---------------------------------------------------------------------------
+
+DEFAULT_DEVIG_METHOD = "multiplicative"
+DEVIG_METHODS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {}
+
+_MAX_ITER = 50
+_TOL = 1e-12
+
+
+def register_devig_method(name: str):
+    """Register ``fn(implied) -> fair`` under ``name``.
+
+    ``implied`` is an ``(n_markets, n_outcomes)`` array of implied
+    probabilities, each strictly between 0 and 1; the result has the same
+    shape and every row sums to 1.  Rows must not depend on each other, so a
+    market prices the same alone or in a whole slate.
+    """
+
+    def deco(fn):
+        DEVIG_METHODS[name] = fn
+        return fn
+
+    return deco
+
+
+def get_devig_method(name: Optional[str]) -> Callable[[np.ndarray], np.ndarray]:
+    try:
+        return DEVIG_METHODS[name or DEFAULT_DEVIG_METHOD]
+    except KeyError:
+        raise ValueError(f"unknown devig method {name!r} (choose from {', '.join(sorted(DEVIG_METHODS))})") from None
+
+
+@register_devig_method("multiplicative")
+def _devig_multiplicative(p: np.ndarray) -> np.ndarray:
+    """Scale every outcome by the overround."""
+
+    return p / p.sum(axis=1, keepdims=True)
+
+
+@register_devig_method("additive")
+def _devig_additive(p: np.ndarray) -> np.ndarray:
+    """Take an equal share of the overround off every outcome."""
+
+    fair = p - (p.sum(axis=1, keepdims=True) - 1.0) / p.shape[1]
+    fair = np.clip(fair, 0.0, None)  # a big overround can push a longshot below 0
+    return fair / fair.sum(axis=1, keepdims=True)
+
+
+@register_devig_method("power")
+def _devig_power(p: np.ndarray) -> np.ndarray:
+    """Solve ``sum(p_i ** k) == 1`` for k (Newton, vectorized across rows)."""
+
+    logp = np.log(p)
+    k = np.ones(len(p))
+    active = np.arange(len(p))
+    for _ in range(_MAX_ITER):
+        if not active.size:
+            break
+        lp = logp[active]
+        pk = np.exp(lp * k[active, None])
+        step = (pk.sum(axis=1) - 1.0) / (pk * lp).sum(axis=1)
+        k[active] -= step
+        active = active[np.abs(step) > _TOL]
+    fair = np.exp(logp * k[:, None])
+    return fair / fair.sum(axis=1, keepdims=True)
+
+
+@register_devig_method("logit")
+def _devig_logit(p: np.ndarray) -> np.ndarray:
+    """Shift every outcome's log-odds by the same c so the probabilities sum to 1.
+
+    Newton's method, kept inside a bracket of the root: a step that leaves it
+    (large overrounds make plain Newton overshoot and diverge) bisects instead.
+    """
 
+    logit = np.log(p) - np.log1p(-p)
+    # sum(sigmoid(logit - c)) - 1 falls as c grows; at min(logit) every term
+    # is >= 1/2, at max(logit) + log(n) the sum is <= n * exp(max - c) = 1
+    lo = logit.min(axis=1)
+    hi = logit.max(axis=1) + np.log(p.shape[1])
+    c = np.clip(0.0, lo, hi)
+    active = np.arange(len(p))
+    with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+        for _ in range(2 * _MAX_ITER):
+            if not active.size:
+                break
+            q = 1.0 / (1.0 + np.exp(c[active, None] - logit[active]))
+            f = q.sum(axis=1) - 1.0
+            over = f > 0
+            lo[active] = np.where(over, c[active], lo[active])
+            hi[active] = np.where(over, hi[active], c[active])
+            nxt = c[active] + f / (q * (1.0 - q)).sum(axis=1)
+            nxt = np.where((nxt > lo[active]) & (nxt < hi[active]), nxt, (lo[active] + hi[active]) / 2.0)
+            step = nxt - c[active]
+            c[active] = nxt
+            active = active[(np.abs(step) > _TOL) & (f != 0)]
+    fair = 1.0 / (1.0 + np.exp(c[:, None] - logit))
+    return fair / fair.sum(axis=1, keepdims=True)
+
+
+def _shin_probabilities(p: np.ndarray, total: np.ndarray, z: np.ndarray) -> np.ndarray:
+    z = z[:, None]
+    return (np.sqrt(z * z + 4.0 * (1.0 - z) * p * p / total) - z) / (2.0 * (1.0 - z))
+
+
+def _shin_z_bisect(p: np.ndarray, total: np.ndarray) -> np.ndarray:
+    lo, hi = np.zeros(len(p)), np.ones(len(p))
+    for _ in range(60):
+        mid = (lo + hi) / 2.0
+        over = _shin_probabilities(p, total, mid).sum(axis=1) > 1.0
+        lo = np.where(over, mid, lo)
+        hi = np.where(over, hi, mid)
+    return (lo + hi) / 2.0
+
+
+@register_devig_method("shin")
+def _devig_shin(p: np.ndarray) -> np.ndarray:
+    """Shin's insider-trading model.
+
+    The share of insider money z has a closed form for two outcomes;
+    otherwise it is found by bisection, vectorized across rows.  Markets
+    without an overround have z = 0 and fall back to multiplicative.
+    """
+
+    total = p.sum(axis=1, keepdims=True)
+    if p.shape[1] == 2:
+        diff2 = (p[:, 0] - p[:, 1]) ** 2
+        s = total[:, 0]
+        z = (s - 1.0) * (diff2 - s) / (s * (diff2 - 1.0))
+    else:
+        z = _shin_z_bisect(p, total)
+    fair = _shin_probabilities(p, total, np.clip(z, 0.0, None))
+    fair = fair / fair.sum(axis=1, keepdims=True)
+    return np.where(total > 1.0, fair, p / total)
 
-def _prob_to_american(prob: float) -> int:
-    if prob <= 0:
-        return 0
-    if prob >= 1:
-        return -1000000000  # effectively infinity
-    if prob > 0.5:
-        return int(round(-prob * 100 / (1 - prob)))
-    return int(round((1 - prob) * 100 / prob))
 
+def devig(implied: Any, method: Optional[str] = None) -> np.ndarray:
+    """Devig every row of an ``(n_markets, n_outcomes)`` implied-probability array.
 
-ALLOWED_MARKETS = {"h2h", "spreads", "totals", "team_totals"}
+    Rows with a missing (0) or certain (>= 1) outcome are normalized
+    multiplicatively and rows summing to 0 stay 0, matching :func:`devig_two_way`.
+    """
+
+    fn = get_devig_method(method)
+    p = np.asarray(implied, dtype=np.float64)
+    total = p.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = np.where(total == 0, 0.0, p / total)
+    if fn is not _devig_multiplicative:
+        ok = ((p > 0) & (p < 1)).all(axis=1)
+        if ok.any():
+            out[ok] = fn(p[ok])
+    return out
 
 
 # ---------------------------------------------------------------------------
@@ -86,9 +267,9 @@ ALLOWED_MARKETS = {"h2h", "spreads", "totals", "team_totals"}
 def normalize_market_and_label(api_market: str, outcome: Dict[str, Any]) -> Optional[Tuple[str, str, Any]]:
     """Return normalized market, label and pair key for an outcome.
 
-    Pair key is used for pairing opposite sides of the same market. For spreads
-    we pair by absolute point; for totals by point; for team totals by team and
-    point.
+    Pair key groups the outcomes of the same market. For spreads we pair by
+    absolute point; for totals by point; for team totals by team and point;
+    moneylines (two- or three-way) group all outcomes of the market.
     """
 
     base = odds_labeling.base_market(api_market)
@@ -110,9 +291,9 @@ def normalize_market_and_label(api_market: str, outcome: Dict[str, Any]) -> Opti
     elif base == "totals":
         label = odds_labeling.build_label(api_market, name, str(outcome.get("point", "")))
         pair_key = point_val
-    else:  # h2h
+    else:  # h2h, h2h_3_way
         label = odds_labeling.build_label(api_market, name, str(outcome.get("point", "")))
-        pair_key = "h2h"
+        pair_key = base
 
     return base, label, pair_key
 
@@ -142,70 +323,272 @@ def extract_book_quotes(event: Dict[str, Any], allowed_books: Iterable[str]) ->
     return quotes
 
 
-def devig_two_way(odds1: int, odds2: int) -> Tuple[float, float]:
+# ---------------------------------------------------------------------------
+# Consensus across books
+# ---------------------------------------------------------------------------
+
+OUTLIER_METHODS = ("median", "mad")
+_MAD_SCALE = 1.4826  # MAD -> standard deviation for normally distributed prices
+# MAD floor (in probability): when most books agree exactly the MAD is 0, and
+# every deviation would count as infinitely many MADs (or, unguarded, none)
+MIN_MAD = 0.005
+
+
+def _column_sum(a: np.ndarray) -> np.ndarray:
+    # left to right per row, so zero padding never changes a result
+    total = np.zeros(a.shape[0])
+    for j in range(a.shape[1]):
+        total = total + a[:, j]
+    return total
+
+
+def _weighted_median(probs: np.ndarray, weights: np.ndarray, total: np.ndarray) -> np.ndarray:
+    order = np.argsort(np.where(weights > 0, probs, np.inf), axis=1, kind="stable")
+    p = np.take_along_axis(probs, order, axis=1)
+    cum = np.cumsum(np.take_along_axis(weights, order, axis=1), axis=1)
+    half = (total / 2.0)[:, None]
+    lo = np.argmax(cum >= half, axis=1)
+    hi = np.argmax(cum > half, axis=1)
+    rows = np.arange(len(p))
+    return (p[rows, lo] + p[rows, hi]) / 2.0
+
+
+def combine_books(
+    probs: np.ndarray, weights: np.ndarray, outlier: Optional[str] = None, mad_k: float = 3.0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Combine each row of per-book probabilities into one consensus.
+
+    ``probs`` is ``(n_bets, n_books)`` with NaN where a book has no price and
+    ``weights`` the matching raw weights.  Returns the consensus per row (NaN
+    when no weight is left), the effective (normalized) weight of every cell
+    and a mask of the cells dropped as outliers.  Every row is reduced in the
+    same pass and independently of the others.
+    """
+
+    if outlier not in (None, "none", *OUTLIER_METHODS):
+        raise ValueError(f"unknown outlier method {outlier!r} (choose from none, {', '.join(OUTLIER_METHODS)})")
+    probs = np.asarray(probs, dtype=np.float64)
+    if not probs.shape[1]:
+        return np.full(len(probs), np.nan), np.zeros(probs.shape), np.zeros(probs.shape, dtype=bool)
+    quoted = ~np.isnan(probs)
+    weights = np.where(quoted, np.asarray(weights, dtype=np.float64), 0.0)
+    dropped = np.zeros(probs.shape, dtype=bool)
+    if outlier == "mad" and probs.size:
+        filled = np.where(quoted, probs, np.nan)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # rows with a single book
+            center = np.nanmedian(filled, axis=1, keepdims=True)
+            dev = np.abs(filled - center)
+            mad = np.maximum(np.nanmedian(dev, axis=1, keepdims=True), MIN_MAD)
+            dropped = quoted & (dev > mad_k * _MAD_SCALE * mad)
+        weights = np.where(dropped, 0.0, weights)
+
+    total = _column_sum(weights)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        effective = weights / total[:, None]
+        if outlier == "median":
+            consensus = _weighted_median(probs, weights, total)
+        else:
+            consensus = _column_sum(np.where(weights > 0, weights * probs, 0.0)) / total
+    consensus = np.where(total > 0, consensus, np.nan)
+    return consensus, effective, dropped
+
+
+def devig_two_way(odds1: int, odds2: int, method: Optional[str] = None) -> Tuple[float, float]:
     """Return no-vig probabilities for a two-way market."""
 
     p1 = _american_to_prob(odds1)
     p2 = _american_to_prob(odds2)
+    if (method or DEFAULT_DEVIG_METHOD) != "multiplicative":
+        fair1, fair2 = devig([[p1, p2]], method)[0].tolist()
+        return fair1, fair2
     total = p1 + p2
     if total == 0:
         return 0.0, 0.0
     return p1 / total, p2 / total
 
 
-def pair_quotes_by_point(quotes: Dict[Tuple[str, Any], Dict[str, Dict[str, int]]]) -> Dict[BetKey, Dict[str, float]]:
-    """Pair opposite quotes and compute per-book probabilities."""
+def outcome_set(market: str, book_data: Dict[str, Dict[str, Any]]) -> Tuple[List[str], List[str]]:
+    """Books devigged in a ``(market, pair_key)`` group, and the books left out.
 
-    probs: Dict[BetKey, Dict[str, float]] = defaultdict(dict)
+    Two-way markets use each book's first two labels and leave out one-sided
+    quotes.  Other markets are devigged over the outcome set quoted by the
+    most books (ties: the larger set, then the first seen), so one book
+    listing a stray "Draw" is left out instead of every two-outcome book.
+    """
 
-    for (market, _pair_key), book_data in quotes.items():
+    if market in TWO_WAY_MARKETS:
+        kept = [book for book, label_price in book_data.items() if len(label_price) >= 2]
+    else:
+        by_set: Dict[FrozenSet[str], List[str]] = {}
         for book, label_price in book_data.items():
-            if len(label_price) < 2:
-                continue
-            items = list(label_price.items())[:2]
-            (label1, price1), (label2, price2) = items
-            p1, p2 = devig_two_way(price1, price2)
-            probs[BetKey(market, label1)][book] = p1
-            probs[BetKey(market, label2)][book] = p2
+            by_set.setdefault(frozenset(label_price), []).append(book)
+        sets = [labels for labels in by_set if len(labels) >= 2]
+        kept = by_set[max(sets, key=lambda labels: (len(by_set[labels]), len(labels)))] if sets else []
+    return kept, [book for book in book_data if book not in kept]
+
+
+def group_market_quotes(
+    quotes: Dict[Tuple[str, Any], Dict[str, Dict[str, int]]]
+) -> List[Tuple[str, str, List[Tuple[str, Any]]]]:
+    """``(market, book, [(label, price), ...])`` for every book kept by :func:`outcome_set`."""
+
+    groups: List[Tuple[str, str, List[Tuple[str, Any]]]] = []
+    for (market, _pair_key), book_data in quotes.items():
+        kept, _excluded = outcome_set(market, book_data)
+        for book in kept:
+            items = list(book_data[book].items())
+            groups.append((market, book, items[:2] if market in TWO_WAY_MARKETS else items))
+    return groups
+
+
+def excluded_books(quotes: Dict[Tuple[str, Any], Dict[str, Dict[str, int]]]) -> Dict[BetKey, List[str]]:
+    """Books :func:`outcome_set` left out, per bet priced from their group."""
+
+    out: Dict[BetKey, List[str]] = {}
+    for (market, _pair_key), book_data in quotes.items():
+        kept, excluded = outcome_set(market, book_data)
+        if not kept or not excluded:
+            continue
+        limit = 2 if market in TWO_WAY_MARKETS else None
+        for label in {label for book in kept for label in list(book_data[book])[:limit]}:
+            out.setdefault(BetKey(market, label), []).extend(excluded)
+    return {bet: sorted(set(books)) for bet, books in out.items()}
+
+
+def devig_ragged(implied: List[List[float]], method: Optional[str] = None) -> List[List[float]]:
+    """:func:`devig` rows of different lengths, one call per outcome count."""
+
+    by_width: Dict[int, List[int]] = defaultdict(list)
+    for i, row in enumerate(implied):
+        by_width[len(row)].append(i)
+    out: List[List[float]] = [[] for _ in implied]
+    for idx in by_width.values():
+        for i, row in zip(idx, devig([implied[i] for i in idx], method).tolist()):
+            out[i] = row
+    return out
+
+
+def pair_quotes_by_point(
+    quotes: Dict[Tuple[str, Any], Dict[str, Dict[str, int]]], method: Optional[str] = None
+) -> Dict[BetKey, Dict[str, float]]:
+    """Group each book's outcomes by market and compute per-book probabilities.
+
+    Two-way markets are devigged as pairs and N-way markets (e.g. 1X2) over
+    all their outcomes; every market of a given size goes through one
+    :func:`devig` call.
+    """
+
+    groups = group_market_quotes(quotes)
+    fair = devig_ragged([[_american_to_prob(price) for _, price in items] for _, _, items in groups], method)
+
+    probs: Dict[BetKey, Dict[str, float]] = defaultdict(dict)
+    for (market, book, items), row in zip(groups, fair):
+        for (label, _price), p in zip(items, row):
+            probs[BetKey(market, label)][book] = p
 
     return probs
 
 
-def compute_consensus(event: Dict[str, Any], allowed_books: Iterable[str]) -> Dict[BetKey, DevigResult]:
-    """Compute consensus probabilities across allowed books."""
+def consensus_result(
+    book_probs: Dict[str, float],
+    consensus: float,
+    effective: Iterable[float],
+    dropped: Iterable[bool],
+    excluded: Iterable[str] = (),
+) -> DevigResult:
+    """Build a :class:`DevigResult` from one row of :func:`combine_books`.
 
-    raw_quotes = extract_book_quotes(event, allowed_books)
-    per_book = pair_quotes_by_point(raw_quotes)
-    results: Dict[BetKey, DevigResult] = {}
-
-    for bet, book_probs in per_book.items():
-        books = sorted(book_probs)
-        notes: List[str] = []
-        if books:
-            consensus = sum(book_probs.values()) / len(book_probs)
-            odds = _prob_to_american(consensus)
+    ``excluded`` names books whose quotes were left out by :func:`outcome_set`.
+    """
+
+    weights: Dict[str, float] = {}
+    dropped_books: List[str] = []
+    for book, w, drop in zip(book_probs, effective, dropped):
+        if drop:
+            dropped_books.append(book)
         else:
-            consensus = None
-            odds = None
-            notes.append("no valid books")
-        results[bet] = DevigResult(
-            book_probabilities=book_probs,
-            consensus_probability=consensus,
-            consensus_odds=odds,
-            books=books,
-            notes=notes,
-        )
+            weights[book] = w
+    notes: List[str] = []
+    excluded = sorted(excluded)
+    if excluded:
+        notes.append(f"different outcome set excluded: {', '.join(excluded)}")
+    if dropped_books:
+        notes.append(f"outliers dropped: {', '.join(sorted(dropped_books))}")
+    if consensus != consensus:  # NaN: nothing left to average
+        notes.append("no valid books" if not book_probs else "all books weighted 0")
+        prob: Optional[float] = None
+        odds: Optional[int] = None
+    else:
+        prob = consensus
+        odds = _prob_to_american(consensus)
+    return DevigResult(
+        book_probabilities=book_probs,
+        consensus_probability=prob,
+        consensus_odds=odds,
+        books=sorted(book_probs),
+        notes=notes,
+        weights=weights,
+        dropped_books=sorted(dropped_books),
+    )
+
+
+def compute_consensus(
+    event: Dict[str, Any],
+    allowed_books: Iterable[str],
+    method: Optional[str] = None,
+    settings: Optional[ConsensusSettings] = None,
+) -> Dict[BetKey, DevigResult]:
+    """Compute consensus probabilities across allowed books.
+
+    ``method`` names a devig method in :data:`DEVIG_METHODS` (default
+    multiplicative; ``config.DEVIG_METHOD`` is not read here, callers pass
+    it); ``settings`` sets book weights and outlier handling (default: equal
+    weights, nothing dropped).
+    """
 
-    return results
+    settings = settings or ConsensusSettings()
+    raw_quotes = extract_book_quotes(event, allowed_books)
+    per_book = pair_quotes_by_point(raw_quotes, method)
+    bets = list(per_book)
+    width = max((len(per_book[b]) for b in bets), default=0)
+    probs = np.full((len(bets), width), np.nan)
+    weights = np.zeros((len(bets), width))
+    for i, bet in enumerate(bets):
+        for j, (book, p) in enumerate(per_book[bet].items()):
+            probs[i, j] = p
+            weights[i, j] = settings.weight(bet.market, book)
+    consensus, effective, dropped = combine_books(probs, weights, settings.outlier, settings.mad_k)
+    excluded = excluded_books(raw_quotes)
+
+    return {
+        bet: consensus_result(per_book[bet], c, eff, drop, excluded.get(bet, ()))
+        for bet, c, eff, drop in zip(bets, consensus.tolist(), effective.tolist(), dropped.tolist())
+    }
 
 
 __all__ = [
     "BetKey",
     "BookQuote",
     "DevigResult",
+    "ConsensusSettings",
+    "OUTLIER_METHODS",
+    "MIN_MAD",
+    "DEFAULT_DEVIG_METHOD",
+    "DEVIG_METHODS",
     "normalize_market_and_label",
     "extract_book_quotes",
+    "register_devig_method",
+    "get_devig_method",
+    "devig",
     "devig_two_way",
+    "TWO_WAY_MARKETS",
+    "outcome_set",
+    "excluded_books",
+    "group_market_quotes",
+    "devig_ragged",
     "pair_quotes_by_point",
+    "combine_books",
+    "consensus_result",
     "compute_consensus",
 ]
@@ -0,0 +1,276 @@
+"""Vectorized devig and consensus for a whole slate of events.
+
+:func:`flatten_slate` turns every quote of every event into flat NumPy
+arrays (event, market, pair key, book, side, price); :func:`slate_consensus`
+then computes implied probabilities, no-vig probabilities (two- or N-way) and the
+per-bet consensus across books with array operations instead of the
+per-event dict walk in :mod:`core.consensus_pricer`.
+
+Results are bit-for-bit identical to :func:`core.consensus_pricer.compute_consensus`:
+quotes are grouped with the same rules (:func:`core.consensus_pricer.outcome_set`
+picks the books of each market, later duplicates overwrite earlier ones) and both reduce the same
+(bet x book) matrix layout with :func:`core.consensus_pricer.combine_books`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from .consensus_pricer import (
+    TWO_WAY_MARKETS,
+    BetKey,
+    ConsensusSettings,
+    DevigResult,
+    combine_books,
+    consensus_result,
+    devig,
+    normalize_market_and_label,
+    outcome_set,
+)
+from .odds_convert import american_to_prob_array, parse_american, prob_to_american_array as prob_to_american
+
+_MISSING = object()
+
+
+@dataclass
+class SlateQuotes:
+    """Flat quote arrays; rows are in ``extract_book_quotes`` iteration order."""
+
+    event: np.ndarray  # index into event_ids
+    market: np.ndarray  # index into markets
+    pair: np.ndarray  # (event, market, pair key) group index
+    book: np.ndarray  # index into books
+    side: np.ndarray  # position of the label within its (pair, book) quotes
+    unit_size: np.ndarray  # number of labels quoted by that book for that pair
+    n_outcomes: np.ndarray  # outcomes the book's quotes are devigged over; 0 when left out (outcome_set)
+    bet: np.ndarray  # index into bets
+    price: np.ndarray  # float64 American price (NaN when missing)
+    event_ids: List[str]
+    markets: List[str]
+    books: List[str]
+    bets: List[Tuple[str, BetKey]]
+    excluded: Dict[int, List[str]]  # bet index -> books outcome_set left out
+
+
+@dataclass
+class SlateConsensus:
+    """Per-bet consensus plus the (bet, book) no-vig probabilities behind it."""
+
+    quotes: SlateQuotes
+    entry_bet: np.ndarray  # per (bet, book): bet index, in insertion order
+    entry_book: np.ndarray
+    entry_prob: np.ndarray
+    entry_weight: np.ndarray  # effective (normalized) weight; 0 when dropped
+    entry_dropped: np.ndarray  # rejected as an outlier
+    bet_order: np.ndarray  # bet indices in first-seen order
+    probability: np.ndarray  # consensus per bet index (NaN if unpriced)
+    odds: np.ndarray  # American consensus odds per bet index
+    n_books: np.ndarray
+
+    def to_results(self) -> Dict[str, Dict[BetKey, DevigResult]]:
+        """``{event_id: compute_consensus(event)}`` for every event in the slate."""
+
+        q = self.quotes
+        per_bet: Dict[int, Tuple[Dict[str, float], List[float], List[bool]]] = {}
+        for b, k, p, w, d in zip(
+            self.entry_bet.tolist(),
+            self.entry_book.tolist(),
+            self.entry_prob.tolist(),
+            self.entry_weight.tolist(),
+            self.entry_dropped.tolist(),
+        ):
+            probs, weights, dropped = per_bet.setdefault(b, ({}, [], []))
+            probs[q.books[k]] = p
+            weights.append(w)
+            dropped.append(d)
+        out: Dict[str, Dict[BetKey, DevigResult]] = {ev: {} for ev in q.event_ids}
+        consensus = self.probability.tolist()
+        for b in self.bet_order.tolist():
+            ev, key = q.bets[b]
+            probs, weights, dropped = per_bet[b]
+            out[ev][key] = consensus_result(probs, consensus[b], weights, dropped, q.excluded.get(b, ()))
+        return out
+
+
+def flatten_slate(events: Mapping[str, Dict[str, Any]], allowed_books: Iterable[str]) -> SlateQuotes:
+    """Flatten ``{event_id: event}`` into :class:`SlateQuotes`."""
+
+    allowed = set(allowed_books or [])
+    memo: Dict[Tuple[Any, ...], Optional[Tuple[str, str, Any]]] = {}
+    markets: Dict[str, int] = {}
+    books: Dict[str, int] = {}
+    bet_codes: Dict[Tuple[str, str, str], int] = {}
+    bets: List[Tuple[str, BetKey]] = []
+    rows: List[Tuple[int, ...]] = []
+    prices: List[float] = []
+    excluded: Dict[int, List[str]] = {}
+    n_pairs = 0
+
+    event_ids = list(events)
+    for e_idx, ev_id in enumerate(event_ids):
+        # same nesting (and overwrite semantics) as extract_book_quotes
+        grouped: Dict[Tuple[str, Any], Dict[str, Dict[str, Any]]] = {}
+        for bm in events[ev_id].get("bookmakers", []):
+            book = bm.get("key")
+            if allowed and book not in allowed:
+                continue
+            for market in bm.get("markets", []):
+                mkey = market.get("key")
+                for outcome in market.get("outcomes", []):
+                    point = outcome.get("point", _MISSING)
+                    sig = (mkey, outcome.get("name"), type(point), point, outcome.get("team"))
+                    try:
+                        norm = memo[sig]
+                    except (KeyError, TypeError):
+                        norm = normalize_market_and_label(mkey, outcome)
+                        try:
+                            memo[sig] = norm
+                        except TypeError:
+                            pass
+                    if not norm:
+                        continue
+                    market_name, label, pair_key = norm
+                    grouped.setdefault((market_name, pair_key), {}).setdefault(book, {})[label] = outcome.get("price")
+        for (market_name, _pair_key), book_data in grouped.items():
+            m_idx = markets.setdefault(market_name, len(markets))
+            kept, left_out = outcome_set(market_name, book_data)
+            two_way = market_name in TWO_WAY_MARKETS
+            p_idx = n_pairs
+            n_pairs += 1
+            priced = set()
+            for book, label_price in book_data.items():
+                k_idx = books.setdefault(book, len(books))
+                size = len(label_price)
+                n_out = (2 if two_way else size) if book in kept else 0
+                for side, (label, price) in enumerate(label_price.items()):
+                    b_idx = bet_codes.get((ev_id, market_name, label))
+                    if b_idx is None:
+                        b_idx = bet_codes[(ev_id, market_name, label)] = len(bets)
+                        bets.append((ev_id, BetKey(market_name, label)))
+                    if side < n_out:
+                        priced.add(b_idx)
+                    rows.append((e_idx, m_idx, p_idx, k_idx, side, size, n_out, b_idx))
+                    # same coercion as american_to_prob: "+150" parses, junk is NaN
+                    val = parse_american(price)
+                    prices.append(np.nan if val is None else val)
+            if left_out:
+                for b_idx in priced:
+                    excluded.setdefault(b_idx, []).extend(left_out)
+
+    cols = np.asarray(rows, dtype=np.int64).reshape(-1, 8).T
+    return SlateQuotes(
+        event=cols[0],
+        market=cols[1],
+        pair=cols[2],
+        book=cols[3],
+        side=cols[4],
+        unit_size=cols[5],
+        n_outcomes=cols[6],
+        bet=cols[7],
+        price=np.asarray(prices, dtype=np.float64),
+        event_ids=event_ids,
+        markets=list(markets),
+        books=list(books),
+        bets=bets,
+        excluded={b: sorted(set(books_out)) for b, books_out in excluded.items()},
+    )
+
+
+def implied_probability(price: np.ndarray) -> np.ndarray:
+    """Vectorized ``consensus_pricer._american_to_prob`` (missing prices -> 0)."""
+
+    return np.nan_to_num(american_to_prob_array(price), nan=0.0)
+
+
+def slate_consensus(
+    quotes: SlateQuotes, method: Optional[str] = None, settings: Optional[ConsensusSettings] = None
+) -> SlateConsensus:
+    """Devig and weighted consensus over the whole slate at once.
+
+    ``method`` is a :data:`core.consensus_pricer.DEVIG_METHODS` name; its
+    solver runs once per market size (pairs, 1X2 ...) over the whole slate.  ``settings`` carries the
+    book weights and outlier rule, applied by one ``combine_books`` call.
+    """
+
+    settings = settings or ConsensusSettings()
+    n_bets = len(quotes.bets)
+    implied = implied_probability(quotes.price)
+    # a book's quotes for one market are adjacent rows, side 0 first
+    complete = (quotes.side == 0) & (quotes.n_outcomes >= 2) & (quotes.unit_size >= quotes.n_outcomes)
+    row_parts = [np.empty(0, dtype=np.int64)]
+    prob_parts = [np.empty(0)]
+    for n in np.unique(quotes.n_outcomes[complete]).tolist():
+        cells = np.flatnonzero(complete & (quotes.n_outcomes == n))[:, None] + np.arange(n)
+        row_parts.append(cells.ravel())
+        prob_parts.append(devig(implied[cells], method).ravel())
+    rows = np.concatenate(row_parts)
+    probs = np.concatenate(prob_parts)
+    order = np.argsort(rows, kind="stable")
+    rows, probs = rows[order], probs[order]
+    bets, books = quotes.bet[rows], quotes.book[rows]
+
+    # a (bet, book) seen twice keeps its first position and its last value
+    pair_id = bets * max(len(quotes.books), 1) + books
+    uniq, first_pos, inverse = np.unique(pair_id, return_index=True, return_inverse=True)
+    last_pos = np.zeros(len(uniq), dtype=np.int64)
+    np.maximum.at(last_pos, inverse, np.arange(len(pair_id)))
+    keep = np.sort(first_pos)
+    value_at = last_pos[inverse[keep]]
+    entry_bet, entry_book, entry_prob = bets[keep], books[keep], probs[value_at]
+    entry_market = quotes.market[rows[keep]]
+
+    # (bet x book) matrix; column j is the j-th book to price the bet
+    order = np.argsort(entry_bet, kind="stable")
+    counts = np.bincount(entry_bet, minlength=n_bets)
+    rank = np.empty(len(entry_bet), dtype=np.int64)
+    rank[order] = np.arange(len(entry_bet)) - (np.cumsum(counts) - counts)[entry_bet[order]]
+    width = int(counts.max(initial=0))
+    table = np.array(
+        [[settings.weight(m, k) for k in quotes.books] for m in quotes.markets], dtype=np.float64
+    ).reshape(len(quotes.markets), len(quotes.books))
+    matrix = np.full((n_bets, width), np.nan)
+    weights = np.zeros((n_bets, width))
+    matrix[entry_bet, rank] = entry_prob
+    weights[entry_bet, rank] = table[entry_market, entry_book]
+    consensus, effective, dropped = combine_books(matrix, weights, settings.outlier, settings.mad_k)
+
+    _, first_seen = np.unique(entry_bet, return_index=True)
+    bet_order = entry_bet[np.sort(first_seen)]
+
+    return SlateConsensus(
+        quotes=quotes,
+        entry_bet=entry_bet,
+        entry_book=entry_book,
+        entry_prob=entry_prob,
+        entry_weight=effective[entry_bet, rank],
+        entry_dropped=dropped[entry_bet, rank],
+        bet_order=bet_order,
+        probability=consensus,
+        odds=prob_to_american(np.nan_to_num(consensus)),
+        n_books=counts,
+    )
+
+
+def compute_slate_consensus(
+    events: Mapping[str, Dict[str, Any]],
+    allowed_books: Iterable[str],
+    method: Optional[str] = None,
+    settings: Optional[ConsensusSettings] = None,
+) -> Dict[str, Dict[BetKey, DevigResult]]:
+    """Batch equivalent of calling ``compute_consensus`` for every event."""
+
+    return slate_consensus(flatten_slate(events, allowed_books), method, settings).to_results()
+
+
+__all__ = [
+    "SlateConsensus",
+    "SlateQuotes",
+    "compute_slate_consensus",
+    "flatten_slate",
+    "implied_probability",
+    "prob_to_american",
+    "slate_consensus",
+]
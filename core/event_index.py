@@ -0,0 +1,88 @@
+"""Local event-id -> league routing index.
+
+``refresh_live_odds`` sees every (league, event id) pair the Odds API knows
+about.  Persisting that mapping lets per-event requests go straight to the
+right sport key instead of probing every league in ``config.LEAGUES``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Entries whose event started more than this long ago are pruned on update.
+RETENTION = timedelta(days=7)
+
+
+def _parse_ts(value: str) -> Optional[datetime]:
+    try:
+        ts = datetime.fromisoformat((value or "").replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def load_index(path: str) -> Dict[str, Dict[str, str]]:
+    """Return ``{event_id: {"league": ..., "commence_time": ...}}``."""
+
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_index(index: Dict[str, Dict[str, str]], path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(index, fh, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def update_index(
+    entries: Iterable[Tuple[str, str, str]],
+    path: str,
+    now: Optional[datetime] = None,
+) -> Dict[str, Dict[str, str]]:
+    """Merge ``(league, event_id, commence_time)`` entries into the index.
+
+    Events from earlier pulls are kept (bets are often settled after the event
+    drops off the live feed) until they are older than :data:`RETENTION`.
+    """
+
+    now = now or datetime.now(timezone.utc)
+    index = load_index(path)
+    for league, event_id, commence in entries:
+        if league and event_id:
+            index[event_id] = {"league": league, "commence_time": commence or ""}
+
+    cutoff = now - RETENTION
+    for event_id in list(index):
+        ts = _parse_ts(index[event_id].get("commence_time", ""))
+        if ts is not None and ts < cutoff:
+            del index[event_id]
+
+    save_index(index, path)
+    return index
+
+
+def leagues_for(event_id: str, index: Dict[str, Dict[str, str]], leagues: Iterable[str]) -> List[str]:
+    """Return the leagues to query for ``event_id``.
+
+    Indexed events route to their single known league; unknown events fall
+    back to probing every configured league in order.
+    """
+
+    entry = index.get(event_id)
+    if entry and entry.get("league"):
+        return [entry["league"]]
+    return list(leagues)
+
+
+__all__ = ["load_index", "save_index", "update_index", "leagues_for"]
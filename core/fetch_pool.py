@@ -0,0 +1,50 @@
+"""Bounded thread-pool helpers for I/O heavy fetch loops.
+
+The Odds API calls in ``odds_sync`` are blocking ``requests`` calls, so a small
+thread pool gives us concurrency without changing the HTTP code.  Results are
+always returned in input order so callers produce the same output as the
+sequential loop they replace.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, TypeVar
+
+from .logging_utils import warn
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def map_ordered(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int = 1,
+    default: Optional[R] = None,
+) -> List[Optional[R]]:
+    """Apply ``func`` to every item using at most ``max_workers`` threads.
+
+    The returned list lines up with ``items`` regardless of completion order.
+    An exception raised for one item is logged and replaced by ``default`` so
+    a single bad request cannot abort the whole batch.  ``max_workers <= 1``
+    runs inline without a pool.
+    """
+
+    items = list(items)
+
+    def _safe(item: T) -> Optional[R]:
+        try:
+            return func(item)
+        except Exception as e:
+            warn(f"Fetch failed for {item!r}: {type(e).__name__}: {e}")
+            return default
+
+    if max_workers <= 1 or len(items) <= 1:
+        return [_safe(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(_safe, items))
+
+
+__all__ = ["map_ordered"]
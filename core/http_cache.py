@@ -0,0 +1,121 @@
+"""SQLite-backed HTTP response cache.
+
+Responses are keyed by endpoint plus normalized query parameters (secrets such
+as ``apiKey`` are dropped and list values are sorted) so re-running a pipeline
+stage after a downstream failure does not re-buy the same API responses.
+Entries expire individually and the database is bounded by size, evicting the
+least recently used responses first.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional
+
+# Parameters that identify the caller rather than the response.
+IGNORED_PARAMS = {"apikey", "api_key", "key"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    params TEXT NOT NULL,
+    body TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+)
+"""
+
+
+def normalize_params(params: Optional[Mapping[str, Any]]) -> Dict[str, str]:
+    """Return a canonical, secret-free copy of ``params``."""
+
+    out: Dict[str, str] = {}
+    for k, v in (params or {}).items():
+        if k.lower() in IGNORED_PARAMS or v is None:
+            continue
+        s = str(v).strip()
+        if "," in s:
+            s = ",".join(sorted(p.strip() for p in s.split(",") if p.strip()))
+        out[k] = s
+    return dict(sorted(out.items()))
+
+
+def cache_key(endpoint: str, params: Optional[Mapping[str, Any]]) -> str:
+    raw = json.dumps([endpoint, normalize_params(params)], separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Thread-safe response cache stored in a single SQLite file."""
+
+    def __init__(self, path: str, max_bytes: int = 200 * 1024 * 1024):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(_SCHEMA)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_accessed ON responses(accessed_at)")
+        self._conn.commit()
+
+    def get(self, endpoint: str, params: Optional[Mapping[str, Any]]) -> Optional[str]:
+        """Return the cached body, or ``None`` when missing or expired."""
+
+        key = cache_key(endpoint, params)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, endpoint: str, params: Optional[Mapping[str, Any]], body: str, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        key = cache_key(endpoint, params)
+        now = time.time()
+        norm = json.dumps(normalize_params(params), separators=(",", ":"))
+        size = len(body.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, endpoint, norm, body, size, now, now + ttl, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall():
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+__all__ = ["ResponseCache", "normalize_params", "cache_key"]
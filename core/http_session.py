@@ -0,0 +1,137 @@
+"""Shared, pooled HTTP session with retry/backoff for outbound API traffic.
+
+All Odds API calls (and the scrapers' plain HTTP probes) go through one
+process-wide ``requests.Session`` so TCP/TLS connections are kept alive and
+reused across requests and worker threads.  Transient failures (429, 5xx,
+timeouts, dropped connections) are retried with exponential backoff plus
+jitter, and per-run counters record requests, retries and bytes transferred.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .logging_utils import warn
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_settings: Dict[str, Any] = {"pool_size": 16, "retries": 3, "backoff": 0.5, "max_backoff": 20.0}
+_stats: Dict[str, int] = {"requests": 0, "retries": 0, "failures": 0, "bytes": 0, "bytes_decoded": 0}
+
+
+def configure(
+    pool_size: Optional[int] = None,
+    retries: Optional[int] = None,
+    backoff: Optional[float] = None,
+    max_backoff: Optional[float] = None,
+) -> None:
+    """Override pool/retry settings; takes effect for the next session built."""
+
+    global _session
+    with _lock:
+        for key, value in (
+            ("pool_size", pool_size),
+            ("retries", retries),
+            ("backoff", backoff),
+            ("max_backoff", max_backoff),
+        ):
+            if value is not None:
+                _settings[key] = value
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide keep-alive session, creating it on first use."""
+
+    global _session
+    with _lock:
+        if _session is None:
+            s = requests.Session()
+            size = max(int(_settings["pool_size"]), 1)
+            adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            s.headers.update({"Accept-Encoding": "gzip, deflate"})
+            _session = s
+        return _session
+
+
+def _bump(**deltas: int) -> None:
+    with _lock:
+        for key, value in deltas.items():
+            _stats[key] += value
+
+
+def _sleep_for(attempt: int, retry_after: Optional[str]) -> float:
+    if retry_after:
+        try:
+            return min(float(retry_after), _settings["max_backoff"])
+        except ValueError:
+            pass
+    base = _settings["backoff"] * (2 ** attempt)
+    return min(base, _settings["max_backoff"]) * random.uniform(0.5, 1.5)
+
+
+def get(url: str, retries: Optional[int] = None, **kwargs: Any) -> requests.Response:
+    """``session.get`` with retries on 429/5xx, timeouts and connection errors.
+
+    The final response is returned even when its status is retryable so
+    callers keep their own status handling; the last network exception is
+    re-raised once retries are exhausted.
+    """
+
+    attempts = (_settings["retries"] if retries is None else retries) + 1
+    session = get_session()
+    for attempt in range(attempts):
+        last = attempt == attempts - 1
+        try:
+            r = session.get(url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            _bump(requests=1, failures=1)
+            if last:
+                raise
+            delay = _sleep_for(attempt, None)
+            warn(f"HTTP {type(e).__name__} for {url}; retry {attempt + 1} in {delay:.1f}s")
+        else:
+            wire = r.headers.get("Content-Length")
+            decoded = len(r.content)
+            _bump(requests=1, bytes=int(wire) if wire and wire.isdigit() else decoded, bytes_decoded=decoded)
+            if r.status_code not in RETRY_STATUSES or last:
+                return r
+            delay = _sleep_for(attempt, r.headers.get("Retry-After"))
+            warn(f"HTTP {r.status_code} for {url}; retry {attempt + 1} in {delay:.1f}s")
+        _bump(retries=1)
+        time.sleep(delay)
+    raise RuntimeError("unreachable")  # pragma: no cover
+
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        return dict(_stats)
+
+
+def reset_stats() -> None:
+    with _lock:
+        for key in _stats:
+            _stats[key] = 0
+
+
+def summary() -> str:
+    s = stats()
+    return (
+        f"{s['requests']} HTTP requests, {s['retries']} retries, "
+        f"{s['bytes'] / 1024:.1f} KB transferred ({s['bytes_decoded'] / 1024:.1f} KB decoded)"
+    )
+
+
+__all__ = ["configure", "get_session", "get", "stats", "reset_stats", "summary"]
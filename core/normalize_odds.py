@@ -11,15 +11,21 @@ price and probability are derived from identical sources.
 from collections import defaultdict
 from typing import Any, Dict, Iterable, List, Optional
 
-from .consensus_pricer import devig_two_way, extract_book_quotes
+from .consensus_pricer import _american_to_prob, devig_ragged, extract_book_quotes, group_market_quotes
 
 
-def normalize_odds(event: Dict[str, Any], allowed_books: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+def normalize_odds(
+    event: Dict[str, Any], allowed_books: Iterable[str], method: Optional[str] = None
+) -> Dict[str, Dict[str, Any]]:
     """Return normalized odds information for each label in an event.
 
-    Only books offering both sides of a two-way market are considered.  The
-    returned mapping contains the no-vig probability, the best available price
-    from those books, and the book-specific data used to derive them.
+    Only books offering every outcome of a market (both sides of a two-way
+    market, all three of a 1X2) are considered.  The returned mapping contains
+    the no-vig probability, the best available price from those books, and the
+    book-specific data used to derive them.
+    ``method`` selects the devig method (see
+    :data:`core.consensus_pricer.DEVIG_METHODS`); None is multiplicative, as
+    ``config.DEVIG_METHOD`` is only applied by callers that pass it.
     """
 
     raw_quotes = extract_book_quotes(event, allowed_books)
@@ -28,18 +34,14 @@ def normalize_odds(event: Dict[str, Any], allowed_books: Iterable[str]) -> Dict[
     book_probs: Dict[str, Dict[str, float]] = defaultdict(dict)
     book_prices: Dict[str, Dict[str, int]] = defaultdict(dict)
 
-    for (_market, _pair_key), book_data in raw_quotes.items():
-        for book, label_price in book_data.items():
-            # Only consider books that offer both sides of the market
-            if len(label_price) < 2:
-                continue
-            items = list(label_price.items())[:2]
-            (label1, price1), (label2, price2) = items
-            p1, p2 = devig_two_way(price1, price2)
-            book_probs[label1][book] = p1
-            book_probs[label2][book] = p2
-            book_prices[label1][book] = price1
-            book_prices[label2][book] = price2
+    groups = group_market_quotes(raw_quotes)
+    # one devig call per market size for the whole event
+    implied = [[_american_to_prob(price) for _, price in items] for _, _, items in groups]
+    fair = devig_ragged(implied, method)
+    for (_market, book, items), probs in zip(groups, fair):
+        for (label, price), p in zip(items, probs):
+            book_probs[label][book] = p
+            book_prices[label][book] = price
 
     results: Dict[str, Dict[str, Any]] = {}
     for label, probs in book_probs.items():
@@ -0,0 +1,318 @@
+"""Thin client for The Odds API used by both ``odds_sync`` variants.
+
+``get`` mirrors the subset of ``requests.Response`` the sync scripts use
+(``status_code``, ``text``, ``json()``) and adds an optional on-disk response
+cache.  Network calls go through :mod:`core.http_session` for pooling and
+retries.  The cache is configured once per run via :func:`configure_cache`;
+until then every call goes straight to the network.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+from urllib.parse import urlparse
+
+from . import http_session
+from .http_cache import ResponseCache
+from .odds_quota import QuotaTracker
+from .tick_store import TickStore, ticks_from_payload
+
+# Default TTLs in seconds per endpoint kind (see :func:`endpoint_kind`).
+DEFAULT_TTLS: Dict[str, float] = {
+    "live": 120,
+    "event": 300,
+    "completed": 7 * 24 * 3600,
+}
+# An event counts as completed this long after its commence_time.
+COMPLETED_AFTER = 6 * 3600
+
+_LIVE_RE = re.compile(r"/v4/sports/[^/]+/odds/?$")
+_EVENT_RE = re.compile(r"/v4/sports/[^/]+/events/[^/]+/odds/?$")
+
+_cache: Optional[ResponseCache] = None
+_cache_only = False
+_ttls: Dict[str, float] = dict(DEFAULT_TTLS)
+_quota: Optional[QuotaTracker] = None
+_quota_floor = 0
+_allowed_books: List[str] = []
+_regions = "us"
+_use_bookmakers = False
+_ticks: Optional[TickStore] = None
+# The Odds API bills every 10 bookmakers like one region.
+BOOKMAKERS_PER_REGION = 10
+
+
+@dataclass
+class ApiResponse:
+    """Minimal response object compatible with the callers' ``requests`` usage."""
+
+    status_code: int
+    text: str
+    from_cache: bool = False
+    headers: Mapping[str, str] = field(default_factory=dict)
+    _parsed: Any = field(default=None, repr=False)
+
+    def json(self) -> Any:
+        if self._parsed is None:
+            t0 = time.perf_counter()
+            self._parsed = json.loads(self.text)
+            _payloads.record(len(self.text.encode("utf-8")), time.perf_counter() - t0, self._parsed)
+        return self._parsed
+
+
+class PayloadStats:
+    """Per-run size/parse-time totals and how many bookmaker entries we keep."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.bytes = 0
+        self.parse_s = 0.0
+        self.books_seen = 0
+        self.books_kept = 0
+
+    def record(self, size: int, parse_s: float, payload: Any) -> None:
+        events = payload if isinstance(payload, list) else [payload]
+        allowed = set(_allowed_books)
+        seen = kept = 0
+        for ev in events:
+            if not isinstance(ev, dict):
+                continue
+            for bk in ev.get("bookmakers", []) or []:
+                seen += 1
+                kept += 1 if (not allowed or bk.get("key") in allowed) else 0
+        with self._lock:
+            self.responses += 1
+            self.bytes += size
+            self.parse_s += parse_s
+            self.books_seen += seen
+            self.books_kept += kept
+
+    def report(self, baseline_path: Optional[str] = None) -> str:
+        """Summarize the run and the savings of ``bookmakers=`` over ``regions=``.
+
+        Runs in regions mode measure the discarded share directly and store it
+        as a baseline; bookmakers-mode runs compare against that baseline.
+        """
+
+        if not self.responses or not self.books_seen:
+            return f"{self.responses} payloads parsed"
+        per_book_bytes = self.bytes / self.books_seen
+        per_book_s = self.parse_s / self.books_seen
+        head = (
+            f"{self.responses} payloads, {self.bytes / 1024:.1f} KB, "
+            f"parse {self.parse_s * 1000:.0f} ms, {self.books_kept}/{self.books_seen} bookmaker entries kept"
+        )
+        if not _use_bookmakers:
+            dropped = self.books_seen - self.books_kept
+            if baseline_path:
+                _save_baseline(baseline_path, self.books_seen / self.books_kept if self.books_kept else 1.0)
+            return (
+                f"{head}; bookmakers= would save ~{dropped * per_book_bytes / 1024:.1f} KB "
+                f"and ~{dropped * per_book_s * 1000:.0f} ms"
+            )
+        ratio = _load_baseline(baseline_path)
+        if ratio is None:
+            return f"{head}; savings unknown (no regions-mode baseline yet)"
+        avoided = self.books_kept * (ratio - 1.0)
+        return (
+            f"{head}; bookmakers= saved ~{avoided * per_book_bytes / 1024:.1f} KB "
+            f"and ~{avoided * per_book_s * 1000:.0f} ms vs regions={_regions}"
+        )
+
+
+def _save_baseline(path: str, ratio: float) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({"books_seen_per_kept": ratio}, fh)
+
+
+def _load_baseline(path: Optional[str]) -> Optional[float]:
+    if not path or not os.path.isfile(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return float(json.load(fh)["books_seen_per_kept"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+_payloads = PayloadStats()
+
+
+def configure_cache(
+    cache: Optional[ResponseCache],
+    cache_only: bool = False,
+    ttls: Optional[Mapping[str, float]] = None,
+) -> None:
+    """Install (or remove, with ``None``) the response cache for this process.
+
+    ``cache_only`` serves hits and turns every miss into a 504 without
+    touching the network, which is useful for replaying a failed run.
+    """
+
+    global _cache, _cache_only, _ttls
+    _cache = cache
+    _cache_only = bool(cache_only and cache is not None)
+    _ttls = {**DEFAULT_TTLS, **(ttls or {})}
+
+
+def configure_quota(tracker: Optional[QuotaTracker], floor: int = 0) -> None:
+    """Record usage headers into ``tracker``; refuse calls once ``floor`` is reached."""
+
+    global _quota, _quota_floor
+    _quota = tracker
+    _quota_floor = floor
+
+
+def quota() -> Optional[QuotaTracker]:
+    return _quota
+
+
+def configure_ticks(store: Optional[TickStore]) -> None:
+    """Record every freshly fetched odds quote into ``store`` (``None`` disables)."""
+
+    global _ticks
+    _ticks = store
+
+
+def flush_ticks() -> int:
+    """Write buffered ticks to disk; returns how many were written."""
+
+    return _ticks.flush() if _ticks is not None else 0
+
+
+def configure_books(allowed_books: Iterable[str], regions: str, prefer_bookmakers: bool = True) -> None:
+    """Choose between ``bookmakers=`` and ``regions=`` for every request.
+
+    ``bookmakers=`` is used when it bills no more than the configured regions
+    (every :data:`BOOKMAKERS_PER_REGION` books count as one region), so the
+    API only sends the books we keep.
+    """
+
+    global _allowed_books, _regions, _use_bookmakers
+    _allowed_books = [b for b in allowed_books if b]
+    _regions = regions
+    n_regions = len([r for r in regions.split(",") if r.strip()]) or 1
+    cost = math.ceil(len(_allowed_books) / BOOKMAKERS_PER_REGION)
+    _use_bookmakers = bool(prefer_bookmakers and _allowed_books and cost <= n_regions)
+
+
+def book_params() -> Dict[str, str]:
+    """Return the ``bookmakers``/``regions`` query parameter for a request."""
+
+    if _use_bookmakers:
+        return {"bookmakers": ",".join(_allowed_books)}
+    return {"regions": _regions}
+
+
+def billing_regions() -> int:
+    """Region-equivalents billed per market for the current book selection."""
+
+    if _use_bookmakers:
+        return math.ceil(len(_allowed_books) / BOOKMAKERS_PER_REGION)
+    return len([r for r in _regions.split(",") if r.strip()]) or 1
+
+
+def payload_report(baseline_path: Optional[str] = None) -> str:
+    return _payloads.report(baseline_path)
+
+
+def endpoint_kind(url: str) -> str:
+    path = urlparse(url).path
+    if _EVENT_RE.search(path):
+        return "event"
+    if _LIVE_RE.search(path):
+        return "live"
+    return "other"
+
+
+def _is_completed(payload: Any, now: datetime) -> bool:
+    if not isinstance(payload, dict):
+        return False
+    try:
+        start = datetime.fromisoformat(str(payload.get("commence_time", "")).replace("Z", "+00:00"))
+    except ValueError:
+        return False
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    return (now - start).total_seconds() > COMPLETED_AFTER
+
+
+def ttl_for(url: str, body: str) -> float:
+    """Return the cache lifetime for a successful response from ``url``."""
+
+    kind = endpoint_kind(url)
+    if kind == "event":
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            payload = None
+        if _is_completed(payload, datetime.now(timezone.utc)):
+            return _ttls["completed"]
+    return _ttls.get(kind, 0)
+
+
+def get(url: str, params: Optional[Mapping[str, Any]] = None, timeout: float = 25) -> ApiResponse:
+    """GET ``url``, serving from and populating the response cache when enabled."""
+
+    endpoint = urlparse(url).path
+    if _cache is not None:
+        body = _cache.get(endpoint, params)
+        if body is not None:
+            return ApiResponse(200, body, from_cache=True)
+        if _cache_only:
+            return ApiResponse(504, "cache miss (--cache-only)")
+
+    # a saved count never blocks on its own: one real response refreshes it
+    if _quota is not None and _quota.live and _quota.remaining is not None and _quota.remaining <= _quota_floor:
+        return ApiResponse(429, f"quota reserve reached ({_quota.remaining} credits left)")
+
+    r = http_session.get(url, params=params, timeout=timeout)
+    resp = ApiResponse(r.status_code, r.text, headers=dict(r.headers))
+    if _quota is not None:
+        _quota.record(r.headers)
+    if _cache is not None and r.status_code == 200:
+        _cache.put(endpoint, params, r.text, ttl_for(url, r.text))
+    if _ticks is not None and r.status_code == 200 and endpoint_kind(url) != "other":
+        # cache hits were recorded when first fetched; only new quotes are ticks
+        try:
+            _ticks.add(ticks_from_payload(resp.json()))
+        except ValueError:
+            pass
+    return resp
+
+
+def cache_stats() -> str:
+    if _cache is None:
+        return "cache disabled"
+    mode = "cache-only" if _cache_only else "cache"
+    return f"{mode}: {_cache.hits} hits, {_cache.misses} misses"
+
+
+__all__ = [
+    "ApiResponse",
+    "DEFAULT_TTLS",
+    "configure_cache",
+    "configure_quota",
+    "configure_books",
+    "book_params",
+    "billing_regions",
+    "payload_report",
+    "PayloadStats",
+    "quota",
+    "configure_ticks",
+    "flush_ticks",
+    "endpoint_kind",
+    "ttl_for",
+    "get",
+    "cache_stats",
+]
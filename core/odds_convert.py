@@ -0,0 +1,215 @@
+"""American / decimal / implied-probability conversions backed by lookup tables.
+
+American prices are integers in a small range, so the implied probability
+and decimal price of every whole price in ``[-TABLE_MAX, TABLE_MAX]`` are
+computed once at import.  Converting an int in that range is a list lookup
+and a price string (``"+150"``) is parsed and converted once, then cached;
+fractional or out-of-range prices fall back to the formula, which gives the
+same values.  The ``*_array`` variants do the same for NumPy arrays.
+
+Invalid input (unparseable strings, ``None``, a price of 0) converts to
+``None`` (NaN in the array variants).
+"""
+
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+from typing import Any, Optional
+
+import numpy as np
+
+TABLE_MAX = 10000
+
+_TABLE_ODDS = np.arange(-TABLE_MAX, TABLE_MAX + 1, dtype=np.float64)
+
+
+def _prob_formula(odds):
+    return np.where(odds > 0, 100.0 / (odds + 100.0), -odds / (-odds + 100.0))
+
+
+def _decimal_formula(odds):
+    return np.where(odds > 0, 1.0 + odds / 100.0, 1.0 + 100.0 / np.abs(odds))
+
+
+with np.errstate(divide="ignore", invalid="ignore"):
+    PROB_TABLE = _prob_formula(_TABLE_ODDS)
+    DECIMAL_TABLE = _decimal_formula(_TABLE_ODDS)
+PROB_TABLE[TABLE_MAX] = np.nan  # a price of 0 is not a price
+DECIMAL_TABLE[TABLE_MAX] = np.nan
+PROB_TABLE.flags.writeable = False
+DECIMAL_TABLE.flags.writeable = False
+# plain-float copies: indexing a list is much cheaper than a NumPy scalar
+_PROB_LIST = [None if math.isnan(p) else p for p in PROB_TABLE.tolist()]
+_DECIMAL_LIST = [None if math.isnan(d) else d for d in DECIMAL_TABLE.tolist()]
+
+
+def _parse_str(s: str) -> Optional[float]:
+    s = s.strip().replace("−", "-")  # sites sometimes use a unicode minus
+    if not s:
+        return None
+    try:
+        val = float(s)
+    except ValueError:
+        return None
+    return val if math.isfinite(val) else None
+
+
+def parse_american(odds: Any) -> Optional[float]:
+    """American price as a number (``"+150"`` -> 150.0); None when unparseable or 0."""
+
+    if isinstance(odds, str):
+        val = _parse_str(odds)
+    elif odds is None or isinstance(odds, bool):
+        return None
+    else:
+        try:
+            val = float(odds)
+        except (TypeError, ValueError):
+            return None
+        if not math.isfinite(val):
+            return None
+    return val if val else None
+
+
+def _prob_of(val: Optional[float]) -> Optional[float]:
+    if val is None:
+        return None
+    if val.is_integer() and abs(val) <= TABLE_MAX:
+        return _PROB_LIST[int(val) + TABLE_MAX]
+    return 100.0 / (val + 100.0) if val > 0 else -val / (-val + 100.0)
+
+
+def _decimal_of(val: Optional[float]) -> Optional[float]:
+    if val is None:
+        return None
+    if val.is_integer() and abs(val) <= TABLE_MAX:
+        return _DECIMAL_LIST[int(val) + TABLE_MAX]
+    return 1.0 + val / 100.0 if val > 0 else 1.0 + 100.0 / abs(val)
+
+
+# sheet/CSV prices repeat a lot, so a string is parsed and converted once
+@lru_cache(maxsize=8192)
+def _prob_of_str(s: str) -> Optional[float]:
+    return _prob_of(parse_american(s))
+
+
+@lru_cache(maxsize=8192)
+def _decimal_of_str(s: str) -> Optional[float]:
+    return _decimal_of(parse_american(s))
+
+
+def american_to_prob(odds: Any) -> Optional[float]:
+    """Implied probability of an American price (ints, floats or strings)."""
+
+    if type(odds) is int and -TABLE_MAX <= odds <= TABLE_MAX:
+        return _PROB_LIST[odds + TABLE_MAX]
+    if type(odds) is str:
+        return _prob_of_str(odds)
+    return _prob_of(parse_american(odds))
+
+
+def american_to_decimal(odds: Any) -> Optional[float]:
+    """Decimal price of an American price (``-120`` -> 1.8333..., ``+150`` -> 2.5)."""
+
+    if type(odds) is int and -TABLE_MAX <= odds <= TABLE_MAX:
+        return _DECIMAL_LIST[odds + TABLE_MAX]
+    if type(odds) is str:
+        return _decimal_of_str(odds)
+    return _decimal_of(parse_american(odds))
+
+
+def decimal_to_prob(dec: Any) -> Optional[float]:
+    try:
+        dec = float(dec)
+    except (TypeError, ValueError):
+        return None
+    return 1.0 / dec if dec > 1.0 and math.isfinite(dec) else None
+
+
+def prob_to_american(prob: float) -> int:
+    """Rounded American price for a probability (0 for p <= 0, -1e9 for p >= 1)."""
+
+    if prob <= 0:
+        return 0
+    if prob >= 1:
+        return -1000000000  # effectively infinity
+    if prob > 0.5:
+        return int(round(-prob * 100 / (1 - prob)))
+    return int(round((1 - prob) * 100 / prob))
+
+
+def decimal_to_american(dec: Any) -> Optional[int]:
+    prob = decimal_to_prob(dec)
+    return None if prob is None else prob_to_american(prob)
+
+
+def prob_to_decimal(prob: float) -> Optional[float]:
+    return 1.0 / prob if 0 < prob <= 1 else None
+
+
+def format_american(odds: Optional[int]) -> str:
+    """``150`` -> ``"+150"``, ``-120`` -> ``"-120"``, None -> ``""``."""
+
+    if odds is None:
+        return ""
+    return f"+{odds}" if odds > 0 else str(odds)
+
+
+# ---------------------------------------------------------------------------
+# Array variants
+# ---------------------------------------------------------------------------
+
+
+def _lookup(table: np.ndarray, formula, odds: Any) -> np.ndarray:
+    odds = np.asarray(odds, dtype=np.float64)
+    idx = odds + TABLE_MAX
+    hit = (np.abs(odds) <= TABLE_MAX) & (odds == np.round(odds))
+    out = np.full(odds.shape, np.nan)
+    out[hit] = table[idx[hit].astype(np.int64)]
+    miss = ~hit & np.isfinite(odds) & (odds != 0)
+    if miss.any():
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[miss] = formula(odds[miss])
+    return out
+
+
+def american_to_prob_array(odds: Any) -> np.ndarray:
+    """Vectorized :func:`american_to_prob`; NaN for missing or 0 prices."""
+
+    return _lookup(PROB_TABLE, _prob_formula, odds)
+
+
+def american_to_decimal_array(odds: Any) -> np.ndarray:
+    return _lookup(DECIMAL_TABLE, _decimal_formula, odds)
+
+
+def prob_to_american_array(prob: Any) -> np.ndarray:
+    """Vectorized :func:`prob_to_american`."""
+
+    prob = np.asarray(prob, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fav = np.rint(-prob * 100 / (1 - prob))
+        dog = np.rint((1 - prob) * 100 / prob)
+    odds = np.where(prob > 0.5, fav, dog)
+    odds = np.where(prob >= 1, -1000000000, odds)
+    odds = np.where(prob <= 0, 0, odds)
+    return odds.astype(np.int64)
+
+
+__all__ = [
+    "DECIMAL_TABLE",
+    "PROB_TABLE",
+    "TABLE_MAX",
+    "american_to_decimal",
+    "american_to_decimal_array",
+    "american_to_prob",
+    "american_to_prob_array",
+    "decimal_to_american",
+    "decimal_to_prob",
+    "format_american",
+    "parse_american",
+    "prob_to_american",
+    "prob_to_american_array",
+    "prob_to_decimal",
+]
@@ -0,0 +1,93 @@
+"""Group per-bet odds lookups into one Odds API request per event.
+
+Several bets on the same game (moneyline, run line, total, alternates) all
+need the same ``/events/{id}/odds`` payload.  The planner merges the market
+families they need into a single ``markets=`` parameter so each event is
+fetched once and the response is fanned back out to the individual bets.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .odds_labeling import build_label
+
+# API market keys requested for each user-facing market family, in the order
+# they are sent in ``markets=``.
+FAMILY_MARKETS: Dict[str, Tuple[str, ...]] = {
+    "h2h": ("h2h",),
+    "spreads": ("spreads", "alternate_spreads"),
+    "totals": ("totals", "alternate_totals"),
+}
+ALTERNATE_PREFIX = "alternate_"
+
+
+@dataclass
+class EventRequest:
+    """A single per-event fetch covering every bet on that event."""
+
+    event_id: str
+    families: List[str] = field(default_factory=list)
+    bets: List[int] = field(default_factory=list)
+    # set by the quota scheduler when alternates must be skipped
+    mains_only: bool = False
+    # set in bulk mode, where main markets already come from the league feed
+    alternates_only: bool = False
+
+    @property
+    def markets(self) -> str:
+        keys = [k for fam in FAMILY_MARKETS if fam in self.families for k in FAMILY_MARKETS[fam]]
+        if self.mains_only:
+            keys = [k for k in keys if not k.startswith(ALTERNATE_PREFIX)]
+        if self.alternates_only:
+            keys = [k for k in keys if k.startswith(ALTERNATE_PREFIX)]
+        return ",".join(keys)
+
+
+def plan_event_requests(
+    triplets: Sequence[Tuple[str, str, str]],
+    family_of: Callable[[str], Optional[str]],
+) -> List[EventRequest]:
+    """Group ``(event_id, market, selection)`` triplets by event.
+
+    ``family_of`` maps a Bets-tab market to ``h2h``/``spreads``/``totals`` or
+    ``None`` for markets we do not price.  ``EventRequest.bets`` holds indexes
+    into ``triplets`` so callers can place fanned-out rows back in bet order.
+    Requests are returned in order of first appearance.
+    """
+
+    plans: Dict[str, EventRequest] = {}
+    for i, (event_id, market, _selection) in enumerate(triplets):
+        fam = family_of(market)
+        if fam is None:
+            continue
+        plan = plans.setdefault(event_id, EventRequest(event_id))
+        if fam not in plan.families:
+            plan.families.append(fam)
+        plan.bets.append(i)
+    return list(plans.values())
+
+
+def _norm_selection(s: str) -> str:
+    s = (s or "").replace("Â½", ".5").replace("½", ".5").lower()
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def line_offered(selection: str, rows: Sequence[Sequence[str]]) -> bool:
+    """Return True if any Detailed Odds row quotes the bet's exact line.
+
+    Rows use the Detailed Odds layout (``API Market`` at index 4, normalized
+    outcome name at 5, point at 6).  Used in bulk mode to decide whether a
+    spread/total bet still needs its alternate lines fetched per event.
+    """
+
+    want = _norm_selection(selection)
+    for row in rows:
+        if _norm_selection(build_label(row[4], row[5], str(row[6]))) == want:
+            return True
+    return False
+
+
+__all__ = ["FAMILY_MARKETS", "EventRequest", "plan_event_requests", "line_offered"]
@@ -0,0 +1,177 @@
+"""Odds API credit tracking and quota-aware request scheduling.
+
+Every Odds API response carries ``x-requests-remaining`` / ``x-requests-used``.
+:class:`QuotaTracker` keeps the latest values (persisted between runs) and
+:func:`schedule_requests` fits a run's per-event requests into the remaining
+budget: events starting soonest go first, alternates are dropped before main
+markets, and the lowest-priority events are dropped last.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import List, Mapping, Optional, Sequence, Tuple, Union
+
+from .odds_planner import EventRequest
+
+
+def estimate_cost(markets: str, regions: Union[str, int]) -> int:
+    """Credits charged for one odds call: markets x regions.
+
+    ``regions`` is either the ``regions=`` string or a region-equivalent
+    count (e.g. from ``bookmakers=``).
+    """
+
+    n_markets = len([m for m in (markets or "").split(",") if m.strip()])
+    if isinstance(regions, int):
+        n_regions = max(regions, 1)
+    else:
+        n_regions = len([r for r in (regions or "").split(",") if r.strip()]) or 1
+    return n_markets * n_regions
+
+
+class QuotaTracker:
+    """Thread-safe record of the latest usage headers seen.
+
+    Values saved by an earlier run are only a hint: the credits reset every
+    month, so a saved state from before the current UTC month is discarded,
+    and :attr:`live` stays False until a response of this run reported them.
+    """
+
+    def __init__(self, path: Optional[str] = None, now: Optional[datetime] = None):
+        self.path = path
+        self.remaining: Optional[int] = None
+        self.used: Optional[int] = None
+        self.spent = 0  # credits charged during this run
+        self.live = False  # remaining/used come from a response of this run
+        self._lock = threading.Lock()
+        if path and os.path.isfile(path):
+            try:
+                with open(path, "r", encoding="utf-8") as fh:
+                    data = json.load(fh)
+            except (OSError, ValueError):
+                return
+            now = now or datetime.now(timezone.utc)
+            saved = _parse_ts(data.get("updated_at", ""))
+            if saved is not None and (saved.year, saved.month) == (now.year, now.month):
+                self.remaining = data.get("remaining")
+                self.used = data.get("used")
+
+    def record(self, headers: Mapping[str, str]) -> None:
+        lower = {k.lower(): v for k, v in (headers or {}).items()}
+        try:
+            remaining = int(float(lower["x-requests-remaining"]))
+            used = int(float(lower["x-requests-used"]))
+        except (KeyError, ValueError):
+            return
+        with self._lock:
+            if self.used is not None and used > self.used:
+                self.spent += used - self.used
+            self.remaining, self.used = remaining, used
+            self.live = True
+
+    def save(self) -> None:
+        if not self.path or self.remaining is None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as fh:
+            json.dump(
+                {
+                    "remaining": self.remaining,
+                    "used": self.used,
+                    "updated_at": datetime.now(timezone.utc).isoformat(),
+                },
+                fh,
+            )
+
+    def summary(self) -> str:
+        if self.remaining is None:
+            return "quota unknown"
+        return f"{self.remaining} credits remaining, {self.spent} spent this run"
+
+
+def _parse_ts(value: str) -> Optional[datetime]:
+    try:
+        ts = datetime.fromisoformat((value or "").replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def priority_order(
+    plans: Sequence[EventRequest],
+    commence_times: Mapping[str, str],
+    now: Optional[datetime] = None,
+) -> List[EventRequest]:
+    """Order plans so events starting soonest come first.
+
+    Upcoming events sort by start time, then already-started events (most
+    recent first), then events with no known start time in bet order.
+    """
+
+    now = now or datetime.now(timezone.utc)
+
+    def key(item: Tuple[int, EventRequest]) -> Tuple[int, float, int]:
+        i, plan = item
+        ts = _parse_ts(commence_times.get(plan.event_id, ""))
+        if ts is None:
+            return (2, 0.0, i)
+        delta = (ts - now).total_seconds()
+        return (0, delta, i) if delta >= 0 else (1, -delta, i)
+
+    return [p for _, p in sorted(enumerate(plans), key=key)]
+
+
+def schedule_requests(
+    plans: Sequence[EventRequest],
+    commence_times: Mapping[str, str],
+    remaining: Optional[int],
+    regions: Union[str, int],
+    reserve: int = 0,
+    alt_threshold: int = 0,
+    now: Optional[datetime] = None,
+) -> Tuple[List[EventRequest], List[str]]:
+    """Fit ``plans`` into the credit budget.
+
+    Returns the plans to run (highest priority first) and human-readable notes
+    describing any degradation.  With an unknown ``remaining`` everything runs.
+    """
+
+    ordered = priority_order(plans, commence_times, now)
+    notes: List[str] = []
+    if remaining is None:
+        return ordered, notes
+
+    budget = remaining - reserve
+    full = sum(estimate_cost(p.markets, regions) for p in ordered)
+    if full <= budget and remaining >= alt_threshold:
+        return ordered, notes
+
+    for p in ordered:
+        p.mains_only = True
+    mains = sum(estimate_cost(p.markets, regions) for p in ordered)
+    notes.append(f"skipping alternates: full run ~{full} credits, mains ~{mains}, budget {budget}")
+    if mains <= budget:
+        return ordered, notes
+
+    kept: List[EventRequest] = []
+    spent = 0
+    for p in ordered:
+        cost = estimate_cost(p.markets, regions)
+        if spent + cost > budget:
+            break
+        kept.append(p)
+        spent += cost
+    notes.append(f"dropping {len(ordered) - len(kept)} lowest-priority events to stay within budget")
+    return kept, notes
+
+
+__all__ = [
+    "QuotaTracker",
+    "estimate_cost",
+    "priority_order",
+    "schedule_requests",
+]
@@ -1,5 +1,9 @@
-from typing import List
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 import os
+import random
+import re
+import threading
+import time
 
 try:
     import gspread  # type: ignore
@@ -10,41 +14,446 @@ except Exception as e:
     ) from e
 from google.oauth2.service_account import Credentials
 
+from core.sheets_metrics import METRICS
+
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
 
 REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 SERVICE_ACCOUNT_FILE = os.path.join(REPO_ROOT, "credentials.json")
 
 
+_handles_lock = threading.RLock()
+_client_handle = None
+_spreadsheets: Dict[str, gspread.Spreadsheet] = {}
+_worksheets: Dict[Tuple[str, str], gspread.Worksheet] = {}
+_ws_loaded: set = set()
+_backoff_sleep: Optional[Callable[[float], None]] = None
+
+
 def _client():
-    print(f"[Sheets] Using credentials at: {SERVICE_ACCOUNT_FILE}")
-    creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
-    return gspread.authorize(creds)
+    """Process-wide authorized client; the OAuth token is refreshed lazily on expiry."""
+    global _client_handle
+    with _handles_lock:
+        if _client_handle is None:
+            print(f"[Sheets] Using credentials at: {SERVICE_ACCOUNT_FILE}")
+            creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
+            _client_handle = gspread.authorize(creds)
+        return _client_handle
+
+
+def use_client(client, sleep: Optional[Callable[[float], None]] = None) -> None:
+    """Use ``client`` instead of authorizing with credentials.json.
+
+    Meant for tests and offline benchmarks with :mod:`testing.fake_gspread`;
+    cached handles and snapshots from a previous client are dropped.
+    ``sleep`` replaces ``time.sleep`` for retry backoff (e.g. a virtual clock).
+    """
+    global _client_handle, _backoff_sleep
+    with _handles_lock:
+        forget_handles()
+        reset_snapshots()
+        _client_handle = client
+        _backoff_sleep = sleep
 
 
 def open_spreadsheet(sheet_id: str) -> gspread.Spreadsheet:
-    return _client().open_by_key(sheet_id)
+    with _handles_lock:
+        ss = _spreadsheets.get(sheet_id)
+        if ss is None:
+            ss = _spreadsheets[sheet_id] = call_with_backoff(_client().open_by_key, sheet_id)
+        return ss
+
+
+def open_ws(sheet_id: str, title: str, rows: int = 1000, cols: int = 26, create: bool = True) -> gspread.Worksheet:
+    """Return a cached worksheet handle (ids and row/col counts included).
+
+    The first call per spreadsheet loads every tab's metadata in one fetch.
+    Missing tabs are created unless ``create`` is False, in which case
+    ``gspread.WorksheetNotFound`` is raised.
+    """
+    key = (sheet_id, title)
+    with _handles_lock:
+        ws = _worksheets.get(key)
+        if ws is not None:
+            return ws
+        ss = open_spreadsheet(sheet_id)
+        if sheet_id not in _ws_loaded:
+            for w in call_with_backoff(ss.worksheets):
+                _worksheets.setdefault((sheet_id, w.title), w)
+            _ws_loaded.add(sheet_id)
+        ws = _worksheets.get(key)
+        if ws is None:
+            if not create:
+                raise gspread.WorksheetNotFound(title)
+            ws = _worksheets[key] = call_with_backoff(ss.add_worksheet, title=title, rows=rows, cols=cols, tab=title)
+        return ws
 
 
-def open_ws(sheet_id: str, title: str, rows: int = 1000, cols: int = 26) -> gspread.Worksheet:
-    ss = open_spreadsheet(sheet_id)
-    try:
-        ws = ss.worksheet(title)
-    except gspread.WorksheetNotFound:
-        ws = ss.add_worksheet(title=title, rows=rows, cols=cols)
-    return ws
+def forget_handles() -> None:
+    """Drop cached spreadsheet/worksheet handles (e.g. after tabs are renamed)."""
+    with _handles_lock:
+        _spreadsheets.clear()
+        _worksheets.clear()
+        _ws_loaded.clear()
 
 
-def write_header(ws: gspread.Worksheet, header: List[str], header_row: int = 1):
-    ws.clear()
+def write_header(ws: gspread.Worksheet, header: List[str], header_row: int = 1, writer: "SheetWriter" = None):
+    """Clear ``ws`` and write ``header``.
+
+    With ``writer`` both the clear and the header are buffered there, so the
+    tab is only emptied when the writer flushes (clears first, then the header
+    and rows in the same flush).
+    """
     col_count = max(len(header), ws.col_count)
     if ws.col_count < col_count:
-        ws.resize(rows=ws.row_count, cols=col_count)
-    ws.update(f"A{header_row}", [header])
+        call_with_backoff(ws.resize, rows=ws.row_count, cols=col_count, tab=ws.title)
+    if writer is not None:
+        writer.batch_clear([f"A1:{gspread.utils.rowcol_to_a1(ws.row_count, col_count)}"])
+        writer.update(f"A{header_row}", [header])
+        return
+    call_with_backoff(ws.clear, tab=ws.title)
+    invalidate(ws)
+    call_with_backoff(ws.update, f"A{header_row}", [header], tab=ws.title)
 
 
 def clear_below(ws: gspread.Worksheet, start_row: int, last_col_letter: str = "Z"):
     end_row = ws.row_count
     rng = f"A{start_row}:{last_col_letter}{end_row}"
-    ws.spreadsheet.batch_clear([rng])
+    call_with_backoff(ws.spreadsheet.batch_clear, [rng], tab=ws.title)
+    invalidate(ws, start_row, end_row)
+
+
+# ---------------------------------------------------------------------------
+# Shared read snapshot
+# ---------------------------------------------------------------------------
+#
+# Whole-tab values are fetched once per process (several tabs per
+# values.batchGet) and shared by every stage.  Writes invalidate only the rows
+# they touch; the next read re-fetches just those rows.
+
+_snap_lock = threading.Lock()
+_snapshots: Dict[Tuple[str, str], List[List[str]]] = {}
+_stale: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+_snap_stats = {"batch_gets": 0, "ranges": 0}
+
+
+def _quote(title: str) -> str:
+    return "'" + title.replace("'", "''") + "'"
+
+
+def prefetch(spreadsheet: gspread.Spreadsheet, tabs: Sequence[str]) -> int:
+    """Load ``tabs`` (and refresh their stale rows) with one values.batchGet.
+
+    Returns the number of API calls made (0 when everything is cached).
+    """
+
+    sid = spreadsheet.id
+    ranges: List[str] = []
+    plan: List[Tuple[str, Optional[Tuple[int, int]]]] = []
+    with _snap_lock:
+        for tab in dict.fromkeys(tabs):
+            key = (sid, tab)
+            if key not in _snapshots:
+                ranges.append(_quote(tab))
+                plan.append((tab, None))
+                continue
+            for r0, r1 in _stale.get(key, []):
+                ranges.append(f"{_quote(tab)}!{r0}:{r1}")
+                plan.append((tab, (r0, r1)))
+    if not ranges:
+        return 0
+    tabs_label = "+".join(dict.fromkeys(tab for tab, _ in plan))
+    resp = call_with_backoff(spreadsheet.values_batch_get, ranges, tab=tabs_label)
+    value_ranges = resp.get("valueRanges", [])
+    with _snap_lock:
+        _snap_stats["batch_gets"] += 1
+        _snap_stats["ranges"] += len(ranges)
+        for (tab, rows), vr in zip(plan, value_ranges):
+            key = (sid, tab)
+            fetched = vr.get("values", [])
+            if rows is None:
+                _snapshots[key] = [list(r) for r in fetched]
+            elif key in _snapshots:
+                _splice(_snapshots[key], rows, fetched)
+            _stale.pop(key, None)  # every stale range of the tab was in this request
+    return 1
+
+
+def _splice(values: List[List[str]], rows: Tuple[int, int], fetched: List[List[str]]) -> None:
+    r0, r1 = rows
+    if len(values) < r1:
+        values.extend([] for _ in range(r1 - len(values)))
+    block = [list(r) for r in fetched] + [[] for _ in range(r1 - r0 + 1 - len(fetched))]
+    values[r0 - 1 : r1] = block
+    while values and not any(values[-1]):
+        values.pop()
+
+
+def get_values(ws: gspread.Worksheet) -> List[List[str]]:
+    """Cached equivalent of ``ws.get_all_values()`` (a copy; safe to mutate)."""
+
+    key = (ws.spreadsheet_id, ws.title)
+    with _snap_lock:
+        fresh = key in _snapshots and not _stale.get(key)
+    if not fresh:
+        prefetch(ws.spreadsheet, [ws.title])
+    with _snap_lock:
+        values = _snapshots.get(key, [])
+        return gspread.utils.fill_gaps([list(r) for r in values]) if values else []
+
+
+def invalidate(ws: gspread.Worksheet, first_row: Optional[int] = None, last_row: Optional[int] = None) -> None:
+    """Mark rows ``first_row..last_row`` of ``ws`` stale (the whole tab when omitted)."""
+
+    key = (ws.spreadsheet_id, ws.title)
+    with _snap_lock:
+        if key not in _snapshots:
+            return
+        if first_row is None or last_row is None:
+            _snapshots.pop(key, None)
+            _stale.pop(key, None)
+            return
+        _stale.setdefault(key, []).append((first_row, last_row))
+        _stale[key] = _merge_intervals(_stale[key])
+
+
+def _merge_intervals(spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    out: List[Tuple[int, int]] = []
+    for r0, r1 in sorted(spans):
+        if out and r0 <= out[-1][1] + 1:
+            out[-1] = (out[-1][0], max(out[-1][1], r1))
+        else:
+            out.append((r0, r1))
+    return out
+
+
+def reset_snapshots() -> None:
+    """Forget every cached tab (e.g. between polls of a long-running loop)."""
+
+    with _snap_lock:
+        _snapshots.clear()
+        _stale.clear()
+
+
+def snapshot_stats() -> Dict[str, int]:
+    with _snap_lock:
+        return dict(_snap_stats)
+
+
+# values.batchUpdate payloads above this many cells are split across calls
+BATCH_MAX_CELLS = 5000
+# Sheets API statuses worth retrying (per-minute quota and transient errors)
+RETRY_STATUSES = {429, 500, 503}
+
+
+def call_with_backoff(
+    fn: Callable[..., Any],
+    *args: Any,
+    retries: int = 5,
+    backoff: float = 1.0,
+    max_backoff: float = 32.0,
+    op: Optional[str] = None,
+    tab: str = "-",
+    **kwargs: Any,
+) -> Any:
+    """Call a gspread method, retrying 429/5xx ``APIError`` with exponential backoff.
+
+    Each attempt is recorded in :data:`core.sheets_metrics.METRICS` under
+    ``op`` (default: the method name) and ``tab``.
+    """
+
+    op = op or getattr(fn, "__name__", "call")
+    for attempt in range(retries + 1):
+        try:
+            with METRICS.track(op, tab):
+                return fn(*args, **kwargs)
+        except gspread.exceptions.APIError as e:
+            status = getattr(getattr(e, "response", None), "status_code", None) or getattr(e, "code", None)
+            if status not in RETRY_STATUSES or attempt == retries:
+                raise
+            delay = min(backoff * (2 ** attempt), max_backoff) * random.uniform(0.5, 1.5)
+            print(f"[Sheets] HTTP {status}; retry {attempt + 1} in {delay:.1f}s")
+            (_backoff_sleep or time.sleep)(delay)
+    raise RuntimeError("unreachable")  # pragma: no cover
+
+
+def merge_cells(cells: Dict[Tuple[int, int], Any]) -> List[Tuple[int, int, List[List[Any]]]]:
+    """Merge ``{(row, col): value}`` into rectangles ``(top, left, values)``.
+
+    Horizontal runs of adjacent cells are found per row, then runs spanning the
+    same columns on consecutive rows are stacked.  Only the given cells are
+    covered, so writing the rectangles touches exactly the same cells.
+    """
+
+    rows: Dict[int, List[int]] = {}
+    for r, c in cells:
+        rows.setdefault(r, []).append(c)
+    open_blocks: Dict[Tuple[int, int], List[Any]] = {}  # (left, right) -> [top, last_row, values]
+    done: List[Tuple[int, int, List[List[Any]]]] = []
+    for r in sorted(rows):
+        cols = sorted(rows[r])
+        runs: List[Tuple[int, int]] = []
+        start = prev = cols[0]
+        for c in cols[1:]:
+            if c != prev + 1:
+                runs.append((start, prev))
+                start = c
+            prev = c
+        runs.append((start, prev))
+        for span, block in list(open_blocks.items()):
+            if span not in runs or block[1] != r - 1:
+                done.append((block[0], span[0], block[2]))
+                del open_blocks[span]
+        for left, right in runs:
+            values = [cells[(r, c)] for c in range(left, right + 1)]
+            block = open_blocks.get((left, right))
+            if block is None:
+                open_blocks[(left, right)] = [r, r, [values]]
+            else:
+                block[1] = r
+                block[2].append(values)
+    done.extend((block[0], span[0], block[2]) for span, block in open_blocks.items())
+    return sorted(done)
+
+
+class SheetWriter:
+    """Write-behind buffer for one worksheet.
+
+    ``update_cell``/``update``/``batch_clear``/``append_row(s)`` mirror the
+    gspread calls they replace but only record the write.  :meth:`flush` then
+    sends pending clears (one values.batchClear), cell writes merged into
+    rectangles (values.batchUpdate, split every ``max_cells``) and appended
+    rows (one append_rows), in that order, retrying 429s with backoff.  A later
+    write to a cell replaces the pending value; a clear drops pending writes it
+    covers.  Used as a context manager it flushes on exit.
+    """
+
+    def __init__(self, ws: gspread.Worksheet, value_input_option: str = "USER_ENTERED", max_cells: int = BATCH_MAX_CELLS):
+        self.ws = ws
+        self.value_input_option = value_input_option
+        self.max_cells = max(max_cells, 1)
+        self.calls = 0  # API calls made by flush() so far
+        self._cells: Dict[Tuple[int, int], Any] = {}
+        self._clears: List[str] = []
+        self._appends: List[List[Any]] = []
+
+    def __enter__(self) -> "SheetWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.flush()
+            return
+        try:
+            self.flush()
+        except Exception as e:  # keep the original error
+            print(f"[Sheets] Flush after error failed: {e}")
+
+    @property
+    def pending(self) -> int:
+        return len(self._cells) + len(self._clears) + len(self._appends)
+
+    def update_cell(self, row: int, col: int, value: Any) -> None:
+        self._cells[(row, col)] = value
+
+    def update(self, range_name: str, values: Sequence[Sequence[Any]]) -> None:
+        """Buffer a 2-D block whose top-left cell is the start of ``range_name``."""
+
+        top, left = gspread.utils.a1_to_rowcol(range_name.split(":")[0].split("!")[-1])
+        for i, row in enumerate(values):
+            for j, value in enumerate(row):
+                self._cells[(top + i, left + j)] = value
+
+    def batch_clear(self, ranges: Sequence[str]) -> None:
+        for rng in ranges:
+            (r0, c0), (r1, c1) = _bounds(rng, self.ws)
+            self._cells = {
+                (r, c): v for (r, c), v in self._cells.items() if not (r0 <= r <= r1 and c0 <= c <= c1)
+            }
+            self._clears.append(rng)
+
+    def append_row(self, values: Sequence[Any]) -> None:
+        self._appends.append(list(values))
+
+    def append_rows(self, rows: Sequence[Sequence[Any]]) -> None:
+        self._appends.extend(list(r) for r in rows)
+
+    def flush(self) -> int:
+        """Send everything pending; returns the number of API calls made."""
+
+        before = self.calls
+        if self._clears:
+            call_with_backoff(self.ws.batch_clear, self._clears, tab=self.ws.title)
+            self.calls += 1
+            for rng in self._clears:
+                (r0, _), (r1, _) = _bounds(rng, self.ws)
+                invalidate(self.ws, r0, r1)
+            self._clears = []
+        if self._cells:
+            for chunk in self._chunks(merge_cells(self._cells)):
+                call_with_backoff(
+                    self.ws.batch_update, chunk, value_input_option=self.value_input_option,
+                    op="values_batch_update", tab=self.ws.title,
+                )
+                self.calls += 1
+                for item in chunk:
+                    (r0, _), (r1, _) = _bounds(item["range"], self.ws)
+                    invalidate(self.ws, r0, r1)
+            self._cells = {}
+        if self._appends:
+            resp = call_with_backoff(self.ws.append_rows, self._appends, value_input_option=self.value_input_option, tab=self.ws.title)
+            self.calls += 1
+            updated = ((resp or {}).get("updates") or {}).get("updatedRange")
+            if updated:
+                (r0, _), (r1, _) = _bounds(updated, self.ws)
+                invalidate(self.ws, r0, r1)
+            else:
+                invalidate(self.ws)
+            self._appends = []
+        return self.calls - before
+
+    def _chunks(self, blocks: List[Tuple[int, int, List[List[Any]]]]) -> Iterator[List[Dict[str, Any]]]:
+        chunk: List[Dict[str, Any]] = []
+        size = 0
+        for top, left, values in blocks:
+            width = len(values[0])
+            # a block larger than one request is split by rows
+            step = max(self.max_cells // width, 1)
+            for i in range(0, len(values), step):
+                part = values[i : i + step]
+                cells = len(part) * width
+                if chunk and size + cells > self.max_cells:
+                    yield chunk
+                    chunk, size = [], 0
+                chunk.append({"range": _a1(top + i, left, len(part), width), "values": part})
+                size += cells
+        if chunk:
+            yield chunk
+
+
+def _a1(top: int, left: int, height: int, width: int) -> str:
+    start = gspread.utils.rowcol_to_a1(top, left)
+    if height == 1 and width == 1:
+        return start
+    return f"{start}:{gspread.utils.rowcol_to_a1(top + height - 1, left + width - 1)}"
+
+
+def _bounds(rng: str, ws: gspread.Worksheet) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """Return inclusive (row, col) corners of an A1 range such as ``A8:Z`` or ``N8``."""
+
+    first, _, last = rng.split("!")[-1].partition(":")
+    r0, c0 = _rowcol(first, 1, 1)
+    if not last:
+        return (r0, c0), (r0, c0)
+    r1, c1 = _rowcol(last, ws.row_count, ws.col_count)
+    return (r0, c0), (r1, c1)
+
 
+def _rowcol(ref: str, default_row: int, default_col: int) -> Tuple[int, int]:
+    m = re.match(r"^([A-Za-z]*)(\d*)$", ref.strip())
+    if not m:
+        raise ValueError(f"Unsupported range: {ref}")
+    letters, digits = m.groups()
+    row = int(digits) if digits else default_row
+    col = gspread.utils.a1_to_rowcol(f"{letters}1")[1] if letters else default_col
+    return row, col
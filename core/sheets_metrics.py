@@ -0,0 +1,209 @@
+"""Per-run counters and latency histograms for Sheets API calls.
+
+Every call made through :func:`core.sheets.call_with_backoff` is recorded
+under its operation (``values_batch_get``, ``batch_update`` ...) and tab,
+including failed attempts with their HTTP status, so throttling shows up as a
+429 count instead of an opaque gspread exception.  ``hybrid_script`` prints
+:meth:`SheetsMetrics.summary` and writes :meth:`SheetsMetrics.to_dict` as a
+JSON run report.
+
+When ``SHEETS_METRICS_PATH`` is set (the root ``hybrid_script`` does this for
+each stage subprocess) the process dumps its metrics there on exit.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is open.
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_PATH_ENV = "SHEETS_METRICS_PATH"
+
+
+def _status_of(exc: BaseException) -> str:
+    status = getattr(getattr(exc, "response", None), "status_code", None) or getattr(exc, "code", None)
+    return str(status) if status else type(exc).__name__
+
+
+class OpStats:
+    """Call count, failures by status and latency histogram for one (op, tab)."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors: Dict[str, int] = {}
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def add(self, seconds: float, status: Optional[str] = None) -> None:
+        self.calls += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.buckets[next((i for i, b in enumerate(LATENCY_BUCKETS) if seconds <= b), len(LATENCY_BUCKETS))] += 1
+        if status:
+            self.errors[status] = self.errors.get(status, 0) + 1
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        self.calls += data.get("calls", 0)
+        self.total_seconds += data.get("total_seconds", 0.0)
+        self.max_seconds = max(self.max_seconds, data.get("max_seconds", 0.0))
+        for i, n in enumerate(data.get("buckets", [])[: len(self.buckets)]):
+            self.buckets[i] += n
+        for status, n in (data.get("errors") or {}).items():
+            self.errors[status] = self.errors.get(status, 0) + n
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": dict(self.errors),
+            "total_seconds": round(self.total_seconds, 4),
+            "max_seconds": round(self.max_seconds, 4),
+            "buckets": list(self.buckets),
+        }
+
+
+class SheetsMetrics:
+    """Thread-safe registry of :class:`OpStats` keyed by (op, tab)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._ops: Dict[Tuple[str, str], OpStats] = {}
+
+    def record(self, op: str, tab: str, seconds: float, status: Optional[str] = None) -> None:
+        with self._lock:
+            self._ops.setdefault((op, tab or "-"), OpStats()).add(seconds, status)
+
+    @contextmanager
+    def track(self, op: str, tab: str = "-") -> Iterator[None]:
+        """Time the enclosed API call; a raised exception is recorded by status."""
+
+        t0 = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.record(op, tab, time.perf_counter() - t0, _status_of(e))
+            raise
+        self.record(op, tab, time.perf_counter() - t0)
+
+    def total_calls(self) -> int:
+        with self._lock:
+            return sum(s.calls for s in self._ops.values())
+
+    def reset(self) -> None:
+        with self._lock:
+            self._ops.clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            ops = [
+                {"op": op, "tab": tab, **stats.to_dict()}
+                for (op, tab), stats in sorted(self._ops.items())
+            ]
+        return {
+            "latency_buckets": list(LATENCY_BUCKETS),
+            "total_calls": sum(o["calls"] for o in ops),
+            "total_errors": sum(sum(o["errors"].values()) for o in ops),
+            "ops": ops,
+        }
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        """Add a :meth:`to_dict` report (e.g. from a stage subprocess)."""
+
+        with self._lock:
+            for o in data.get("ops", []):
+                self._ops.setdefault((o["op"], o["tab"]), OpStats()).merge(o)
+
+    def summary(self) -> List[str]:
+        data = self.to_dict()
+        lines = [f"Sheets API: {data['total_calls']} calls, {data['total_errors']} failed"]
+        for o in data["ops"]:
+            avg = o["total_seconds"] / o["calls"] if o["calls"] else 0.0
+            errors = ", ".join(f"{k}x{v}" for k, v in sorted(o["errors"].items()))
+            lines.append(
+                f"  {o['op']:<20} {o['tab']:<24} {o['calls']:>4} calls  avg {avg:.2f}s  max {o['max_seconds']:.2f}s"
+                + (f"  errors {errors}" if errors else "")
+            )
+        return lines
+
+
+METRICS = SheetsMetrics()
+
+
+def track(op: str, tab: str = "-"):
+    return METRICS.track(op, tab)
+
+
+def write_json(path: str, data: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=1)
+    os.replace(tmp, path)
+
+
+def load_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def write_run_report(report_dir: str, stages: Optional[Dict[str, Any]] = None) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Write this run's report to ``report_dir``; return its path and the previous report."""
+
+    previous = None
+    if os.path.isdir(report_dir):
+        names = sorted(n for n in os.listdir(report_dir) if n.endswith(".json"))
+        if names:
+            previous = load_json(os.path.join(report_dir, names[-1]))
+    now = time.gmtime()
+    path = os.path.join(report_dir, time.strftime("%Y%m%d-%H%M%S", now) + ".json")
+    report = {"finished_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", now), "sheets": METRICS.to_dict()}
+    if stages:
+        report["stages"] = stages
+    write_json(path, report)
+    return path, previous
+
+
+def finish_run(report_dir: str, stages: Optional[Dict[str, Any]] = None, log=print) -> str:
+    """Print the summary (with the change since the previous run) and write the report."""
+
+    path, previous = write_run_report(report_dir, stages)
+    for line in METRICS.summary():
+        log(line)
+    prev_calls = ((previous or {}).get("sheets") or {}).get("total_calls")
+    if prev_calls is not None:
+        log(f"Previous run: {prev_calls} Sheets API calls ({METRICS.total_calls() - prev_calls:+d}).")
+    log(f"Run report: {path}")
+    return path
+
+
+def _dump_on_exit() -> None:
+    path = os.getenv(METRICS_PATH_ENV)
+    if path and METRICS.total_calls():
+        write_json(path, METRICS.to_dict())
+
+
+atexit.register(_dump_on_exit)
+
+
+__all__ = [
+    "LATENCY_BUCKETS",
+    "METRICS",
+    "METRICS_PATH_ENV",
+    "OpStats",
+    "SheetsMetrics",
+    "finish_run",
+    "load_json",
+    "track",
+    "write_json",
+    "write_run_report",
+]
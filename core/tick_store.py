@@ -0,0 +1,211 @@
+"""Append-only, day-partitioned store of every odds quote we fetch.
+
+Each fetched ``(event, book, market, outcome, point, price)`` quote is kept as
+a tick stamped with ``fetched_at``.  Ticks are buffered in memory and written
+by :meth:`TickStore.flush` as immutable, compressed column chunks (NumPy
+``.npz``) under ``<root>/<YYYY-MM-DD>/``; existing chunks are never rewritten
+except by :meth:`TickStore.compact`, which merges a day's chunks without
+changing their contents.  :meth:`TickStore.snapshot` rebuilds the board as it
+stood at any timestamp.
+"""
+
+from __future__ import annotations
+
+import glob
+import math
+import os
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+COLUMNS = ("event_id", "book", "market", "outcome", "point", "price", "fetched_at")
+# How far back :meth:`TickStore.snapshot` looks for the last quote by default.
+DEFAULT_LOOKBACK = timedelta(days=7)
+
+
+class Tick(NamedTuple):
+    event_id: str
+    book: str
+    market: str
+    outcome: str
+    point: Optional[float]
+    price: float
+    fetched_at: datetime
+
+
+def _ms(ts: datetime) -> int:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp() * 1000)
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(str(value).replace("½", ".5"))
+    except (TypeError, ValueError):
+        return None
+
+
+def ticks_from_payload(payload: Any, fetched_at: Optional[datetime] = None) -> List[Tick]:
+    """Flatten an Odds API odds payload (one event or a league list) into ticks."""
+
+    fetched_at = fetched_at or datetime.now(timezone.utc)
+    events = payload if isinstance(payload, list) else [payload]
+    out: List[Tick] = []
+    for ev in events:
+        if not isinstance(ev, dict) or not ev.get("id"):
+            continue
+        for bk in ev.get("bookmakers", []) or []:
+            for market in bk.get("markets", []) or []:
+                for oc in market.get("outcomes", []) or []:
+                    price = _to_float(oc.get("price"))
+                    if price is None:
+                        continue
+                    name = oc.get("name") or ""
+                    if oc.get("description"):
+                        name = f"{name} {oc['description']}".strip()
+                    out.append(
+                        Tick(
+                            ev["id"],
+                            bk.get("key", ""),
+                            market.get("key", ""),
+                            name,
+                            _to_float(oc.get("point")),
+                            price,
+                            fetched_at,
+                        )
+                    )
+    return out
+
+
+class TickStore:
+    """Buffered writer/reader for the on-disk tick partitions under ``root``."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._buffer: List[Tick] = []
+        self._last_ns = 0
+
+    def add(self, ticks: Iterable[Tick]) -> None:
+        with self._lock:
+            self._buffer.extend(ticks)
+
+    def flush(self) -> int:
+        """Write buffered ticks as one new chunk per day; return the count written."""
+
+        with self._lock:
+            ticks, self._buffer = self._buffer, []
+        by_day: Dict[date, List[Tick]] = {}
+        for t in ticks:
+            by_day.setdefault(t.fetched_at.astimezone(timezone.utc).date(), []).append(t)
+        for day, rows in by_day.items():
+            self._write_chunk(day, _columns(rows))
+        return len(ticks)
+
+    def _write_chunk(self, day: date, cols: Dict[str, np.ndarray], name: Optional[str] = None) -> str:
+        folder = os.path.join(self.root, day.isoformat())
+        os.makedirs(folder, exist_ok=True)
+        if name is None:
+            # chunk names sort in write order, even for flushes within one clock tick
+            with self._lock:
+                self._last_ns = max(time.time_ns(), self._last_ns + 1)
+                name = f"{self._last_ns:020d}-{uuid.uuid4().hex[:8]}"
+        path = os.path.join(folder, f"{name}.npz")
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as fh:
+            np.savez_compressed(fh, **cols)
+        os.replace(tmp, path)
+        return path
+
+    def days(self) -> List[date]:
+        out = []
+        for folder in glob.glob(os.path.join(self.root, "????-??-??")):
+            try:
+                out.append(date.fromisoformat(os.path.basename(folder)))
+            except ValueError:
+                continue
+        return sorted(out)
+
+    def read_day(self, day: date) -> Dict[str, np.ndarray]:
+        """Return one day's ticks as column arrays (in write order)."""
+
+        chunks = sorted(glob.glob(os.path.join(self.root, day.isoformat(), "*.npz")))
+        parts: List[Dict[str, np.ndarray]] = []
+        for path in chunks:
+            with np.load(path, allow_pickle=False) as data:
+                parts.append({c: data[c] for c in COLUMNS})
+        if not parts:
+            return _columns([])
+        return {c: np.concatenate([p[c] for p in parts]) for c in COLUMNS}
+
+    def compact(self, day: date) -> int:
+        """Merge a day's chunks into one file; returns the number of chunks merged."""
+
+        chunks = sorted(glob.glob(os.path.join(self.root, day.isoformat(), "*.npz")))
+        if len(chunks) < 2:
+            return 0
+        cols = self.read_day(day)
+        # sorts after every existing chunk name, so a crash mid-compaction never
+        # reorders ticks; the originals are removed only once it is on disk
+        self._write_chunk(day, cols, name=f"{os.path.basename(chunks[-1])[:-4]}~compacted")
+        for path in chunks:
+            os.remove(path)
+        return len(chunks)
+
+    def snapshot(
+        self,
+        as_of: datetime,
+        event_ids: Optional[Sequence[str]] = None,
+        lookback: timedelta = DEFAULT_LOOKBACK,
+    ) -> List[Tick]:
+        """Latest quote per (event, book, market, outcome, point) at or before ``as_of``."""
+
+        if as_of.tzinfo is None:
+            as_of = as_of.replace(tzinfo=timezone.utc)
+        first = (as_of - lookback).astimezone(timezone.utc).date()
+        last = as_of.astimezone(timezone.utc).date()
+        cutoff = _ms(as_of)
+        wanted = set(event_ids) if event_ids is not None else None
+        latest: Dict[Tuple[str, str, str, str, Optional[float]], Tuple[int, Tick]] = {}
+        for day in self.days():
+            if not (first <= day <= last):
+                continue
+            cols = self.read_day(day)
+            mask = cols["fetched_at"] <= cutoff
+            if wanted is not None:
+                mask &= np.isin(cols["event_id"], list(wanted))
+            for i in np.flatnonzero(mask):
+                point = float(cols["point"][i])
+                point_key = None if math.isnan(point) else point
+                key = (str(cols["event_id"][i]), str(cols["book"][i]), str(cols["market"][i]), str(cols["outcome"][i]), point_key)
+                ts = int(cols["fetched_at"][i])
+                prev = latest.get(key)
+                if prev is None or ts >= prev[0]:
+                    tick = Tick(
+                        *key[:4],
+                        point_key,
+                        float(cols["price"][i]),
+                        datetime.fromtimestamp(ts / 1000, tz=timezone.utc),
+                    )
+                    latest[key] = (ts, tick)
+        return [tick for _, tick in latest.values()]
+
+
+def _columns(ticks: Sequence[Tick]) -> Dict[str, np.ndarray]:
+    return {
+        "event_id": np.array([t.event_id for t in ticks], dtype=str),
+        "book": np.array([t.book for t in ticks], dtype=str),
+        "market": np.array([t.market for t in ticks], dtype=str),
+        "outcome": np.array([t.outcome for t in ticks], dtype=str),
+        "point": np.array([np.nan if t.point is None else t.point for t in ticks], dtype=np.float64),
+        "price": np.array([t.price for t in ticks], dtype=np.float64),
+        "fetched_at": np.array([_ms(t.fetched_at) for t in ticks], dtype=np.int64),
+    }
+
+
+__all__ = ["COLUMNS", "DEFAULT_LOOKBACK", "Tick", "TickStore", "ticks_from_payload"]
@@ -1,15 +1,59 @@
-import subprocess, sys
+import importlib.util, os, subprocess, sys, tempfile
 from pathlib import Path
 from core.logging_utils import info, ok, warn
+from core import sheets_metrics
+import clv_sync
 import config
+import odds_sync
+
+SHEETS_SYNC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Python Project Folder", "google_sheets_sync.py")
+
+
+def _run(stage: str, script: str, check: bool, stages: dict, tmp: str) -> None:
+    """Run a stage subprocess and collect the Sheets metrics it dumps on exit."""
+    path = os.path.join(tmp, f"{stage}.json")
+    env = dict(os.environ, **{sheets_metrics.METRICS_PATH_ENV: path})
+    try:
+        subprocess.run([sys.executable, script], check=check, env=env)
+    finally:
+        data = sheets_metrics.load_json(path)
+        if data:
+            sheets_metrics.METRICS.merge(data)
+            stages[stage] = data
+
+
+def _stage(stage: str, stages: dict, fn, *args) -> None:
+    """Run a sync stage in-process, so it reuses the client and tab snapshots of earlier stages."""
+    before = sheets_metrics.METRICS.total_calls()
+    try:
+        fn(*args)
+    finally:
+        stages[stage] = {"total_calls": sheets_metrics.METRICS.total_calls() - before}
+
+
+def _google_sheets_sync():
+    spec = importlib.util.spec_from_file_location("google_sheets_sync", SHEETS_SYNC_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
 
 
 def main() -> None:
     info("=== Pipeline start ===")
+    stages: dict = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            _pipeline(stages, tmp)
+        finally:
+            sheets_metrics.finish_run(config.RUN_REPORT_DIR, stages, log=info)
+    info("=== Pipeline end ===")
+
+
+def _pipeline(stages: dict, tmp: str) -> None:
     # 1) Pinnacle
     if Path("Pinnacle_Scraper.py").exists():
         try:
-            subprocess.run([sys.executable, "Pinnacle_Scraper.py"], check=True)
+            _run("Pinnacle_Scraper", "Pinnacle_Scraper.py", True, stages, tmp)
             ok("Pinnacle_Scraper")
         except subprocess.CalledProcessError as e:
             warn(f"Pinnacle_Scraper failed: {e}")
@@ -19,7 +63,7 @@ def main() -> None:
     if config.ENABLE_BETONLINE:
         if Path("BetOnline_Scraper.py").exists():
             try:
-                subprocess.run([sys.executable, "BetOnline_Scraper.py"], check=True)
+                _run("BetOnline_Scraper", "BetOnline_Scraper.py", True, stages, tmp)
                 ok("BetOnline_Scraper")
             except subprocess.CalledProcessError as e:
                 warn(f"BetOnline_Scraper failed: {e}")
@@ -27,15 +71,13 @@ def main() -> None:
             warn("BetOnline_Scraper.py not found; skipping BetOnline scrape.")
     else:
         subprocess.run([sys.executable, "import_betonline_csv.py"], check=False)
-    # 3) Sync bets to Sheets
-    subprocess.run([sys.executable, "google_sheets_sync.py"], check=True)
+    # 3) Sync bets to Sheets (sync stages share one process: one batchGet per tab)
+    _stage("google_sheets_sync", stages, _google_sheets_sync().main, [])
     # 4) Odds → Live & Detailed
-    subprocess.run([sys.executable, "odds_sync.py"], check=True)
+    _stage("odds_sync", stages, odds_sync.main, [])
     # 5) CLV → write back
-    subprocess.run([sys.executable, "clv_sync.py"], check=True)
-    info("=== Pipeline end ===")
+    _stage("clv_sync", stages, clv_sync.main, [])
 
 
 if __name__ == "__main__":
     main()
-
@@ -1,10 +1,17 @@
+import argparse
 import re
 import sys
 import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import List, Tuple
-import requests
-from core import sheets
+from typing import Dict, List, Optional, Set, Tuple
+from core import event_index, http_session, odds_api, sheets
+from core.closing_lines import CaptureQueue, ClosingStore, parse_commence
+from core.fetch_pool import map_ordered
+from core.http_cache import ResponseCache
+from core.odds_planner import EventRequest, line_offered, plan_event_requests
+from core.odds_quota import QuotaTracker, schedule_requests
+from core.tick_store import TickStore
 import config
 
 ROOT = Path(__file__).resolve().parent
@@ -16,16 +23,24 @@ def _norm_team(name: str) -> str:
     s = s.replace("Â½", "½")
     return s
 
-def refresh_live_odds():
+def refresh_live_odds() -> Dict[str, dict]:
+    """Write the Live Odds tab and return the league feeds keyed by event id.
+
+    The returned events carry full h2h/spreads/totals bookmaker data, which
+    bulk mode uses to build Detailed Odds rows without per-event calls.
+    """
     ws_live = sheets.open_ws(config.GOOGLE_SHEET_ID, config.LIVE_ODDS_TAB)
     header = ["League", "Event ID", "Event/Match", "Commence Time", "Bookmaker Count"]
-    sheets.write_header(ws_live, header, header_row=1)
+    writer = sheets.SheetWriter(ws_live)
+    sheets.write_header(ws_live, header, header_row=1, writer=writer)
     rows: List[List[str]] = []
+    seen: List[Tuple[str, str, str]] = []
+    bulk: Dict[str, dict] = {}
     for league in config.LEAGUES:
         url = f"https://api.the-odds-api.com/v4/sports/{league}/odds"
-        params = {"apiKey": config.ODDS_API_KEY, "regions": config.ODDS_REGIONS, "oddsFormat": config.ODDS_FORMAT, "markets": "h2h,spreads,totals"}
+        params = {"apiKey": config.ODDS_API_KEY, **odds_api.book_params(), "oddsFormat": config.ODDS_FORMAT, "markets": "h2h,spreads,totals"}
         try:
-            r = requests.get(url, params=params, timeout=20)
+            r = odds_api.get(url, params=params, timeout=20)
         except Exception as e:
             print(f"[ERROR] Live odds request failed for {league}: {e}")
             continue
@@ -37,9 +52,15 @@ def refresh_live_odds():
             away = _norm_team(ev.get("away_team", ""))
             matchup = f"{home} vs {away}" if (home and away) else (ev.get("sport_title") or "")
             rows.append([league, ev.get("id",""), matchup, ev.get("commence_time",""), len(ev.get("bookmakers", []))])
+            seen.append((league, ev.get("id",""), ev.get("commence_time","")))
+            if ev.get("id"):
+                bulk[ev["id"]] = ev
+    event_index.update_index(seen, config.EVENT_INDEX_PATH)
     if rows:
-        ws_live.update("A2", rows, value_input_option="USER_ENTERED")
+        writer.update("A2", rows)
+    writer.flush()  # header and rows go out as one batchUpdate
     print(f"[Live Odds] Wrote {len(rows)} events across {len(config.LEAGUES)} leagues.")
+    return bulk
 
 def _user_market_and_label(api_market: str, outcome: dict) -> Tuple[str,str,str]:
     key = (api_market or "").lower().strip()
@@ -58,28 +79,33 @@ def _user_market_and_label(api_market: str, outcome: dict) -> Tuple[str,str,str]
         return "spreads", nm, p.replace("Â½","½")
     return "h2h", _norm_team(name), ""
 
-def _fetch_event_odds(event_id: str, user_market: str, user_selection: str, league: str) -> List[List[str]]:
+def _market_family(user_market: str) -> Optional[str]:
     m = user_market.lower()
     if m.startswith("spread"):
-        mkts = "spreads,alternate_spreads"
-    elif m.startswith("total"):
-        mkts = "totals,alternate_totals"
-    elif m in ("h2h","moneyline","ml"):
-        mkts = "h2h"
-    else:
-        return []
+        return "spreads"
+    if m.startswith("total"):
+        return "totals"
+    if m in ("h2h","moneyline","ml"):
+        return "h2h"
+    return None
+
+def _fetch_event_odds(event_id: str, league: str, markets: str) -> Optional[dict]:
     url = f"https://api.the-odds-api.com/v4/sports/{league}/events/{event_id}/odds"
-    params = {"apiKey": config.ODDS_API_KEY, "regions": config.ODDS_REGIONS, "oddsFormat": config.ODDS_FORMAT, "markets": mkts}
+    params = {"apiKey": config.ODDS_API_KEY, **odds_api.book_params(), "oddsFormat": config.ODDS_FORMAT, "markets": markets}
     try:
-        r = requests.get(url, params=params, timeout=25)
+        r = odds_api.get(url, params=params, timeout=config.ODDS_REQUEST_TIMEOUT)
     except Exception as e:
         print(f"[ERROR] Event odds failed {event_id}: {e}")
-        return []
+        return None
     if r.status_code != 200:
         print(f"[WARN] Event odds {event_id} ({league}) HTTP {r.status_code}: {r.text[:200]}")
-        return []
+        return None
+    return r.json()
+
+def _rows_from_payload(payload: dict, event_id: str, user_market: str, user_selection: str) -> List[List[str]]:
+    base = _market_family(user_market)
     rows: List[List[str]] = []
-    for bk in r.json().get("bookmakers", []):
+    for bk in payload.get("bookmakers", []):
         if bk.get("key") not in config.ALLOWED_BOOKS:
             continue
         bkname = bk.get("title") or bk.get("key")
@@ -87,42 +113,248 @@ def _fetch_event_odds(event_id: str, user_market: str, user_selection: str, leag
             api_key = market.get("key","")
             for oc in market.get("outcomes", []):
                 user_mkt, name_norm, point_str = _user_market_and_label(api_key, oc)
-                base = "h2h" if m in ("h2h","ml","moneyline") else ("spreads" if m.startswith("spread") else "totals")
                 if user_mkt != base:
                     continue
                 odds = str(oc.get("price",""))
                 rows.append([event_id, user_mkt, user_selection, bkname, api_key, name_norm, str(point_str), odds])
     return rows
 
-def refresh_detailed_odds_from_bets():
+def refresh_detailed_odds_from_bets(bulk: Optional[Dict[str, dict]] = None):
     ws_bets = sheets.open_ws(config.GOOGLE_SHEET_ID, config.BET_SHEET_TAB)
-    event_ids = ws_bets.col_values(3)[config.BET_FIRST_DATA_ROW - 1:]  # C
-    markets   = ws_bets.col_values(6)[config.BET_FIRST_DATA_ROW - 1:]  # F
-    bets      = ws_bets.col_values(9)[config.BET_FIRST_DATA_ROW - 1:]  # I
-    reqs = [(e.strip(), m.strip(), b.strip()) for e,m,b in zip(event_ids, markets, bets) if e and m and b]
+    values = [r + [""] * (9 - len(r)) for r in sheets.get_values(ws_bets)[config.BET_FIRST_DATA_ROW - 1:]]
+    # Event ID (C), Market (F), Bet (I)
+    reqs = [(r[2].strip(), r[5].strip(), r[8].strip()) for r in values if r[2] and r[5] and r[8]]
 
     ws_det = sheets.open_ws(config.GOOGLE_SHEET_ID, config.DETAILED_ODDS_TAB)
     header = ["Event ID","User Market","User Bet Selection","Bookmaker","API Market","Outcome Name (Normalized)","Outcome Point","Odds"]
-    sheets.write_header(ws_det, header, header_row=1)
-
-    all_rows: List[List[str]] = []
-    for idx, (eid, mkt, sel) in enumerate(reqs, 1):
-        for league in config.LEAGUES:
-            rows = _fetch_event_odds(eid, mkt, sel, league)
-            if rows:
-                all_rows.extend(rows)
-                break
-        if idx % 10 == 0:
-            time.sleep(0.5)
+    writer = sheets.SheetWriter(ws_det)
+    sheets.write_header(ws_det, header, header_row=1, writer=writer)
+
+    per_bet: List[List[List[str]]] = [[] for _ in reqs]
+    need = list(range(len(reqs)))
+    if bulk:
+        # bulk mode: main markets come from the league feed; only bets whose
+        # line isn't a main line still need the event's alternates
+        need = []
+        for i, (eid, mkt, sel) in enumerate(reqs):
+            ev = bulk.get(eid)
+            if ev is None:
+                need.append(i)
+                continue
+            per_bet[i] = _rows_from_payload(ev, eid, mkt, sel)
+            if _market_family(mkt) in ("spreads", "totals") and not line_offered(sel, per_bet[i]):
+                need.append(i)
+
+    index = event_index.load_index(config.EVENT_INDEX_PATH)
+    plans = plan_event_requests([reqs[i] for i in need], _market_family)
+    for plan in plans:
+        plan.bets = [need[j] for j in plan.bets]
+        plan.alternates_only = bool(bulk) and plan.event_id in bulk
+    # soonest-starting events first; alternates dropped before mains when credits run low
+    tracker = odds_api.quota()
+    commence = {eid: entry.get("commence_time", "") for eid, entry in index.items()}
+    plans, notes = schedule_requests(
+        plans,
+        commence,
+        tracker.remaining if tracker else None,
+        odds_api.billing_regions(),
+        reserve=config.ODDS_QUOTA_RESERVE,
+        alt_threshold=config.ODDS_QUOTA_ALT_THRESHOLD,
+    )
+    for note in notes:
+        print(f"[Quota] {note}")
+    plans = [p for p in plans if p.markets]
+
+    def _fetch(plan: EventRequest) -> Optional[dict]:
+        for league in event_index.leagues_for(plan.event_id, index, config.LEAGUES):
+            payload = _fetch_event_odds(plan.event_id, league, plan.markets)
+            if payload is not None:
+                return payload
+        return None
+
+    # one call per event, fanned back out to each bet in Bets-tab order
+    payloads = map_ordered(_fetch, plans, max_workers=config.ODDS_MAX_CONCURRENCY)
+    for plan, payload in zip(plans, payloads):
+        if not payload:
+            continue
+        for i in plan.bets:
+            eid, mkt, sel = reqs[i]
+            per_bet[i].extend(_rows_from_payload(payload, eid, mkt, sel))
+    all_rows: List[List[str]] = [row for rows in per_bet for row in rows]
     if all_rows:
-        ws_det.update("A2", all_rows, value_input_option="USER_ENTERED")
-    print(f"[Detailed Odds] Wrote {len(all_rows)} rows for {len(reqs)} bets.")
+        writer.update("A2", all_rows)
+    writer.flush()
+    from_feed = len(reqs) - len(need) if bulk else 0
+    print(
+        f"[Detailed Odds] Wrote {len(all_rows)} rows for {len(reqs)} bets "
+        f"({len(plans)} event requests, {from_feed} bets served from the league feed)."
+    )
+
+def _pending_bet_events() -> Tuple[Dict[str, List[Tuple[str, str, str]]], Dict[str, Tuple[str, datetime]]]:
+    """Return pending bets grouped by event and each event's (league, start).
+
+    Start times come from the Live Odds tab, falling back to the event index
+    for events that have dropped off the live feed.
+    """
+    ws_bets = sheets.open_ws(config.GOOGLE_SHEET_ID, config.BET_SHEET_TAB)
+    ws_live = sheets.open_ws(config.GOOGLE_SHEET_ID, config.LIVE_ODDS_TAB)
+    sheets.reset_snapshots()  # each poll must see the current tabs
+    sheets.prefetch(ws_bets.spreadsheet, [config.BET_SHEET_TAB, config.LIVE_ODDS_TAB])
+    bet_values = sheets.get_values(ws_bets)
+    header = bet_values[config.BET_HEADER_ROW - 1] if len(bet_values) >= config.BET_HEADER_ROW else []
+    if not all(h in header for h in ("Event ID", "Market", "Bet", "Result")):
+        print("[WARN] Bets tab is missing Event ID / Market / Bet / Result columns.")
+        return {}, {}
+    c_eid, c_mkt, c_bet, c_res = (header.index(h) for h in ("Event ID", "Market", "Bet", "Result"))
+    bets: Dict[str, List[Tuple[str, str, str]]] = {}
+    for row in bet_values[config.BET_FIRST_DATA_ROW - 1:]:
+        row = [c.strip() for c in row] + [""] * (len(header) - len(row))
+        if row[c_res].lower() not in ("", "pending"):
+            continue
+        eid, mkt, sel = row[c_eid], row[c_mkt], row[c_bet]
+        if eid and mkt and sel and _market_family(mkt):
+            bets.setdefault(eid, []).append((eid, mkt, sel))
+
+    live = {r[1]: (r[0], r[3]) for r in sheets.get_values(ws_live)[1:] if len(r) > 3 and r[1]}
+    index = event_index.load_index(config.EVENT_INDEX_PATH)
+    starts: Dict[str, Tuple[str, datetime]] = {}
+    for eid in bets:
+        league, commence = live.get(eid, ("", ""))
+        start = parse_commence(commence)
+        if start is None and eid in index:
+            league = league or index[eid].get("league", "")
+            start = parse_commence(index[eid].get("commence_time", ""))
+        if start is not None:
+            starts[eid] = (league, start)
+    return bets, starts
+
+def _closing_keys(bets: List[Tuple[str, str, str]]) -> List[Tuple[str, str]]:
+    """(User Market, User Bet Selection) as written to Detailed Odds rows."""
+    return [(_market_family(mkt) or "", sel.strip()) for _eid, mkt, sel in bets]
+
+def capture_closing_line(event_id: str, bets: List[Tuple[str, str, str]], league: str, start: datetime, store: ClosingStore) -> int:
+    """Fetch one event's odds for its pending bets and store them as the closing line."""
+    plans = plan_event_requests(bets, _market_family)
+    if not plans or not plans[0].markets:
+        return 0
+    index = event_index.load_index(config.EVENT_INDEX_PATH)
+    leagues = [league] if league else []
+    leagues += [lg for lg in event_index.leagues_for(event_id, index, config.LEAGUES) if lg not in leagues]
+    payload = None
+    for lg in leagues:
+        payload = _fetch_event_odds(event_id, lg, plans[0].markets)
+        if payload is not None:
+            break
+    if payload is None:
+        return 0
+    rows = [row for eid, mkt, sel in bets for row in _rows_from_payload(payload, eid, mkt, sel)]
+    store.save(event_id, rows, start.isoformat(), bets=_closing_keys(bets))
+    return len(rows)
+
+def _requeue(
+    queue: CaptureQueue,
+    bets: Dict[str, List[Tuple[str, str, str]]],
+    starts: Dict[str, Tuple[str, datetime]],
+    covered: Dict[str, Set[Tuple[str, str]]],
+    now: datetime,
+) -> None:
+    """Queue every upcoming event with a pending bet its snapshot does not cover."""
+    for eid in queue.events():
+        if eid not in starts:
+            queue.discard(eid)
+    for eid, (_league, start) in starts.items():
+        done = eid in covered and set(_closing_keys(bets.get(eid, []))) <= covered[eid]
+        if done or start <= now:
+            queue.discard(eid)
+        else:
+            queue.add(eid, start)
+
+def run_closing_scheduler(tracker: QuotaTracker) -> None:
+    """Capture each pending-bet event's odds CLOSING_LEAD_MINUTES before it starts.
 
-def main():
+    Runs until interrupted.  Bets and start times are re-read every
+    CLOSING_POLL_SECONDS so new bets and rescheduled games are picked up; an
+    already captured event is captured again (before its start) when a pending
+    bet on it is missing from the snapshot.
+    """
+    store = ClosingStore(config.CLOSING_LINES_PATH)
+    queue = CaptureQueue(timedelta(minutes=config.CLOSING_LEAD_MINUTES))
+    bets: Dict[str, List[Tuple[str, str, str]]] = {}
+    starts: Dict[str, Tuple[str, datetime]] = {}
+    next_poll = datetime.now(timezone.utc)
+    print(f"[Closing] Scheduler started (capture {config.CLOSING_LEAD_MINUTES:g} min before start).")
+    while True:
+        now = datetime.now(timezone.utc)
+        if now >= next_poll:
+            try:
+                bets, starts = _pending_bet_events()
+            except Exception as e:
+                print(f"[ERROR] Reading pending bets failed: {e}")
+            _requeue(queue, bets, starts, store.covered(), now)
+            next_poll = now + timedelta(seconds=config.CLOSING_POLL_SECONDS)
+            nxt = queue.next_at()
+            print(f"[Closing] {len(queue)} events queued; next capture {nxt.isoformat() if nxt else 'n/a'}.")
+        for eid in queue.pop_due(now):
+            league, start = starts[eid]
+            n = capture_closing_line(eid, bets.get(eid, []), league, start, store)
+            tracker.save()
+            odds_api.flush_ticks()
+            print(f"[Closing] {eid}: stored {n} rows ({start.isoformat()} start; {tracker.summary()}).")
+        wake = min(t for t in (queue.next_at(), next_poll) if t is not None)
+        time.sleep(max(1.0, (wake - datetime.now(timezone.utc)).total_seconds()))
+
+def _parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Refresh the Live Odds and Detailed Odds tabs from The Odds API.")
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--no-cache", action="store_true", help="bypass the local Odds API response cache")
+    mode.add_argument("--cache-only", action="store_true", help="serve cached responses only; never call the API")
+    ap.add_argument("--bulk", action="store_true", help="build main-market Detailed Odds from the league feeds (see ODDS_BULK_MODE)")
+    ap.add_argument("--closing-lines", action="store_true", help="run until interrupted, capturing closing lines shortly before each pending bet's start")
+    return ap.parse_args(argv)
+
+def _configure_cache(args) -> None:
+    if args.no_cache or not config.ODDS_CACHE_ENABLED:
+        odds_api.configure_cache(None)
+        return
+    cache = ResponseCache(config.ODDS_CACHE_PATH, max_bytes=config.ODDS_CACHE_MAX_MB * 1024 * 1024)
+    odds_api.configure_cache(cache, cache_only=args.cache_only, ttls=config.ODDS_CACHE_TTLS)
+
+def _configure_quota() -> QuotaTracker:
+    tracker = QuotaTracker(config.ODDS_QUOTA_PATH)
+    odds_api.configure_quota(tracker, floor=config.ODDS_QUOTA_RESERVE)
+    return tracker
+
+def _configure_ticks() -> None:
+    odds_api.configure_ticks(TickStore(config.ODDS_TICKS_DIR) if config.ODDS_TICKS_ENABLED else None)
+
+def main(argv=None):
+    args = _parse_args(argv)
+    _configure_cache(args)
+    tracker = _configure_quota()
+    _configure_ticks()
+    odds_api.configure_books(config.ALLOWED_BOOKS, config.ODDS_REGIONS, prefer_bookmakers=config.ODDS_USE_BOOKMAKERS)
+    http_session.configure(
+        pool_size=config.ODDS_MAX_CONCURRENCY,
+        retries=config.HTTP_MAX_RETRIES,
+        backoff=config.HTTP_BACKOFF_BASE,
+    )
+    if args.closing_lines:
+        odds_api.configure_cache(None)  # a closing line must never be a cached response
+        try:
+            run_closing_scheduler(tracker)
+        except KeyboardInterrupt:
+            print(f"[Closing] Stopped ({tracker.summary()}).")
+        tracker.save()
+        odds_api.flush_ticks()
+        return
     print("Odds sync starting...")
-    refresh_live_odds()
-    refresh_detailed_odds_from_bets()
-    print("Odds sync completed.")
+    bulk = refresh_live_odds()
+    refresh_detailed_odds_from_bets(bulk if (args.bulk or config.ODDS_BULK_MODE) else None)
+    tracker.save()
+    print(f"[Ticks] Recorded {odds_api.flush_ticks()} quotes.")
+    print(f"[HTTP] {http_session.summary()}")
+    print(f"[Payload] {odds_api.payload_report(config.ODDS_PAYLOAD_BASELINE_PATH)}")
+    print(f"Odds sync completed ({odds_api.cache_stats()}; {tracker.summary()}).")
 
 if __name__ == "__main__":
     main()
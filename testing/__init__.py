@@ -0,0 +1 @@
+"""Test doubles shared by ``tests/`` and ``benchmarks/``; not used by the sync scripts."""
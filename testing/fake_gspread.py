@@ -0,0 +1,527 @@
+"""In-memory stand-in for the subset of gspread this repo uses.
+
+:class:`FakeClient` / :class:`FakeSpreadsheet` / :class:`FakeWorksheet` keep
+cell values in plain lists and implement the calls made by ``core.sheets``,
+``google_sheets_sync``, ``odds_sync``, ``clv_sync`` and the scrapers.  A shared
+:class:`FakeBackend` counts every call, adds a configurable per-call latency
+and enforces per-minute read/write quotas by raising the same
+``gspread.exceptions.APIError`` (HTTP 429) the real API produces, so sync code
+can be benchmarked offline and call-count regressions asserted in tests::
+
+    backend = FakeBackend(latency=0.2, clock=VirtualClock())
+    client = FakeClient(backend)
+    client.create("sheet-id").add_tab("Bets", rows=100, cols=20).load(values)
+    sheets.use_client(client)
+
+Values are stored as the strings the API would return for ``USER_ENTERED``
+input (formulas are kept as their text).  Range handling covers the A1 forms
+used here: ``A1``, ``A1:C3``, ``A8:Z``, ``8:20`` and bare tab names.
+"""
+
+from __future__ import annotations
+
+import collections
+import re
+import time
+from types import SimpleNamespace
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+import gspread
+from gspread.cell import Cell
+from gspread.utils import a1_to_rowcol, rowcol_to_a1
+
+READ_METHODS = {
+    "open_by_key", "worksheets", "worksheet", "get_all_values", "col_values", "row_values", "cell", "values_batch_get",
+}
+
+
+class VirtualClock:
+    """Simulated time: ``sleep`` advances ``time`` instantly."""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += max(seconds, 0.0)
+
+
+class _RealClock:
+    def time(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+
+def api_error(status: int, message: str) -> gspread.exceptions.APIError:
+    body = {"error": {"code": status, "message": message, "status": message}}
+    response = SimpleNamespace(status_code=status, text=message, json=lambda: body)
+    return gspread.exceptions.APIError(response)
+
+
+class FakeBackend:
+    """Shared call log, latency and quota state for one fake client."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        read_quota: Optional[int] = None,
+        write_quota: Optional[int] = None,
+        window: float = 60.0,
+        clock: Any = None,
+    ):
+        self.latency = latency
+        self.quotas = {"read": read_quota, "write": write_quota}
+        self.window = window
+        self.clock = clock or _RealClock()
+        self.calls: collections.Counter = collections.Counter()
+        self.log: List[Tuple[str, str]] = []
+        self.throttled = 0
+        self._recent: Dict[str, Deque[float]] = {"read": collections.deque(), "write": collections.deque()}
+
+    def call(self, method: str, tab: str = "-") -> None:
+        """Account for one API request (raises 429 when over quota)."""
+
+        kind = "read" if method in READ_METHODS else "write"
+        now = self.clock.time()
+        recent = self._recent[kind]
+        while recent and recent[0] <= now - self.window:
+            recent.popleft()
+        limit = self.quotas[kind]
+        if limit is not None and len(recent) >= limit:
+            self.throttled += 1
+            raise api_error(429, f"Quota exceeded for quota metric '{kind.title()} requests'")
+        recent.append(now)
+        self.calls[method] += 1
+        self.log.append((method, tab))
+        if self.latency:
+            self.clock.sleep(self.latency)
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def reset_counts(self) -> None:
+        self.calls.clear()
+        self.log.clear()
+        self.throttled = 0
+
+
+class FakeClient:
+    def __init__(self, backend: Optional[FakeBackend] = None):
+        self.backend = backend or FakeBackend()
+        self._spreadsheets: Dict[str, FakeSpreadsheet] = {}
+
+    def create(self, key: str) -> "FakeSpreadsheet":
+        """Add an empty spreadsheet (setup only; not counted as a call)."""
+
+        ss = self._spreadsheets[key] = FakeSpreadsheet(self, key)
+        return ss
+
+    def open_by_key(self, key: str) -> "FakeSpreadsheet":
+        self.backend.call("open_by_key")
+        if key not in self._spreadsheets:
+            raise gspread.SpreadsheetNotFound(key)
+        return self._spreadsheets[key]
+
+
+class FakeSpreadsheet:
+    def __init__(self, client: FakeClient, key: str):
+        self.client = client
+        self.id = key
+        self._sheets: List[FakeWorksheet] = []
+        self._next_id = 0
+
+    @property
+    def backend(self) -> FakeBackend:
+        return self.client.backend
+
+    # -- setup helpers (not counted) ---------------------------------------
+
+    def tab(self, title: str) -> "FakeWorksheet":
+        for ws in self._sheets:
+            if ws.title == title:
+                return ws
+        raise gspread.WorksheetNotFound(title)
+
+    def add_tab(self, title: str, rows: int = 1000, cols: int = 26) -> "FakeWorksheet":
+        """:meth:`add_worksheet` without the API call, for test and benchmark setup."""
+
+        ws = FakeWorksheet(self, title, self._next_id, rows, cols)
+        self._next_id += 1
+        self._sheets.append(ws)
+        return ws
+
+    # -- gspread API -------------------------------------------------------
+
+    def worksheets(self) -> List["FakeWorksheet"]:
+        self.backend.call("worksheets")
+        return list(self._sheets)
+
+    def worksheet(self, title: str) -> "FakeWorksheet":
+        self.backend.call("worksheet", title)
+        return self.tab(title)
+
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26, index: Optional[int] = None) -> "FakeWorksheet":
+        self.backend.call("add_worksheet", title)
+        if any(ws.title == title for ws in self._sheets):
+            raise api_error(400, f"A sheet with the name \"{title}\" already exists.")
+        return self.add_tab(title, int(rows), int(cols))
+
+    def values_batch_get(self, ranges: Sequence[str], params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        self.backend.call("values_batch_get", "+".join(dict.fromkeys(self._split(r)[0].title for r in ranges)))
+        out = []
+        for rng in ranges:
+            ws, a1 = self._split(rng)
+            (r0, c0), (r1, c1) = ws._bounds(a1)
+            out.append({"range": rng, "majorDimension": "ROWS", "values": ws._read(r0, c0, r1, c1)})
+        return {"spreadsheetId": self.id, "valueRanges": out}
+
+    def batch_clear(self, ranges: Sequence[str]) -> Dict[str, Any]:
+        self.backend.call("batch_clear", "+".join(dict.fromkeys(self._split(r)[0].title for r in ranges)))
+        for rng in ranges:
+            ws, a1 = self._split(rng)
+            ws._clear_range(a1)
+        return {}
+
+    def batch_update(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        ids = [next(iter(r.values()), {}) for r in body.get("requests", [])]
+        ids = [(spec.get("range") or spec.get("destination") or {}).get("sheetId") for spec in ids]
+        titles = [ws.title for ws in self._sheets if ws.id in ids]
+        self.backend.call("batch_update", "+".join(titles) or "-")
+        requests = body.get("requests", [])
+        # the API validates the whole batch before applying any of it
+        for i, req in enumerate(requests):
+            kind = next(iter(req), "")
+            if kind not in ("sortRange", "copyPaste"):
+                raise api_error(400, f"Invalid requests[{i}]: unsupported request {kind!r}")
+        for req in requests:
+            if "sortRange" in req:
+                self._sort_range(req["sortRange"])
+            else:
+                self._copy_paste(req["copyPaste"])
+        return {"spreadsheetId": self.id, "replies": [{} for _ in requests]}
+
+    # -- internals ---------------------------------------------------------
+
+    def _by_id(self, sheet_id: int) -> "FakeWorksheet":
+        for ws in self._sheets:
+            if ws.id == sheet_id:
+                return ws
+        raise api_error(400, f"No grid with id: {sheet_id}")
+
+    def _split(self, rng: str) -> Tuple["FakeWorksheet", str]:
+        """Resolve ``'Tab'!A1:B2`` (no tab: the first sheet, as the API does)."""
+
+        if "!" in rng:
+            tab, a1 = rng.rsplit("!", 1)
+        elif rng.startswith("'") or any(ws.title == rng for ws in self._sheets) or not _looks_like_a1(rng):
+            tab, a1 = rng, ""
+        else:
+            return self._sheets[0], rng
+        if tab.startswith("'") and tab.endswith("'"):
+            tab = tab[1:-1].replace("''", "'")
+        try:
+            return self.tab(tab), a1
+        except gspread.WorksheetNotFound:
+            raise api_error(400, f"Unable to parse range: {rng}") from None
+
+    def _sort_range(self, spec: Dict[str, Any]) -> None:
+        grid = spec["range"]
+        ws = self._by_id(grid.get("sheetId", 0))
+        r0, r1 = grid.get("startRowIndex", 0), grid.get("endRowIndex", ws.row_count)
+        c0, c1 = grid.get("startColumnIndex", 0), grid.get("endColumnIndex", ws.col_count)
+        block = [(r, ws._cells[r][c0:c1]) for r in range(r0, r1)]
+        for sort in reversed(spec.get("sortSpecs", [])):
+            j = sort.get("dimensionIndex", 0) - c0
+            blanks = [item for item in block if not item[1][j].strip()]
+            filled = [item for item in block if item[1][j].strip()]
+            filled.sort(key=lambda item: _sort_value(item[1][j]), reverse=sort.get("sortOrder") == "DESCENDING")
+            block = filled + blanks  # blanks stay last in either order
+        for i, (old, row) in enumerate(block):
+            # formulas move with their row, like a paste shifted by the row offset
+            ws._cells[r0 + i][c0:c1] = [_shift_refs(v, r0 + i - old, 0) for v in row]
+
+    def _copy_paste(self, spec: Dict[str, Any]) -> None:
+        src, dst = spec["source"], spec["destination"]
+        sws, dws = self._by_id(src.get("sheetId", 0)), self._by_id(dst.get("sheetId", 0))
+        s_r0, s_c0 = src.get("startRowIndex", 0), src.get("startColumnIndex", 0)
+        s_h = src.get("endRowIndex", s_r0 + 1) - s_r0
+        s_w = src.get("endColumnIndex", s_c0 + 1) - s_c0
+        for r in range(dst.get("startRowIndex", 0), dst.get("endRowIndex", dws.row_count)):
+            for c in range(dst.get("startColumnIndex", 0), dst.get("endColumnIndex", dws.col_count)):
+                sr, sc = s_r0 + (r - s_r0) % s_h, s_c0 + (c - s_c0) % s_w
+                dws._cells[r][c] = _shift_refs(sws._cells[sr][sc], r - sr, c - sc)
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet: FakeSpreadsheet, title: str, sheet_id: int, rows: int, cols: int):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.id = sheet_id
+        self._cells: List[List[str]] = [[""] * cols for _ in range(rows)]
+
+    # -- properties gspread exposes ----------------------------------------
+
+    @property
+    def spreadsheet_id(self) -> str:
+        return self.spreadsheet.id
+
+    @property
+    def row_count(self) -> int:
+        return len(self._cells)
+
+    @property
+    def col_count(self) -> int:
+        return len(self._cells[0]) if self._cells else 0
+
+    def _call(self, method: str) -> None:
+        self.spreadsheet.backend.call(method, self.title)
+
+    # -- setup helpers (not counted) ---------------------------------------
+
+    def load(self, values: Sequence[Sequence[Any]], top: int = 1) -> "FakeWorksheet":
+        """Write ``values`` starting at row ``top`` (growing the grid as needed)."""
+
+        width = max((len(r) for r in values), default=0)
+        self._grow(top + len(values) - 1, width)
+        self._write(top, 1, values)
+        return self
+
+    def values(self) -> List[List[str]]:
+        """Trimmed cell values, as ``values_batch_get`` would return them."""
+
+        return self._read(1, 1, self.row_count, self.col_count)
+
+    # -- reads -------------------------------------------------------------
+
+    def get_all_values(self, **kwargs: Any) -> List[List[str]]:
+        self._call("get_all_values")
+        rows = self.values()
+        width = max((len(r) for r in rows), default=0)
+        return [r + [""] * (width - len(r)) for r in rows]
+
+    def row_values(self, row: int, **kwargs: Any) -> List[str]:
+        self._call("row_values")
+        got = self._read(row, 1, row, self.col_count)
+        return got[0] if got else []
+
+    def col_values(self, col: int, **kwargs: Any) -> List[str]:
+        self._call("col_values")
+        return [r[0] if r else "" for r in self._read(1, col, self.row_count, col)]
+
+    def cell(self, row: int, col: int, **kwargs: Any) -> Cell:
+        self._call("cell")
+        self._check(row, col)
+        return Cell(row, col, self._cells[row - 1][col - 1])
+
+    # -- writes ------------------------------------------------------------
+
+    def update(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        """``update(range, values)`` or gspread 6's ``update(values, range_name)``."""
+
+        self._call("update")
+        values = kwargs.pop("values", None)
+        range_name = kwargs.pop("range_name", None)
+        for arg in args:
+            if isinstance(arg, str) and range_name is None:
+                range_name = arg
+            elif values is None:
+                values = arg
+        (r0, c0), _ = self._bounds(range_name or "A1")
+        values = values or []
+        self._write(r0, c0, values)
+        return {"updatedRange": self._a1(r0, c0, len(values), max((len(v) for v in values), default=1))}
+
+    def update_cell(self, row: int, col: int, value: Any) -> Dict[str, Any]:
+        self._call("update_cell")
+        self._write(row, col, [[value]])
+        return {"updatedRange": self._a1(row, col, 1, 1)}
+
+    def batch_update(self, data: Sequence[Dict[str, Any]], **kwargs: Any) -> Dict[str, Any]:
+        self._call("batch_update")
+        for item in data:
+            (r0, c0), _ = self._bounds(item["range"].split("!")[-1])
+            self._write(r0, c0, item["values"])
+        return {"totalUpdatedCells": sum(len(r) for item in data for r in item["values"])}
+
+    def append_row(self, values: Sequence[Any], **kwargs: Any) -> Dict[str, Any]:
+        return self._append("append_row", [values])
+
+    def append_rows(self, rows: Sequence[Sequence[Any]], **kwargs: Any) -> Dict[str, Any]:
+        return self._append("append_rows", rows)
+
+    def batch_clear(self, ranges: Sequence[str]) -> Dict[str, Any]:
+        self._call("batch_clear")
+        for rng in ranges:
+            self._clear_range(rng.split("!")[-1])
+        return {}
+
+    def clear(self) -> Dict[str, Any]:
+        self._call("clear")
+        self._cells = [[""] * self.col_count for _ in range(self.row_count)]
+        return {}
+
+    def resize(self, rows: Optional[int] = None, cols: Optional[int] = None) -> Dict[str, Any]:
+        self._call("resize")
+        rows = self.row_count if rows is None else int(rows)
+        cols = self.col_count if cols is None else int(cols)
+        self._cells = [(r + [""] * cols)[:cols] for r in self._cells[:rows]]
+        self._cells += [[""] * cols for _ in range(rows - len(self._cells))]
+        return {}
+
+    # -- internals ---------------------------------------------------------
+
+    def _append(self, method: str, rows: Sequence[Sequence[Any]]) -> Dict[str, Any]:
+        self._call(method)
+        top = len(self.values()) + 1
+        width = max((len(r) for r in rows), default=1)
+        self._grow(top + len(rows) - 1, width)
+        self._write(top, 1, rows)
+        return {"updates": {"updatedRange": f"'{self.title}'!" + self._a1(top, 1, len(rows), width)}}
+
+    def _grow(self, rows: int, cols: int) -> None:
+        if cols > self.col_count:
+            self._cells = [r + [""] * (cols - len(r)) for r in self._cells]
+        width = self.col_count or cols
+        self._cells += [[""] * width for _ in range(rows - self.row_count)]
+
+    def _check(self, row: int, col: int) -> None:
+        if not (1 <= row <= self.row_count and 1 <= col <= self.col_count):
+            raise api_error(
+                400, f"Range ({self.title}!{rowcol_to_a1(row, col)}) exceeds grid limits. "
+                f"Max rows: {self.row_count}, max columns: {self.col_count}"
+            )
+
+    def _write(self, top: int, left: int, values: Sequence[Sequence[Any]]) -> None:
+        for i, row in enumerate(values):
+            for j, value in enumerate(row):
+                self._check(top + i, left + j)
+                self._cells[top + i - 1][left + j - 1] = _as_text(value)
+
+    def _read(self, r0: int, c0: int, r1: int, c1: int) -> List[List[str]]:
+        r1, c1 = min(r1, self.row_count), min(c1, self.col_count)
+        out = []
+        for r in range(r0 - 1, r1):
+            row = self._cells[r][c0 - 1 : c1]
+            while row and row[-1] == "":
+                row.pop()
+            out.append(row)
+        while out and not out[-1]:
+            out.pop()
+        return out
+
+    def _clear_range(self, a1: str) -> None:
+        (r0, c0), (r1, c1) = self._bounds(a1)
+        for r in range(r0 - 1, min(r1, self.row_count)):
+            for c in range(c0 - 1, min(c1, self.col_count)):
+                self._cells[r][c] = ""
+
+    def _bounds(self, a1: str) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        if not a1:
+            return (1, 1), (self.row_count, self.col_count)
+        first, _, last = a1.partition(":")
+        r0, c0 = _ref(first, 1, 1)
+        if not last:
+            if not re.search(r"\d", first):  # "A" -> whole column
+                return (1, c0), (self.row_count, c0)
+            if not re.search(r"[A-Za-z]", first):  # "8" -> whole row
+                return (r0, 1), (r0, self.col_count)
+            return (r0, c0), (r0, c0)
+        r1, c1 = _ref(last, self.row_count, self.col_count)
+        return (r0, c0), (r1, c1)
+
+    @staticmethod
+    def _a1(top: int, left: int, height: int, width: int) -> str:
+        return f"{rowcol_to_a1(top, left)}:{rowcol_to_a1(top + max(height, 1) - 1, left + max(width, 1) - 1)}"
+
+
+def _looks_like_a1(text: str) -> bool:
+    return bool(re.match(r"^\$?[A-Za-z]*\$?\d*(:\$?[A-Za-z]*\$?\d*)?$", text)) and text != ""
+
+
+def _ref(ref: str, default_row: int, default_col: int) -> Tuple[int, int]:
+    m = re.match(r"^\$?([A-Za-z]*)\$?(\d*)$", ref.strip())
+    if not m:
+        raise api_error(400, f"Unable to parse range: {ref}")
+    letters, digits = m.groups()
+    row = int(digits) if digits else default_row
+    col = a1_to_rowcol(f"{letters}1")[1] if letters else default_col
+    return row, col
+
+
+def _as_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _sort_value(text: str) -> Tuple[int, Any]:
+    try:
+        return (0, float(text.replace(",", "")))
+    except ValueError:
+        return (1, text.lower())
+
+
+_REF = re.compile(r"(\$?)([A-Z]{1,3})(\$?)(\d+)(?![\d(])")
+
+
+def _shift_refs(text: str, rows: int, cols: int) -> str:
+    """Shift relative A1 references in a formula, as a formula paste does."""
+
+    if not text.startswith("="):
+        return text
+
+    def shift(m: "re.Match[str]") -> str:
+        col_abs, letters, row_abs, digits = m.groups()
+        row = int(digits) + (0 if row_abs else rows)
+        col = a1_to_rowcol(f"{letters}1")[1] + (0 if col_abs else cols)
+        return f"{col_abs}{rowcol_to_a1(1, col)[:-1]}{row_abs}{row}"
+
+    return _REF.sub(shift, text)
+
+
+class RecordingWorksheet:
+    """Write-only worksheet stub that records each call and can fail with 429s.
+
+    The first ``fail_first`` ``batch_update`` calls raise the API's quota
+    error, for exercising :func:`core.sheets.call_with_backoff`.
+    """
+
+    row_count = 1000
+    col_count = 26
+    spreadsheet_id = "sid"
+    title = "Bets"
+
+    def __init__(self, fail_first: int = 0):
+        self.calls: List[Tuple[Any, ...]] = []
+        self.fail_first = fail_first
+
+    def batch_update(self, data: Sequence[Dict[str, Any]], value_input_option: Optional[str] = None) -> None:
+        if self.fail_first:
+            self.fail_first -= 1
+            raise api_error(429, "quota")
+        self.calls.append(("batch_update", list(data), value_input_option))
+
+    def batch_clear(self, ranges: Sequence[str]) -> None:
+        self.calls.append(("batch_clear", list(ranges)))
+
+    def append_rows(self, rows: Sequence[Sequence[Any]], value_input_option: Optional[str] = None) -> None:
+        self.calls.append(("append_rows", rows, value_input_option))
+
+
+__all__ = [
+    "FakeBackend",
+    "FakeClient",
+    "FakeSpreadsheet",
+    "FakeWorksheet",
+    "READ_METHODS",
+    "RecordingWorksheet",
+    "VirtualClock",
+    "api_error",
+]
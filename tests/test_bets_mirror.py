@@ -0,0 +1,111 @@
+from core.bets_mirror import BetsMirror
+from core.sheets import SheetWriter
+from testing.fake_gspread import RecordingWorksheet
+
+HEADER = ["Date", "Event ID", "Result", "Profit/Loss", "Bet ID#"]
+
+
+def _writer():
+    return SheetWriter(RecordingWorksheet())
+
+
+def _written(writer):
+    """``(kind, payload)`` of each write the flush sent."""
+
+    return [(kind, payload) for kind, payload, _ in writer.ws.calls]
+
+
+def _mirror(tmp_path, rows):
+    mirror = BetsMirror(str(tmp_path / "bets.sqlite"))
+    mirror.pull(HEADER, rows, 8)
+    return mirror
+
+
+def test_push_sends_only_dirty_cells_and_new_bets(tmp_path):
+    mirror = _mirror(tmp_path, [["2025-09-20", "ev1", "", "", "1"], ["2025-09-20", "ev2", "Win", "10", "2"]])
+    assert mirror.update("1", {"Result": "Loss", "Profit/Loss": "-10"})
+    assert not mirror.update("2", {"Result": "Win"})
+    mirror.insert({"Date": "2025-09-21", "Bet ID#": "3"})
+
+    writer = _writer()
+    assert mirror.push(writer) == 2
+    assert _written(writer) == [
+        ("batch_update", [{"range": "C8:D8", "values": [["Loss", "-10"]]}]),
+        ("append_rows", [["2025-09-21", "", "", "", "3"]]),
+    ]
+    assert mirror.dirty_count() == 0
+    assert mirror.push(_writer()) == 0
+    # reopened mirror keeps rows and header
+    assert BetsMirror(mirror.path).get("1")["Result"] == "Loss"
+
+
+def test_pull_merges_manual_edits_and_reports_conflicts(tmp_path):
+    mirror = _mirror(tmp_path, [["2025-09-20", "ev1", "", "", "1"], ["2025-09-20", "ev2", "", "", "2"]])
+    mirror.update("1", {"Result": "Loss"})
+    mirror.update("2", {"Result": "Win"})
+
+    # rows were re-sorted and edited by hand: bet 1's Event ID, bet 2's Result
+    result = mirror.pull(HEADER, [["2025-09-20", "ev2", "Push", "", "2"], ["2025-09-20", "evX", "", "", "1"]], 8)
+    assert result.merged == 2
+    assert [(c.bet_id, c.column, c.local, c.sheet) for c in result.conflicts] == [("2", "Result", "Win", "Push")]
+    assert mirror.get("1")["Event ID"] == "evX"  # sheet edit kept
+    assert mirror.get("1")["Result"] == "Loss"  # local edit kept
+    assert mirror.get("2")["Result"] == "Push"
+
+    writer = _writer()
+    assert mirror.push(writer) == 1
+    assert _written(writer) == [("batch_update", [{"range": "C9", "values": [["Loss"]]}])]  # bet 1 moved to row 9
+
+
+def test_pull_drops_bets_removed_from_sheet(tmp_path):
+    mirror = _mirror(tmp_path, [["2025-09-20", "ev1", "", "", "1"]])
+    mirror.insert({"Bet ID#": "2"})
+    result = mirror.pull(HEADER, [], 8)
+    assert result.removed == 1
+    assert mirror.get("1") is None
+    assert mirror.get("2") is not None  # not pushed yet
+
+
+def test_rows_without_a_usable_bet_id_are_keyed_by_sheet_row(tmp_path):
+    rows = [["2025-09-20", "ev1", "", "", "1"], ["2025-09-20", "ev2", "", "", ""], ["2025-09-20", "ev3", "", "", "1"], []]
+    mirror = _mirror(tmp_path, rows)
+    assert [b for b, _, _ in mirror.entries()] == ["1", "row:9", "row:10"]
+    assert mirror.update("row:10", {"Result": "Win"})
+
+    writer = _writer()
+    assert mirror.push(writer) == 1
+    assert _written(writer) == [("batch_update", [{"range": "C10", "values": [["Win"]]}])]
+
+    # a different row now sits at sheet row 9: it replaces the old entry
+    result = mirror.pull(HEADER, [rows[0], ["2025-09-21", "ev9", "", "", ""], ["2025-09-20", "ev3", "Win", "", "1"]], 8)
+    assert result.conflicts == []
+    assert mirror.get("row:9")["Event ID"] == "ev9"
+    assert mirror.get("row:10")["Result"] == "Win"
+
+
+def test_missing_key_column_warns_instead_of_failing(tmp_path, capsys):
+    mirror = BetsMirror(str(tmp_path / "bets.sqlite"))
+    mirror.pull(HEADER[:-1], [["2025-09-20", "ev1", "", ""], ["2025-09-20", "ev2", "", ""]], 8)
+    assert "no 'Bet ID#' column" in capsys.readouterr().out
+    assert [(b, r) for b, r, _ in mirror.entries()] == [("row:8", 8), ("row:9", 9)]
+
+
+def test_pull_keeps_unpushed_edits_of_rows_removed_from_sheet(tmp_path, capsys):
+    mirror = _mirror(tmp_path, [["2025-09-20", "ev1", "", "", "1"], ["2025-09-20", "ev2", "", "", "2"]])
+    mirror.update("1", {"Result": "Win"})
+    result = mirror.pull(HEADER, [["2025-09-20", "ev2", "", "", "2"]], 8)
+    assert result.removed == 0
+    assert "unpushed local edits: 1" in capsys.readouterr().out
+    assert mirror.get("1")["Result"] == "Win"
+    assert [(b, r) for b, r, _ in mirror.entries()] == [("2", 8), ("1", None)]
+    assert mirror.push(_writer()) == 0  # its row is unknown until it is back on the sheet
+
+
+def test_header_aliases_key_the_same_rows(tmp_path):
+    mirror = _mirror(tmp_path, [["2025-09-20", "ev1", "", "", "1"]])
+    mirror.update("1", {"Result": "Win"})
+    raw = ["Date", "Game ID", "Status", "P/L", "Ticket #"]
+    result = mirror.pull(raw, [["2025-09-20", "ev1", "", "", "1"]], 8)
+    assert (result.added, result.removed) == (0, 0)
+    assert mirror.header == HEADER
+    assert mirror.get("1")["Result"] == "Win"
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta, timezone
+
+import clv_sync
+import odds_sync
+from core.closing_lines import CaptureQueue, ClosingStore, parse_commence
+
+
+T0 = datetime(2025, 9, 20, 17, 0, tzinfo=timezone.utc)
+
+
+def test_queue_fires_lead_minutes_before_start_in_order():
+    q = CaptureQueue(timedelta(minutes=5))
+    q.add("late", T0 + timedelta(hours=2))
+    q.add("early", T0)
+    assert q.next_at() == T0 - timedelta(minutes=5)
+    assert q.pop_due(T0 - timedelta(minutes=6)) == []
+    assert q.pop_due(T0 + timedelta(hours=3)) == ["early", "late"]
+    assert len(q) == 0
+
+
+def test_queue_reschedule_and_discard():
+    q = CaptureQueue(timedelta(minutes=5))
+    q.add("ev", T0)
+    q.add("ev", T0 + timedelta(hours=1))  # start time moved
+    q.add("gone", T0)
+    q.discard("gone")
+    assert q.pop_due(T0) == []
+    assert q.pop_due(T0 + timedelta(hours=1)) == ["ev"]
+
+
+def test_store_roundtrip_and_prune(tmp_path):
+    store = ClosingStore(str(tmp_path / "closing.json"))
+    row = ["ev1", "h2h", "Yankees", "Pinnacle", "h2h", "Yankees", "", "-120"]
+    store.save("old", [row], "2025-08-01T17:00:00Z", captured_at=T0 - timedelta(days=1))
+    store.save("ev1", [row], T0.isoformat(), captured_at=T0)
+    rows = store.detailed_rows()
+    assert set(rows) == {"ev1"}
+    assert rows["ev1"][0]["Bookmaker"] == "Pinnacle"
+    assert rows["ev1"][0]["Odds"] == "-120"
+
+
+def test_parse_commence_accepts_sheet_rendering():
+    assert parse_commence("2025-09-20T17:00:00Z") == T0
+    assert parse_commence("2025-09-20 17:00:00") == T0
+    assert parse_commence("") is None
+
+
+def test_bet_added_after_capture_keeps_its_rows_and_requeues_the_event(tmp_path):
+    store = ClosingStore(str(tmp_path / "closing.json"))
+    snap = ["ev1", "h2h", "Yankees", "Pinnacle", "h2h", "Yankees", "", "-120"]
+    store.save("ev1", [snap], T0.isoformat(), captured_at=T0 - timedelta(minutes=5), bets=[("h2h", "Yankees"), ("totals", "Over 9.5")])
+    assert store.covered() == {"ev1": {("h2h", "Yankees"), ("totals", "Over 9.5")}}
+
+    def row(sel, mkt, odds):
+        return dict(zip(("Event ID", "User Market", "User Bet Selection", "Odds"), ("ev1", mkt, sel, odds)))
+
+    fresh = [row("Yankees", "h2h", "-140"), row("Over 9.5", "totals", "+105"), row("Over 8.5", "totals", "-110")]
+    merged = clv_sync.merge_closing_rows(fresh, store.detailed_rows(), store.covered())
+    # the snapshot replaces the bets it covers (even one it found no quotes for);
+    # the totals bet placed after the capture keeps its Detailed Odds rows
+    assert [(r["User Bet Selection"], r["Odds"]) for r in merged] == [("Over 8.5", "-110"), ("Yankees", "-120")]
+
+    queue = CaptureQueue(timedelta(minutes=5))
+    bets = {"ev1": [("ev1", "Moneyline", "Yankees"), ("ev1", "Totals", "Over 9.5")]}
+    starts = {"ev1": ("baseball_mlb", T0)}
+    odds_sync._requeue(queue, bets, starts, store.covered(), T0 - timedelta(minutes=3))
+    assert "ev1" not in queue
+    bets["ev1"].append(("ev1", "Totals", "Over 8.5"))
+    odds_sync._requeue(queue, bets, starts, store.covered(), T0 - timedelta(minutes=3))
+    assert queue.pop_due(T0 - timedelta(minutes=3)) == ["ev1"]
+    odds_sync._requeue(queue, bets, starts, store.covered(), T0 + timedelta(minutes=1))
+    assert "ev1" not in queue  # started: too late to capture
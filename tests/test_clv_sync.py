@@ -0,0 +1,17 @@
+import pytest
+
+import clv_sync
+
+
+@pytest.mark.parametrize("entry, expected", [("+150", 0.4), ("150", 0.4), ("-150", 0.6), ("-110.0", 110 / 210)])
+def test_entry_odds_read_unsigned_prices_as_plus_money(entry, expected):
+    # Sheets drops the "+" of a price typed as "+150"; it must stay plus money
+    assert clv_sync.american_to_prob(entry) == pytest.approx(expected)
+
+
+def test_invalid_configured_devig_method_fails_at_startup(monkeypatch, capsys):
+    monkeypatch.setattr(clv_sync.config, "DEVIG_METHOD", "probit")
+    with pytest.raises(SystemExit):
+        clv_sync._parse_args([])
+    assert "DEVIG_METHOD 'probit'" in capsys.readouterr().err
+    assert clv_sync._parse_args(["--devig-method", "shin"]).devig_method == "shin"
@@ -1,6 +1,15 @@
+import numpy as np
+import pytest
+
 from core.consensus_pricer import (
+    DEVIG_METHODS,
     BetKey,
+    ConsensusSettings,
+    _american_to_prob,
+    combine_books,
+    _shin_z_bisect,
     compute_consensus,
+    devig,
     devig_two_way,
     pair_quotes_by_point,
 )
@@ -184,3 +193,197 @@ def test_compute_consensus_missing_counterpart():
     assert results == {}
     key_over = BetKey("totals", "Over 7.5")
     assert results.get(key_over) is None
+
+
+def test_devig_methods_sum_to_one_and_shrink_longshot():
+    implied = np.array([[_american_to_prob(-300), _american_to_prob(250)], [0.5238, 0.5238]])
+    mult = devig(implied, "multiplicative")
+    for method in DEVIG_METHODS:
+        fair = devig(implied, method)
+        assert np.allclose(fair.sum(axis=1), 1.0)
+        assert np.allclose(fair[1], [0.5, 0.5])
+        if method != "multiplicative":
+            # favourite/longshot correction moves probability to the favourite
+            assert fair[0, 1] < mult[0, 1]
+
+
+@pytest.mark.parametrize("method", sorted(DEVIG_METHODS))
+def test_devig_high_overround_converges(method):
+    with np.errstate(all="raise"):
+        assert devig_two_way(-1000, -1000, method) == pytest.approx((0.5, 0.5))
+        fair = devig_two_way(-5000, -300, method)
+    assert sum(fair) == pytest.approx(1.0) and fair[0] > fair[1] > 0
+
+
+def test_devig_rows_are_independent():
+    rng = np.random.default_rng(3)
+    implied = rng.uniform(0.05, 0.9, size=(200, 2))
+    implied /= implied.sum(axis=1, keepdims=True) / rng.uniform(1.01, 1.1, size=(200, 1))
+    for method in DEVIG_METHODS:
+        batch = devig(implied, method)
+        single = np.vstack([devig(row[None, :], method) for row in implied])
+        assert np.array_equal(batch, single)
+
+
+def test_shin_closed_form_matches_bisection():
+    implied = np.array([[0.75, 0.2857], [0.6, 0.45], [0.52, 0.52]])
+    total = implied.sum(axis=1, keepdims=True)
+    s, diff2 = total[:, 0], (implied[:, 0] - implied[:, 1]) ** 2
+    closed = (s - 1.0) * (diff2 - s) / (s * (diff2 - 1.0))
+    assert np.allclose(_shin_z_bisect(implied, total), closed, atol=1e-12)
+
+
+def test_devig_degenerate_rows_and_unknown_method():
+    assert devig_two_way(None, None, "power") == (0.0, 0.0)
+    assert devig_two_way(-110, None, "shin") == (1.0, 0.0)
+    with pytest.raises(ValueError):
+        devig([[0.5, 0.55]], "nope")
+
+
+def test_compute_consensus_with_method():
+    event = sample_event_moneyline()
+    mult = compute_consensus(event, ["book1", "book2"])
+    power = compute_consensus(event, ["book1", "book2"], method="power")
+    key_b = BetKey("h2h", "B")
+    assert power[key_b].books == mult[key_b].books
+    assert power[key_b].consensus_probability > mult[key_b].consensus_probability
+
+
+def test_weighted_consensus_records_weights():
+    event = sample_event_moneyline()
+    settings = ConsensusSettings(book_weights={"book1": 3.0})
+    res = compute_consensus(event, ["book1", "book2"], settings=settings)[BetKey("h2h", "A")]
+    p1, p2 = res.book_probabilities["book1"], res.book_probabilities["book2"]
+    assert res.consensus_probability == pytest.approx(0.75 * p1 + 0.25 * p2)
+    assert res.weights == {"book1": 0.75, "book2": 0.25}
+    assert res.dropped_books == [] and res.notes == []
+
+    by_market = ConsensusSettings(book_weights={"book1": 3.0}, market_weights={"h2h": {"book1": 1.0}})
+    res = compute_consensus(event, ["book1", "book2"], settings=by_market)[BetKey("h2h", "A")]
+    assert res.weights == {"book1": 0.5, "book2": 0.5}
+
+
+def test_combine_books_median_and_mad():
+    probs = np.array([[0.50, 0.51, 0.52, 0.70], [0.40, 0.60, np.nan, np.nan]])
+    weights = np.ones_like(probs)
+
+    median, _, dropped = combine_books(probs, weights, "median")
+    assert median.tolist() == pytest.approx([0.515, 0.5])
+    assert not dropped.any()
+
+    mean, effective, dropped = combine_books(probs, weights, "mad")
+    assert dropped.tolist() == [[False, False, False, True], [False, False, False, False]]
+    assert mean.tolist() == pytest.approx([0.51, 0.5])
+    assert effective[0].tolist() == pytest.approx([1 / 3, 1 / 3, 1 / 3, 0.0])
+
+    with pytest.raises(ValueError):
+        combine_books(probs, weights, "trimmed")
+
+
+def test_mad_rejects_outliers_when_most_books_agree_exactly():
+    probs = np.array([[0.5, 0.5, 0.5, 0.8], [0.5, 0.5, 0.5, 0.502]])
+    mean, _, dropped = combine_books(probs, np.ones_like(probs), "mad")
+    assert dropped.tolist() == [[False, False, False, True], [False] * 4]  # MIN_MAD keeps tiny deviations
+    assert mean[0] == 0.5
+
+
+def test_compute_consensus_reports_dropped_books():
+    event = {"bookmakers": [
+        {"key": f"book{i}", "markets": [{"key": "h2h", "outcomes": [
+            {"name": "A", "price": price}, {"name": "B", "price": -price}]}]}
+        for i, price in enumerate([-110, -112, -108, +200])
+    ]}
+    books = [f"book{i}" for i in range(4)]
+    res = compute_consensus(event, books, settings=ConsensusSettings(outlier="mad"))[BetKey("h2h", "A")]
+    assert res.dropped_books == ["book3"]
+    assert "book3" not in res.weights and res.books == books
+    assert res.notes == ["outliers dropped: book3"]
+
+
+def test_all_zero_weights_give_no_consensus():
+    res = compute_consensus(
+        sample_event_moneyline(), ["book1", "book2"], settings=ConsensusSettings(book_weights={"book1": 0, "book2": 0})
+    )[BetKey("h2h", "A")]
+    assert res.consensus_probability is None and res.consensus_odds is None
+    assert res.notes == ["all books weighted 0"]
+
+
+def sample_event_three_way():
+    return {
+        "bookmakers": [
+            {
+                "key": "book1",
+                "markets": [
+                    {
+                        "key": "h2h_3_way",
+                        "outcomes": [
+                            {"name": "A", "price": +160},
+                            {"name": "Draw", "price": +250},
+                            {"name": "B", "price": +170},
+                        ],
+                    }
+                ],
+            },
+            {
+                "key": "book2",
+                "markets": [
+                    {
+                        "key": "h2h_3_way",
+                        "outcomes": [
+                            {"name": "A", "price": +155},
+                            {"name": "B", "price": +175},
+                        ],
+                    }
+                ],
+            },
+        ]
+    }
+
+
+def test_three_way_market_uses_all_outcomes():
+    results = compute_consensus(sample_event_three_way(), ["book1", "book2"])
+    keys = [BetKey("h2h_3_way", label) for label in ("A", "Draw", "B")]
+    assert all(k in results for k in keys)
+    # book2 misses the draw, so only book1 prices the market
+    assert all(results[k].books == ["book1"] for k in keys)
+    total = sum(results[k].consensus_probability for k in keys)
+    assert total == pytest.approx(1.0)
+    implied = [_american_to_prob(p) for p in (160, 250, 170)]
+    assert results[keys[1]].consensus_probability == pytest.approx(implied[1] / sum(implied))
+
+
+def test_stray_outcome_leaves_out_only_that_book():
+    def book(key, outcomes):
+        return {"key": key, "markets": [{"key": "h2h", "outcomes": [{"name": n, "price": p} for n, p in outcomes]}]}
+
+    event = {
+        "bookmakers": [
+            book("b1", [("A", -120), ("B", 100)]),
+            book("b2", [("A", -115), ("B", -105)]),
+            book("b3", [("A", 150), ("Draw", 300), ("B", 160)]),
+        ]
+    }
+    results = compute_consensus(event, ["b1", "b2", "b3"])
+    res = results[BetKey("h2h", "A")]
+    assert res.books == ["b1", "b2"]
+    assert res.notes == ["different outcome set excluded: b3"]
+    assert BetKey("h2h", "Draw") not in results
+    assert results[BetKey("h2h", "B")].notes == res.notes
+
+
+@pytest.mark.parametrize("method", sorted(DEVIG_METHODS))
+def test_three_way_devig_methods(method):
+    implied = np.array([[_american_to_prob(p) for p in (-150, 280, 420)], [0.4, 0.35, 0.35]])
+    fair = devig(implied, method)
+    assert np.allclose(fair.sum(axis=1), 1.0)
+    assert (fair > 0).all()
+    assert np.array_equal(devig(implied[:1], method), fair[:1])
+    if method != "multiplicative":
+        mult = devig(implied, "multiplicative")
+        assert fair[0, 2] < mult[0, 2]  # longshot shrinks
+
+
+def test_two_way_market_ignores_extra_labels():
+    quotes = {("spreads", 1.5): {"book1": {"A -1.5": -110, "B +1.5": -110, "A +1.5": -300}}}
+    probs = pair_quotes_by_point(quotes)
+    assert set(probs) == {BetKey("spreads", "A -1.5"), BetKey("spreads", "B +1.5")}
@@ -0,0 +1,154 @@
+import random
+
+import pytest
+
+from core.consensus_pricer import DEVIG_METHODS, BetKey, ConsensusSettings, compute_consensus
+from core.devig_batch import compute_slate_consensus, flatten_slate, slate_consensus
+
+BOOKS = ["pinnacle", "fanduel", "draftkings", "betmgm", "caesars", "betonlineag", "bovada", "mybookieag", "pointsbetus"]
+
+
+def _price(rng):
+    return rng.choice([-1, 1]) * rng.randint(100, 400)
+
+
+def random_event(rng):
+    bookmakers = []
+    for book in BOOKS:
+        markets = [
+            {"key": "h2h", "outcomes": [{"name": "Yankees", "price": _price(rng)}, {"name": "Red Sox", "price": _price(rng)}]},
+            {
+                "key": "spreads",
+                "outcomes": [
+                    {"name": "Yankees", "point": -1.5, "price": _price(rng)},
+                    {"name": "Red Sox", "point": 1.5, "price": _price(rng)},
+                ],
+            },
+            {
+                "key": "totals",
+                "outcomes": [
+                    {"name": "Over", "point": pt, "price": _price(rng)} for pt in (7.5, 8.5)
+                ]
+                + [{"name": "Under", "point": pt, "price": _price(rng)} for pt in (7.5, 8.5)],
+            },
+            {
+                "key": "team_totals",
+                "outcomes": [
+                    {"name": "Over", "team": "Yankees", "point": 4.5, "price": _price(rng)},
+                    {"name": "Under", "team": "Yankees", "point": 4.5, "price": _price(rng)},
+                ],
+            },
+        ]
+        roll = rng.random()
+        if roll < 0.1:
+            markets[0]["outcomes"].pop()  # one-sided quote
+        elif roll < 0.2:
+            markets[0]["outcomes"].append({"name": "Draw", "price": _price(rng)})  # stray draw: this book is left out
+        elif roll < 0.25:
+            markets[1]["outcomes"][0]["price"] = None
+        elif roll < 0.3:
+            markets[2]["outcomes"].append(dict(markets[2]["outcomes"][0], price=_price(rng)))  # duplicate
+        bookmakers.append({"key": book, "markets": markets})
+    bookmakers.append({"key": "not_allowed", "markets": bookmakers[0]["markets"]})
+    return {"bookmakers": bookmakers}
+
+
+def test_slate_matches_compute_consensus_exactly():
+    rng = random.Random(7)
+    events = {f"ev{i}": random_event(rng) for i in range(60)}
+    events["empty"] = {"bookmakers": []}
+
+    batch = compute_slate_consensus(events, BOOKS)
+
+    assert list(batch) == list(events)
+    for ev_id, event in events.items():
+        expected = compute_consensus(event, BOOKS)
+        assert list(batch[ev_id]) == list(expected)
+        for key, res in expected.items():
+            got = batch[ev_id][key]
+            assert got == res  # exact float equality, same book order
+            assert list(got.book_probabilities) == list(res.book_probabilities)
+
+
+@pytest.mark.parametrize("method", sorted(DEVIG_METHODS))
+def test_slate_methods_match_compute_consensus(method):
+    rng = random.Random(11)
+    events = {f"ev{i}": random_event(rng) for i in range(20)}
+    batch = compute_slate_consensus(events, BOOKS, method)
+    for ev_id, event in events.items():
+        assert batch[ev_id] == compute_consensus(event, BOOKS, method)
+
+
+@pytest.mark.parametrize("outlier", [None, "median", "mad"])
+def test_slate_weighted_consensus_matches(outlier):
+    rng = random.Random(5)
+    events = {f"ev{i}": random_event(rng) for i in range(20)}
+    settings = ConsensusSettings(
+        book_weights={"pinnacle": 3.0, "bovada": 0.5},
+        market_weights={"totals": {"fanduel": 0.0}},
+        outlier=outlier,
+        mad_k=1.5,
+    )
+    batch = compute_slate_consensus(events, BOOKS, "power", settings)
+    dropped = 0
+    for ev_id, event in events.items():
+        expected = compute_consensus(event, BOOKS, "power", settings)
+        assert batch[ev_id] == expected
+        dropped += sum(len(r.dropped_books) for r in expected.values())
+    assert dropped if outlier == "mad" else not dropped
+
+
+def soccer_event():
+    def book(key, home, draw, away):
+        outcomes = [{"name": "Arsenal", "price": home}, {"name": "Chelsea", "price": away}]
+        if draw is not None:
+            outcomes.insert(1, {"name": "Draw", "price": draw})
+        return {"key": key, "markets": [
+            {"key": "h2h", "outcomes": outcomes},
+            {"key": "totals", "outcomes": [
+                {"name": "Over", "point": 2.5, "price": -120}, {"name": "Under", "point": 2.5, "price": 100}]},
+        ]}
+
+    return {"bookmakers": [
+        book("pinnacle", 150, 240, 190),
+        book("fanduel", 145, 250, 180),
+        book("bovada", 140, None, 200),  # missing the draw
+    ]}
+
+
+@pytest.mark.parametrize("method", sorted(DEVIG_METHODS))
+def test_slate_three_way_matches(method):
+    events = {"soccer": soccer_event(), "ev": random_event(random.Random(2))}
+    batch = compute_slate_consensus(events, BOOKS, method)
+    for ev_id, event in events.items():
+        assert batch[ev_id] == compute_consensus(event, BOOKS, method)
+    draw = batch["soccer"][BetKey("h2h", "Draw")]
+    assert draw.books == ["fanduel", "pinnacle"]
+    assert draw.notes == ["different outcome set excluded: bovada"]
+
+
+def test_flatten_slate_arrays():
+    rng = random.Random(1)
+    quotes = flatten_slate({"a": random_event(rng), "b": random_event(rng)}, BOOKS)
+    n = len(quotes.price)
+    for arr in (quotes.event, quotes.market, quotes.pair, quotes.book, quotes.side, quotes.bet):
+        assert len(arr) == n
+    assert quotes.event_ids == ["a", "b"]
+    assert "not_allowed" not in quotes.books
+    assert set(quotes.markets) == {"h2h", "spreads", "totals", "team_totals"}
+
+    cons = slate_consensus(quotes)
+    assert cons.n_books.max() <= len(BOOKS)
+    priced = cons.probability[cons.bet_order]
+    assert ((priced > 0) & (priced < 1)).all()
+
+
+def test_flatten_slate_coerces_malformed_prices():
+    event = random_event(random.Random(3))
+    h2h = event["bookmakers"][0]["markets"][0]["outcomes"]
+    h2h[0]["price"] = "N/A"
+    event["bookmakers"][1]["markets"][0]["outcomes"][0]["price"] = "+150"
+    quotes = flatten_slate({"ev": event}, BOOKS)
+    assert quotes.price[0] != quotes.price[0]  # NaN, like american_to_prob("N/A") -> None
+    assert 150.0 in quotes.price
+    assert compute_slate_consensus({"ev": event}, BOOKS)["ev"] == compute_consensus(event, BOOKS)
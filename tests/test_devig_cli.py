@@ -48,3 +48,28 @@ def test_price_probability_same_books():
     # Best price for A should ignore book2's unmatched price
     assert res_a["best_price"] == -110
     assert res_b["best_price"] == -110
+
+
+def test_normalize_odds_devig_method():
+    event = sample_event_partial_books()
+    event["bookmakers"][0]["markets"][0]["outcomes"][0]["price"] = -150
+    event["bookmakers"][0]["markets"][0]["outcomes"][1]["price"] = +125
+    mult = normalize_odds(event, ["book1", "book2"])
+    shin = normalize_odds(event, ["book1", "book2"], method="shin")
+    assert shin["A"]["books"] == mult["A"]["books"] == ["book1"]
+    assert shin["A"]["novig_probability"] > mult["A"]["novig_probability"]
+    assert abs(shin["A"]["novig_probability"] + shin["B"]["novig_probability"] - 1.0) < 1e-12
+
+
+def test_normalize_odds_three_way():
+    event = {"bookmakers": [
+        {"key": key, "markets": [{"key": "h2h", "outcomes": [
+            {"name": "Home", "price": home}, {"name": "Draw", "price": draw}, {"name": "Away", "price": away}]}]}
+        for key, home, draw, away in (("book1", 150, 240, 190), ("book2", 140, 250, 200))
+    ]}
+    results = normalize_odds(event, ["book1", "book2"])
+    assert set(results) == {"Home", "Draw", "Away"}
+    assert results["Draw"]["books"] == ["book1", "book2"]
+    assert results["Draw"]["best_price"] == 250
+    for book in ("book1", "book2"):
+        assert abs(sum(results[label]["book_probabilities"][book] for label in results) - 1.0) < 1e-12
@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+
+from core.event_index import leagues_for, load_index, update_index
+
+
+LEAGUES = ["baseball_mlb", "americanfootball_nfl", "americanfootball_ncaaf"]
+
+
+def test_update_index_merges_and_prunes(tmp_path):
+    path = str(tmp_path / "event_index.json")
+    now = datetime(2025, 9, 20, tzinfo=timezone.utc)
+    update_index([("baseball_mlb", "old", "2025-09-01T23:05:00Z")], path, now=now)
+    update_index([("americanfootball_ncaaf", "ev1", "2025-09-20T19:30:00Z")], path, now=now)
+    index = load_index(path)
+    assert set(index) == {"ev1"}
+    assert index["ev1"]["league"] == "americanfootball_ncaaf"
+
+
+def test_leagues_for_routes_known_events():
+    index = {"ev1": {"league": "americanfootball_ncaaf", "commence_time": ""}}
+    assert leagues_for("ev1", index, LEAGUES) == ["americanfootball_ncaaf"]
+    assert leagues_for("missing", index, LEAGUES) == LEAGUES
@@ -0,0 +1,69 @@
+import gspread
+import pytest
+
+from core import sheets
+from testing.fake_gspread import FakeBackend, FakeClient, VirtualClock
+
+
+def _sheet(backend=None, rows=10, cols=5):
+    client = FakeClient(backend)
+    ws = client.create("sid").add_tab("Bets", rows, cols)
+    return client, ws
+
+
+def test_reads_and_writes_match_the_api_shapes():
+    client, ws = _sheet()
+    ws.update("A1", [["h1", "h2"], ["a", 1.0]])
+    ws.update_cell(4, 1, "z")
+    assert ws.get_all_values() == [["h1", "h2"], ["a", "1"], ["", ""], ["z", ""]]
+    assert ws.row_values(1) == ["h1", "h2"]
+    assert ws.col_values(1) == ["h1", "a", "", "z"]
+    assert ws.cell(2, 2).value == "1"
+
+    resp = ws.append_rows([["b", 2], ["c", 3]])
+    assert resp["updates"]["updatedRange"] == "'Bets'!A5:B6"
+    got = ws.spreadsheet.values_batch_get(["'Bets'", "'Bets'!5:6"])["valueRanges"]
+    assert got[1]["values"] == [["b", "2"], ["c", "3"]]
+
+    ws.batch_clear(["A5:B6"])
+    assert len(ws.values()) == 4
+    with pytest.raises(gspread.exceptions.APIError):
+        ws.update_cell(1, 6, "beyond the grid")
+    assert client.backend.calls["update"] == 1
+    assert client.backend.total_calls == 10
+
+
+def test_sort_range_and_formula_paste_shift_relative_refs():
+    _, ws = _sheet()
+    ws.load([["=B1*2", "", "key"], ["", "x", "2"], ["", "y", "1"], ["", "z", ""]])
+    ss = ws.spreadsheet
+    ss.batch_update({"requests": [{"copyPaste": {
+        "source": {"sheetId": 0, "startRowIndex": 0, "endRowIndex": 1, "startColumnIndex": 0, "endColumnIndex": 1},
+        "destination": {"sheetId": 0, "startRowIndex": 1, "endRowIndex": 4, "startColumnIndex": 0, "endColumnIndex": 1},
+        "pasteType": "PASTE_FORMULA",
+    }}]})
+    ss.batch_update({"requests": [{"sortRange": {
+        "range": {"sheetId": 0, "startRowIndex": 1, "endRowIndex": 4, "startColumnIndex": 0, "endColumnIndex": 3},
+        "sortSpecs": [{"dimensionIndex": 2, "sortOrder": "ASCENDING"}],
+    }}]})
+    assert ws.values()[1:] == [["=B2*2", "y", "1"], ["=B3*2", "x", "2"], ["=B4*2", "z"]]
+
+    # unsupported requests fail the whole batch with the API's 400, nothing applied
+    with pytest.raises(gspread.exceptions.APIError) as err:
+        ss.batch_update({"requests": [{"sortRange": {"range": {"sheetId": 0}, "sortSpecs": []}}, {"mergeCells": {}}]})
+    assert err.value.response.status_code == 400
+
+
+def test_quota_raises_429_and_backoff_waits_on_the_virtual_clock():
+    clock = VirtualClock()
+    client, ws = _sheet(FakeBackend(latency=0.5, write_quota=2, window=10.0, clock=clock))
+    sheets.use_client(client, sleep=clock.sleep)
+    try:
+        for i in range(3):
+            with sheets.SheetWriter(ws) as writer:
+                writer.update_cell(i + 1, 1, "x")
+    finally:
+        sheets.use_client(None)
+    assert client.backend.throttled >= 1
+    assert client.backend.calls["batch_update"] == 3
+    assert clock.now >= 10.0  # the third write waited for the quota window
@@ -0,0 +1,20 @@
+import time
+
+from core.fetch_pool import map_ordered
+
+
+def test_map_ordered_keeps_input_order():
+    def slow_square(n):
+        time.sleep(0.01 * (5 - n))
+        return n * n
+
+    assert map_ordered(slow_square, range(5), max_workers=5) == [0, 1, 4, 9, 16]
+
+
+def test_map_ordered_isolates_failures():
+    def boom(n):
+        if n == 2:
+            raise RuntimeError("bad event")
+        return [n]
+
+    assert map_ordered(boom, [1, 2, 3], max_workers=3, default=[]) == [[1], [], [3]]
@@ -0,0 +1,167 @@
+import importlib.util
+import os
+
+import pytest
+
+import config
+from core import sheets
+from testing.fake_gspread import READ_METHODS, FakeClient
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def gss(tmp_path, monkeypatch):
+    sheets.reset_snapshots()
+    monkeypatch.setattr(config, "FORMULA_FILL_STATE_PATH", str(tmp_path / "formula_fill.json"))
+    monkeypatch.setattr(config, "BETS_MIRROR_PATH", str(tmp_path / "bets_mirror.sqlite"))
+    path = os.path.join(ROOT, "Python Project Folder", "google_sheets_sync.py")
+    spec = importlib.util.spec_from_file_location("ppf_google_sheets_sync", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+HEADER = [
+    "Date", "Start Time", "Event ID", "Sport", "League", "Market", "Derivative", "Event/Match", "Bet",
+    "Odds", "Stake", "Bookmaker", "Payout", "Closing Line", "CLV%", "Profit/Loss", "Notes/Comments",
+    "Bet ID#", "Result",
+]
+
+
+def _row(bet_id, event_id="", result="", pl=""):
+    row = [""] * len(HEADER)
+    row[0], row[1] = "2025-09-20", "19:05"
+    row[HEADER.index("Event ID")] = event_id
+    row[HEADER.index("Bet ID#")] = bet_id
+    row[HEADER.index("Result")] = result
+    row[HEADER.index("Profit/Loss")] = pl
+    return row
+
+
+def _tab(values, rows=20, cols=26):
+    client = FakeClient()
+    ws = client.create("sid").add_tab("Bets", rows, cols).load(values)
+    return client, ws
+
+
+def _writes(client):
+    return [method for method, _ in client.backend.log if method not in READ_METHODS]
+
+
+def test_partial_update_diffs_in_memory(gss, monkeypatch):
+    values = [[""] * len(HEADER)] * 6 + [HEADER]
+    values += [_row("1"), _row("2", "ev2", "Win", "$10.00"), _row("3", "ev3", "pending")]
+    client, ws = _tab(values)
+    csv_rows = [
+        {"Bet ID#": "1", "Date": "2025-09-20", "Start Time": "19:05", "Event ID": "ev1", "Result": "Loss", "Profit/Loss": "-10"},
+        {"Bet ID#": "2", "Date": "2025-09-20", "Start Time": "19:05", "Event ID": "ev2", "Result": "Loss", "Profit/Loss": "-10"},
+        {"Bet ID#": "3", "Date": "2025-09-20", "Start Time": "19:05", "Event ID": "ev3", "Result": "pending", "Profit/Loss": ""},
+        {"Bet ID#": "4", "Date": "2025-09-20", "Start Time": "19:05", "Event ID": "ev4", "Result": "", "Profit/Loss": ""},
+        {"Bet ID#": "5", "Date": "2025-09-20", "Start Time": "20:05", "Event ID": "ev5", "Result": "", "Profit/Loss": ""},
+    ]
+    monkeypatch.setattr(gss, "connect_google_sheets", lambda: ws)
+    monkeypatch.setattr(gss, "read_csv_data", lambda path: csv_rows)
+    monkeypatch.setattr(gss, "should_keep", lambda dt: True)
+    monkeypatch.setattr(gss, "HEADER_ROW", 7)
+    monkeypatch.setattr(gss, "FIRST_DATA_ROW", 8)
+
+    gss.partial_update_google_sheets("unused.csv")
+
+    # one batched write for bet 1, one append for bets 4 and 5, then the formula fill
+    assert _writes(client)[:3] == ["batch_update", "append_rows", "batch_update"]
+    # header/diff read once; sort and formula fill reuse the snapshot plus refreshed rows
+    assert client.backend.log[0][0] == "values_batch_get"
+    assert client.backend.calls["cell"] == 0  # the sync must not read single cells
+    by_id = {r[HEADER.index("Bet ID#")]: r for r in ws.values()[7:]}
+    assert by_id["1"][HEADER.index("Result")] == "Loss"
+    assert by_id["2"][HEADER.index("Result")] == "Win"  # sheet value kept: the CSV only fills blanks
+    assert {"4", "5"} <= set(by_id)
+
+
+def test_sort_sheet_skips_when_in_order(gss):
+    client, ws = _tab([HEADER, _row("1", result="pending"), _row("2", result="Win"), [""] * len(HEADER)])
+    gss.sort_sheet(ws, 1, 2, HEADER)
+    assert dict(client.backend.calls) == {"values_batch_get": 1}
+
+
+def test_sort_sheet_sends_one_sort_range(gss):
+    late = _row("3")
+    late[1] = "21:00"
+    client, ws = _tab([HEADER, _row("1", result="Win"), [""] * len(HEADER), late, _row("2")])
+    gss.sort_sheet(ws, 1, 2, HEADER)
+
+    # one write for the ranks in new helper column T, one sortRange request
+    assert _writes(client) == ["batch_update", "batch_update"]
+    rows = ws.values()
+    # pending 19:05, pending 21:00, settled, blank row last
+    assert [r[HEADER.index("Bet ID#")] for r in rows[1:]] == ["2", "3", "1"]
+    assert [r[19] for r in rows] == ["Sort Key", "1", "2", "3"]
+
+
+def test_sort_key_column_skips_unlabelled_data(gss):
+    notes = _row("2")
+    notes.append("scratch note")  # data in column T with no header
+    _, ws = _tab([HEADER, _row("1", result="Win"), notes])
+    gss.sort_sheet(ws, 1, 2, HEADER)
+
+    rows = ws.values()
+    assert rows[0][19:] == ["", "Sort Key"]
+    assert [r[19:] for r in rows[1:]] == [["scratch note", "1"], ["", "2"]]
+
+
+def test_sort_leaves_blank_rows_blank(gss):
+    _, ws = _tab([HEADER, _row("1", result="Win"), [], _row("2"), [], _row("3", result="Loss")])
+    gss.sort_sheet(ws, 1, 2, HEADER)
+
+    # blank rows sorted last and left without a stray Sort Key rank
+    assert [r[HEADER.index("Bet ID#")] for r in ws.values()[1:]] == ["2", "1", "3"]
+
+
+def test_fill_formulas_only_touches_new_rows(gss, monkeypatch):
+    monkeypatch.setattr(gss, "FIRST_DATA_ROW", 2)
+    template = HEADER[:13] + ["=J1*2", "=N1+1"] + HEADER[15:]
+    client, ws = _tab([template, _row("1"), _row("2")])
+    assert gss.fill_formulas(ws) == (2, 3)
+    assert [r[13:15] for r in ws.values()[1:]] == [["=J2*2", "=N2+1"], ["=J3*2", "=N3+1"]]
+
+    client.backend.reset_counts()
+    assert gss.fill_formulas(ws) is None  # nothing appended since
+    assert _writes(client) == []
+
+    ws.load([_row("3")], top=4)
+    sheets.invalidate(ws, 4, 4)
+    assert gss.fill_formulas(ws) == (4, 4)
+    assert ws.values()[3][13:15] == ["=J4*2", "=N4+1"]
+    assert gss.fill_formulas(ws, full=True) == (2, 4)
+
+
+def test_partial_update_call_counts_on_fake_backend(gss, monkeypatch):
+    client = FakeClient()
+    ws = client.create("sid").add_tab("Bets", 20, len(HEADER))
+    ws.load([[""] * 13 + ["=A1", "=B1"], *[[]] * 5, HEADER, _row("1", "ev1", "Win", "10"), _row("2", "ev2")])
+    csv_rows = [
+        {"Bet ID#": "2", "Date": "2025-09-20", "Start Time": "19:05", "Event ID": "ev2", "Result": "Loss", "Profit/Loss": "-10"},
+        {"Bet ID#": "3", "Date": "2025-09-20", "Start Time": "18:00", "Event ID": "ev3", "Result": "", "Profit/Loss": ""},
+    ]
+    monkeypatch.setattr(gss, "SHEET_ID", "sid")
+    monkeypatch.setattr(gss, "SHEET_NAME", "Bets")
+    monkeypatch.setattr(gss, "read_csv_data", lambda path: csv_rows)
+    monkeypatch.setattr(gss, "should_keep", lambda dt: True)
+    sheets.use_client(client)
+    try:
+        gss.partial_update_google_sheets("unused.csv")
+        assert dict(client.backend.calls) == {
+            "open_by_key": 1, "worksheets": 1,
+            "values_batch_get": 3,  # initial read + rows refreshed after the writes and the formula fill
+            "batch_update": 4,  # cell diffs, formula fill, sort key ranks, sortRange
+            "append_rows": 1, "resize": 1,
+        }
+        assert [r[HEADER.index("Bet ID#")] for r in ws.values()[7:]] == ["3", "1", "2"]
+
+        client.backend.reset_counts()
+        sheets.reset_snapshots()
+        gss.partial_update_google_sheets("unused.csv")  # nothing changed: one read, no writes
+        assert dict(client.backend.calls) == {"values_batch_get": 1}
+    finally:
+        sheets.use_client(None)
@@ -0,0 +1,38 @@
+import json
+import time
+
+from core import odds_api
+from core.http_cache import ResponseCache, cache_key
+
+
+def test_cache_key_ignores_api_key_and_list_order():
+    a = cache_key("/v4/sports/x/odds", {"apiKey": "one", "markets": "totals,h2h"})
+    b = cache_key("/v4/sports/x/odds", {"markets": "h2h, totals", "apiKey": "two"})
+    assert a == b
+
+
+def test_get_put_and_expiry(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c.sqlite"))
+    cache.put("/e", {"markets": "h2h"}, "body", ttl=60)
+    assert cache.get("/e", {"markets": "h2h"}) == "body"
+    cache.put("/e", {"markets": "totals"}, "stale", ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("/e", {"markets": "totals"}) is None
+
+
+def test_size_bound_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c.sqlite"), max_bytes=25)
+    cache.put("/a", None, "x" * 10, ttl=60)
+    cache.put("/b", None, "y" * 10, ttl=60)
+    assert cache.get("/a", None) == "x" * 10  # /b is now least recently used
+    cache.put("/c", None, "z" * 10, ttl=60)
+    assert cache.get("/b", None) is None
+    assert cache.get("/a", None) is not None
+
+
+def test_ttl_for_completed_event():
+    url = "https://api.the-odds-api.com/v4/sports/baseball_mlb/events/abc/odds"
+    done = json.dumps({"id": "abc", "commence_time": "2020-01-01T00:00:00Z"})
+    assert odds_api.ttl_for(url, done) == odds_api.DEFAULT_TTLS["completed"]
+    live_url = "https://api.the-odds-api.com/v4/sports/baseball_mlb/odds"
+    assert odds_api.ttl_for(live_url, "[]") == odds_api.DEFAULT_TTLS["live"]
@@ -0,0 +1,62 @@
+import requests
+
+from core import http_session
+
+
+class FakeResponse:
+    def __init__(self, status, body=b"{}", headers=None):
+        self.status_code = status
+        self.content = body
+        self.headers = headers or {}
+
+
+class FakeSession:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        out = self.outcomes.pop(0)
+        if isinstance(out, Exception):
+            raise out
+        return out
+
+
+def _patch(monkeypatch, outcomes):
+    fake = FakeSession(outcomes)
+    monkeypatch.setattr(http_session, "get_session", lambda: fake)
+    monkeypatch.setattr(http_session.time, "sleep", lambda s: None)
+    http_session.reset_stats()
+    return fake
+
+
+def test_retries_transient_statuses_and_counts(monkeypatch):
+    fake = _patch(
+        monkeypatch,
+        [
+            FakeResponse(503),
+            requests.Timeout("slow"),
+            FakeResponse(200, b"x" * 100, {"Content-Length": "40"}),
+        ],
+    )
+    r = http_session.get("https://example.test/odds", retries=3)
+    assert r.status_code == 200 and fake.calls == 3
+    stats = http_session.stats()
+    assert stats["retries"] == 2
+    assert stats["requests"] == 3
+    assert stats["bytes_decoded"] == 102
+    assert stats["bytes"] == 42
+
+
+def test_returns_last_response_when_retries_exhausted(monkeypatch):
+    _patch(monkeypatch, [FakeResponse(429), FakeResponse(429)])
+    r = http_session.get("https://example.test/odds", retries=1)
+    assert r.status_code == 429
+    assert http_session.stats()["retries"] == 1
+
+
+def test_does_not_retry_client_errors(monkeypatch):
+    fake = _patch(monkeypatch, [FakeResponse(404)])
+    assert http_session.get("https://example.test/odds", retries=3).status_code == 404
+    assert fake.calls == 1
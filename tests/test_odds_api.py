@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+from core import odds_api
+from core.tick_store import TickStore
+
+
+def teardown_function(_fn):
+    odds_api.configure_books([], "us")
+
+
+def test_bookmakers_param_when_no_more_expensive():
+    odds_api.configure_books(["pinnacle", "fanduel"], "us")
+    assert odds_api.book_params() == {"bookmakers": "pinnacle,fanduel"}
+    assert odds_api.billing_regions() == 1
+
+
+def test_regions_param_when_bookmakers_cost_more():
+    books = [f"book{i}" for i in range(11)]
+    odds_api.configure_books(books, "us")
+    assert odds_api.book_params() == {"regions": "us"}
+    odds_api.configure_books(books, "us,eu")
+    assert "bookmakers" in odds_api.book_params()
+
+
+def test_payload_report_measures_discarded_books(tmp_path):
+    odds_api.configure_books(["pinnacle"], "us", prefer_bookmakers=False)
+    stats = odds_api.PayloadStats()
+    payload = [{"bookmakers": [{"key": "pinnacle"}, {"key": "bovada"}, {"key": "mybookieag"}]}]
+    stats.record(3000, 0.003, payload)
+    baseline = str(tmp_path / "baseline.json")
+    assert "would save ~2.0 KB" in stats.report(baseline)
+
+    odds_api.configure_books(["pinnacle"], "us")
+    stats = odds_api.PayloadStats()
+    stats.record(1000, 0.001, [{"bookmakers": [{"key": "pinnacle"}]}])
+    assert "saved ~2.0 KB" in stats.report(baseline)
+
+
+def test_fresh_responses_are_recorded_as_ticks(tmp_path, monkeypatch):
+    body = '{"id": "ev1", "bookmakers": [{"key": "pinnacle", "markets": [{"key": "h2h", "outcomes": [{"name": "A", "price": 110}]}]}]}'
+    fake = SimpleNamespace(status_code=200, text=body, headers={})
+    monkeypatch.setattr(odds_api.http_session, "get", lambda *a, **k: fake)
+    store = TickStore(str(tmp_path))
+    odds_api.configure_ticks(store)
+    try:
+        r = odds_api.get("https://api.the-odds-api.com/v4/sports/baseball_mlb/events/ev1/odds")
+        assert r.json()["id"] == "ev1"
+        assert odds_api.flush_ticks() == 1
+    finally:
+        odds_api.configure_ticks(None)
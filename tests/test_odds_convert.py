@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from core import odds_convert as oc
+
+
+def _prob(n):
+    return 100.0 / (n + 100.0) if n > 0 else -n / (-n + 100.0)
+
+
+def _decimal(n):
+    return 1.0 + n / 100.0 if n > 0 else 1.0 + 100.0 / abs(n)
+
+
+def test_tables_match_the_formulas_exactly():
+    for n in list(range(-oc.TABLE_MAX, 0)) + list(range(1, oc.TABLE_MAX + 1)):
+        assert oc.american_to_prob(n) == _prob(n)
+        assert oc.american_to_decimal(n) == _decimal(n)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("+150", _prob(150)), ("-110", _prob(-110)), (" -110 ", _prob(-110)), ("−120", _prob(-120)),
+     ("150.0", _prob(150)), (-110.0, _prob(-110)), (150.5, _prob(150.5)), (25000, _prob(25000)),
+     ("-25000", _prob(-25000)), ("", None), ("abc", None), ("0", None), (0, None), (None, None),
+     (float("nan"), None), (True, None)],
+)
+def test_american_to_prob_inputs(value, expected):
+    assert oc.american_to_prob(value) == expected
+
+
+def test_decimal_conversions_and_back():
+    assert oc.american_to_decimal("-120") == pytest.approx(1.8333333)
+    assert oc.american_to_decimal("+150") == 2.5
+    assert oc.american_to_decimal("x") is None
+    assert oc.decimal_to_american(2.5) == 150
+    assert oc.decimal_to_american(1.8333333333) == -120
+    assert oc.decimal_to_american(1.0) is None
+    assert oc.format_american(oc.decimal_to_american(2.5)) == "+150"
+    assert oc.format_american(None) == ""
+    assert oc.prob_to_decimal(0.4) == 2.5
+    for n in (-500, -110, 100, 135, 900):
+        assert oc.prob_to_american(oc.american_to_prob(n)) == n
+        assert oc.decimal_to_american(oc.american_to_decimal(n)) == n
+
+
+def test_array_variants_match_scalars():
+    odds = np.array([-110, 150, 0, np.nan, 150.5, -25000, 25000, oc.TABLE_MAX, -oc.TABLE_MAX])
+    probs = oc.american_to_prob_array(odds)
+    decs = oc.american_to_decimal_array(odds)
+    for o, p, d in zip(odds.tolist(), probs.tolist(), decs.tolist()):
+        expected = oc.american_to_prob(o)
+        assert (np.isnan(p) and expected is None) or p == expected
+        expected = oc.american_to_decimal(o)
+        assert (np.isnan(d) and expected is None) or d == expected
+    grid = np.linspace(0.0, 1.0, 1001)
+    assert oc.prob_to_american_array(grid).tolist() == [oc.prob_to_american(p) for p in grid.tolist()]
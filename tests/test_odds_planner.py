@@ -0,0 +1,41 @@
+from core.odds_planner import line_offered, plan_event_requests
+
+
+def family(market):
+    m = market.lower()
+    if m.startswith("spread"):
+        return "spreads"
+    if m.startswith("total"):
+        return "totals"
+    if m in ("h2h", "ml", "moneyline"):
+        return "h2h"
+    return None
+
+
+def test_plan_groups_bets_by_event():
+    triplets = [
+        ("ev1", "Moneyline", "Yankees"),
+        ("ev2", "Totals", "Over 44.5"),
+        ("ev1", "Spreads", "Yankees -1.5"),
+        ("ev1", "Totals", "Under 8.5"),
+        ("ev1", "player_hits", "Judge Over 0.5"),
+        ("ev1", "Totals", "Over 9.5"),
+    ]
+    plans = plan_event_requests(triplets, family)
+    assert [p.event_id for p in plans] == ["ev1", "ev2"]
+    ev1 = plans[0]
+    assert ev1.bets == [0, 2, 3, 5]
+    assert ev1.markets == "h2h,spreads,alternate_spreads,totals,alternate_totals"
+    assert plans[1].markets == "totals,alternate_totals"
+
+
+def test_line_offered_matches_the_exact_line():
+    rows = [
+        ["ev1", "totals", "Over 8½", "Pinnacle", "totals", "Over", "8.5", "-110"],
+        ["ev1", "spreads", "Yankees -1.5", "Pinnacle", "spreads", "Yankees", "-1.5", "+140"],
+    ]
+    assert line_offered("Over 8½", rows)
+    assert line_offered("yankees  -1.5", rows)
+    assert not line_offered("Over 9.5", rows)
+    assert not line_offered("Yankees +1.5", rows)
+    assert not line_offered("Over 8.5", [])
@@ -0,0 +1,89 @@
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from core import odds_api
+from core.odds_planner import EventRequest
+from core.odds_quota import QuotaTracker, estimate_cost, schedule_requests
+
+NOW = datetime(2025, 9, 21, 16, 0, tzinfo=timezone.utc)
+COMMENCE = {
+    "late": "2025-09-21T20:25:00Z",
+    "early": "2025-09-21T17:00:00Z",
+    "started": "2025-09-21T15:30:00Z",
+}
+
+
+def plans():
+    return [
+        EventRequest("late", ["spreads", "totals"], [0]),
+        EventRequest("unknown", ["h2h"], [1]),
+        EventRequest("early", ["totals"], [2]),
+        EventRequest("started", ["spreads"], [3]),
+    ]
+
+
+def test_estimate_cost_counts_markets_and_regions():
+    assert estimate_cost("spreads,alternate_spreads", "us") == 2
+    assert estimate_cost("h2h,totals", "us,eu") == 4
+
+
+def test_schedule_orders_by_commence_time():
+    kept, notes = schedule_requests(plans(), COMMENCE, remaining=10_000, regions="us", now=NOW)
+    assert [p.event_id for p in kept] == ["early", "late", "started", "unknown"]
+    assert notes == []
+    assert not any(p.mains_only for p in kept)
+
+
+def test_schedule_skips_alternates_before_dropping_events():
+    kept, notes = schedule_requests(plans(), COMMENCE, remaining=10, regions="us", reserve=3, now=NOW)
+    assert len(kept) == 4 and all(p.mains_only for p in kept)
+    assert kept[1].markets == "spreads,totals"
+
+    kept, notes = schedule_requests(plans(), COMMENCE, remaining=6, regions="us", reserve=3, now=NOW)
+    assert [p.event_id for p in kept] == ["early", "late"]
+    assert len(notes) == 2
+
+
+def test_tracker_records_usage_headers(tmp_path):
+    path = str(tmp_path / "quota.json")
+    tracker = QuotaTracker(path)
+    tracker.record({"x-requests-remaining": "480", "x-requests-used": "20"})
+    tracker.record({"X-Requests-Remaining": "477", "X-Requests-Used": "23"})
+    assert tracker.remaining == 477 and tracker.spent == 3
+    tracker.save()
+    assert QuotaTracker(path).remaining == 477
+
+
+def _saved(tmp_path, remaining, updated_at):
+    path = tmp_path / "quota.json"
+    path.write_text(json.dumps({"remaining": remaining, "used": 500 - remaining, "updated_at": updated_at}))
+    return str(path)
+
+
+def test_saved_quota_from_an_earlier_month_is_discarded(tmp_path):
+    assert QuotaTracker(_saved(tmp_path, 5, "2025-08-31T23:00:00+00:00"), now=NOW).remaining is None
+    assert QuotaTracker(_saved(tmp_path, 5, "2025-09-02T10:00:00+00:00"), now=NOW).remaining == 5
+    assert QuotaTracker(_saved(tmp_path, 5, ""), now=NOW).remaining is None
+
+
+def test_saved_quota_below_the_floor_lets_one_request_refresh_it(tmp_path, monkeypatch):
+    tracker = QuotaTracker(_saved(tmp_path, 5, "2025-09-02T10:00:00+00:00"), now=NOW)
+    headers = {"x-requests-remaining": "500", "x-requests-used": "0"}
+    calls = []
+
+    def fake_get(*a, **k):
+        calls.append(a)
+        return SimpleNamespace(status_code=200, text="[]", headers=headers)
+
+    monkeypatch.setattr(odds_api.http_session, "get", fake_get)
+    odds_api.configure_quota(tracker, floor=25)
+    try:
+        assert odds_api.get("https://api.the-odds-api.com/v4/sports").status_code == 200
+        assert tracker.live and tracker.remaining == 500
+        headers = {"x-requests-remaining": "20", "x-requests-used": "480"}
+        assert odds_api.get("https://api.the-odds-api.com/v4/sports").status_code == 200
+        assert odds_api.get("https://api.the-odds-api.com/v4/sports").status_code == 429
+        assert len(calls) == 2
+    finally:
+        odds_api.configure_quota(None)
@@ -0,0 +1,71 @@
+import pytest
+
+import config
+import odds_sync
+from core import odds_api, sheets
+from testing.fake_gspread import FakeClient
+
+BETS = [
+    ("ev1", "Moneyline", "Yankees"),
+    ("ev1", "Spreads", "Yankees -1.5"),  # main line: in the league feed
+    ("ev1", "Totals", "Over 9.5"),  # alternate line: needs the event call
+    ("ev2", "Totals", "Over 44.5"),  # not in the feed at all
+]
+
+
+def _market(key, outcomes):
+    return {"key": key, "outcomes": [dict(zip(("name", "point", "price"), o)) for o in outcomes]}
+
+
+def feed_event():
+    return {"id": "ev1", "bookmakers": [{"key": "pinnacle", "title": "Pinnacle", "markets": [
+        _market("h2h", [("Yankees", None, -130), ("Red Sox", None, 110)]),
+        _market("spreads", [("Yankees", -1.5, 140), ("Red Sox", 1.5, -160)]),
+        _market("totals", [("Over", 8.5, -110), ("Under", 8.5, -110)]),
+    ]}]}
+
+
+@pytest.fixture
+def bets_sheet(tmp_path, monkeypatch):
+    client = FakeClient()
+    ss = client.create("sid")
+    rows = [[""] * 9 for _ in range(config.BET_FIRST_DATA_ROW - 1)]
+    for eid, mkt, sel in BETS:
+        rows.append(["", "", eid, "", "", mkt, "", "", sel])
+    ss.add_tab(config.BET_SHEET_TAB, 50, 10).load(rows)
+    ss.add_tab(config.DETAILED_ODDS_TAB, 50, 10)
+    monkeypatch.setattr(config, "GOOGLE_SHEET_ID", "sid")
+    monkeypatch.setattr(config, "EVENT_INDEX_PATH", str(tmp_path / "index.json"))
+    odds_api.configure_quota(None)
+    sheets.use_client(client)
+    calls = []
+
+    def fake_fetch(event_id, league, markets):
+        calls.append((event_id, markets))  # fetched on a thread pool; compare sorted
+        payload = feed_event() if event_id == "ev1" else {"id": event_id, "bookmakers": []}
+        payload["bookmakers"][:0] = [{"key": "pinnacle", "title": "Pinnacle", "markets": [
+            _market("alternate_totals", [("Over", 9.5 if event_id == "ev1" else 44.5, 120)])]}]
+        return payload
+
+    monkeypatch.setattr(odds_sync, "_fetch_event_odds", fake_fetch)
+    yield ss.tab(config.DETAILED_ODDS_TAB), calls
+    sheets.use_client(None)
+
+
+def test_bulk_mode_fetches_only_missing_lines_and_events(bets_sheet):
+    ws, calls = bets_sheet
+    odds_sync.refresh_detailed_odds_from_bets({"ev1": feed_event()})
+    assert sorted(calls) == [("ev1", "alternate_totals"), ("ev2", "totals,alternate_totals")]
+    rows = ws.values()[1:]
+    assert ["ev1", "spreads", "Yankees -1.5", "Pinnacle", "spreads", "Yankees", "-1.5", "140"] in rows
+    assert ["ev1", "totals", "Over 9.5", "Pinnacle", "alternate_totals", "Over", "9.5", "120"] in rows
+
+
+def test_per_event_mode_fetches_every_event(bets_sheet):
+    ws, calls = bets_sheet
+    odds_sync.refresh_detailed_odds_from_bets()
+    assert sorted(calls) == [
+        ("ev1", "h2h,spreads,alternate_spreads,totals,alternate_totals"),
+        ("ev2", "totals,alternate_totals"),
+    ]
+    assert ["ev1", "h2h", "Yankees", "Pinnacle", "h2h", "Yankees", "", "-130"] in ws.values()[1:]
@@ -0,0 +1,127 @@
+import gspread
+import pytest
+
+from core import sheets
+from testing.fake_gspread import FakeClient, RecordingWorksheet
+
+
+@pytest.fixture(autouse=True)
+def _fresh_snapshots():
+    sheets.reset_snapshots()
+    yield
+    sheets.reset_snapshots()
+
+
+def test_merge_cells_builds_rectangles():
+    cells = {(8, 14): "a", (8, 15): "b", (9, 14): "c", (9, 15): "d", (11, 14): "e", (12, 3): "f"}
+    assert sheets.merge_cells(cells) == [
+        (8, 14, [["a", "b"], ["c", "d"]]),
+        (11, 14, [["e"]]),
+        (12, 3, [["f"]]),
+    ]
+
+
+def test_writer_coalesces_cells_into_one_batch_update():
+    ws = RecordingWorksheet()
+    with sheets.SheetWriter(ws) as writer:
+        for r in (8, 9, 10):
+            writer.update_cell(r, 14, f"-1{r}")
+            writer.update_cell(r, 15, f"{r}.00")
+        writer.update_cell(9, 14, "-200")  # later write wins
+    assert ws.calls == [
+        (
+            "batch_update",
+            [{"range": "N8:O10", "values": [["-18", "8.00"], ["-200", "9.00"], ["-110", "10.00"]]}],
+            "USER_ENTERED",
+        )
+    ]
+    assert writer.calls == 1
+
+
+def test_writer_orders_clears_writes_appends_and_splits_by_size():
+    ws = RecordingWorksheet()
+    writer = sheets.SheetWriter(ws, max_cells=4)
+    writer.update_cell(20, 1, "dropped")
+    writer.batch_clear(["A8:Z"])
+    writer.update("A2", [["h1", "h2"], ["x", "y"], ["z", "w"]])
+    writer.append_row(["new", 1])
+    assert writer.flush() == 4
+    kinds = [c[0] for c in ws.calls]
+    assert kinds == ["batch_clear", "batch_update", "batch_update", "append_rows"]
+    assert [d["range"] for d in ws.calls[1][1]] == ["A2:B3"]
+    assert [d["range"] for d in ws.calls[2][1]] == ["A4:B4"]
+    assert writer.pending == 0
+
+
+def test_writer_retries_rate_limits(monkeypatch):
+    monkeypatch.setattr(sheets.time, "sleep", lambda s: None)
+    ws = RecordingWorksheet(fail_first=2)
+    writer = sheets.SheetWriter(ws)
+    writer.update_cell(1, 1, "x")
+    writer.flush()
+    assert len(ws.calls) == 1
+
+    ws = RecordingWorksheet(fail_first=10)
+    writer = sheets.SheetWriter(ws)
+    writer.update_cell(1, 1, "x")
+    with pytest.raises(gspread.exceptions.APIError):
+        writer.flush()
+
+
+def test_snapshot_batches_tabs_and_refreshes_only_written_rows():
+    client = FakeClient()
+    ss = client.create("sid")
+    ws = ss.add_tab("Bets", 10, 2).load([["h1", "h2"], ["a", "1"], ["b", "2"]])
+    ss.add_tab("Live Odds", 10, 1).load([["League"], ["mlb"]])
+    assert sheets.prefetch(ss, ["Bets", "Live Odds"]) == 1
+    assert sheets.get_values(ws) == [["h1", "h2"], ["a", "1"], ["b", "2"]]
+    assert sheets.prefetch(ss, ["Bets", "Live Odds"]) == 0
+
+    with sheets.SheetWriter(ws) as writer:
+        writer.update_cell(3, 2, "20")
+    ws.load([["c", "3"]], top=4)  # a write outside the touched rows is not seen
+    assert sheets.get_values(ws) == [["h1", "h2"], ["a", "1"], ["b", "20"]]
+    assert client.backend.log[-1] == ("values_batch_get", "Bets")  # the write refreshed its rows in one read
+
+    sheets.invalidate(ws)
+    assert sheets.get_values(ws)[-1] == ["c", "3"]
+    assert client.backend.calls["values_batch_get"] == 3
+
+
+def test_write_header_buffers_the_clear_in_the_writer():
+    client = FakeClient()
+    ws = client.create("sid").add_tab("Live Odds", 10, 3).load([["old", "header", "x"], ["stale", "row", "y"]])
+    writer = sheets.SheetWriter(ws)
+    sheets.write_header(ws, ["League", "Event ID"], writer=writer)
+    writer.append_rows([["mlb", "ev1"]])
+    assert client.backend.total_calls == 0  # the tab keeps its rows until the flush
+    writer.flush()
+    assert [m for m, _ in client.backend.log] == ["batch_clear", "batch_update", "append_rows"]
+    assert ws.values() == [["League", "Event ID"], ["mlb", "ev1"]]
+
+
+def test_client_spreadsheet_and_worksheets_are_cached(monkeypatch):
+    client = FakeClient()
+    ss = client.create("sid")
+    ss.add_tab("Bets")
+    ss.add_tab("Live Odds")
+    auths = []
+
+    def authorize(creds):
+        auths.append(creds)
+        return client
+
+    monkeypatch.setattr(sheets.Credentials, "from_service_account_file", lambda *a, **k: object())
+    monkeypatch.setattr(sheets.gspread, "authorize", authorize)
+    monkeypatch.setattr(sheets, "_client_handle", None)
+    sheets.forget_handles()
+    try:
+        bets = sheets.open_ws("sid", "Bets")
+        assert sheets.open_ws("sid", "Bets") is bets
+        assert sheets.open_ws("sid", "Live Odds").title == "Live Odds"
+        with pytest.raises(gspread.WorksheetNotFound):
+            sheets.open_ws("sid", "Missing", create=False)
+        assert len(auths) == 1
+        assert dict(client.backend.calls) == {"open_by_key": 1, "worksheets": 1}
+    finally:
+        sheets.forget_handles()
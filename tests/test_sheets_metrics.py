@@ -0,0 +1,36 @@
+from core import sheets, sheets_metrics
+from core.sheets_metrics import SheetsMetrics
+from testing.fake_gspread import RecordingWorksheet
+
+
+def test_attempts_are_recorded_per_op_and_tab(monkeypatch):
+    metrics = SheetsMetrics()
+    monkeypatch.setattr(sheets, "METRICS", metrics)
+    monkeypatch.setattr(sheets.time, "sleep", lambda s: None)
+    writer = sheets.SheetWriter(RecordingWorksheet(fail_first=2))
+    writer.update_cell(1, 1, "x")
+    writer.flush()
+
+    [op] = metrics.to_dict()["ops"]
+    assert (op["op"], op["tab"], op["calls"], op["errors"]) == ("values_batch_update", "Bets", 3, {"429": 2})
+    assert sum(op["buckets"]) == 3
+    assert "values_batch_update" in metrics.summary()[1]
+
+
+def test_run_report_merges_stages_and_compares_with_previous(tmp_path, monkeypatch):
+    metrics = SheetsMetrics()
+    monkeypatch.setattr(sheets_metrics, "METRICS", metrics)
+    stage = SheetsMetrics()
+    stage.record("values_batch_get", "Bets", 0.3)
+    metrics.merge(stage.to_dict())
+    metrics.merge(stage.to_dict())
+    assert metrics.total_calls() == 2
+
+    lines = []
+    first = sheets_metrics.finish_run(str(tmp_path), {"clv_sync": stage.to_dict()}, log=lines.append)
+    assert sheets_metrics.load_json(first)["stages"]["clv_sync"]["total_calls"] == 1
+    metrics.reset()
+    metrics.record("values_batch_get", "Bets", 0.3)
+    monkeypatch.setattr(sheets_metrics.time, "gmtime", lambda: (2099, 1, 1, 0, 0, 0, 3, 1, 0))
+    sheets_metrics.finish_run(str(tmp_path), log=lines.append)
+    assert "Previous run: 2 Sheets API calls (-1)." in lines
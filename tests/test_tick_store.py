@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+
+from core.tick_store import TickStore, ticks_from_payload
+
+
+T0 = datetime(2025, 9, 20, 23, 0, tzinfo=timezone.utc)
+
+
+def _payload(price_home, price_over):
+    return {
+        "id": "ev1",
+        "bookmakers": [
+            {
+                "key": "pinnacle",
+                "markets": [
+                    {"key": "h2h", "outcomes": [{"name": "Yankees", "price": price_home}]},
+                    {"key": "totals", "outcomes": [{"name": "Over", "price": price_over, "point": 8.5}]},
+                ],
+            }
+        ],
+    }
+
+
+def test_ticks_from_payload_flattens_outcomes():
+    ticks = ticks_from_payload([_payload(-120, -105)], T0)
+    assert [(t.market, t.outcome, t.point, t.price) for t in ticks] == [
+        ("h2h", "Yankees", None, -120.0),
+        ("totals", "Over", 8.5, -105.0),
+    ]
+
+
+def test_snapshot_as_of_across_day_partitions(tmp_path):
+    store = TickStore(str(tmp_path))
+    store.add(ticks_from_payload(_payload(-120, -105), T0))
+    store.flush()
+    store.add(ticks_from_payload(_payload(-130, -110), T0 + timedelta(hours=2)))  # next UTC day
+    store.flush()
+    assert len(store.days()) == 2
+
+    before = {(t.market, t.price) for t in store.snapshot(T0 + timedelta(hours=1))}
+    after = {(t.market, t.price) for t in store.snapshot(T0 + timedelta(hours=3))}
+    assert before == {("h2h", -120.0), ("totals", -105.0)}
+    assert after == {("h2h", -130.0), ("totals", -110.0)}
+    assert store.snapshot(T0 - timedelta(minutes=1)) == []
+    assert store.snapshot(T0 + timedelta(hours=3), event_ids=["other"]) == []
+
+
+def test_compact_keeps_ticks(tmp_path):
+    store = TickStore(str(tmp_path))
+    for minutes in (0, 10, 20):
+        store.add(ticks_from_payload(_payload(-120 - minutes, -105), T0 + timedelta(minutes=minutes)))
+        store.flush()
+    day = store.days()[0]
+    assert store.compact(day) == 3
+    assert list(store.read_day(day)["price"]) == [-120, -105, -130, -105, -140, -105]
+    assert {t.price for t in store.snapshot(T0 + timedelta(minutes=30))} == {-140.0, -105.0}